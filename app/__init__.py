@@ -50,8 +50,17 @@ def create_app(config_name: Optional[str] = None) -> Flask:
     setup_logging(app)
     
     # Настройка middleware
-    from app.middleware import LoggingMiddleware
+    from app.middleware import (
+        LoggingMiddleware, RequestTimingMiddleware, MetricsMiddleware, QueryInspectorMiddleware
+    )
     LoggingMiddleware(app)
+    RequestTimingMiddleware(app)
+    MetricsMiddleware(app)
+    QueryInspectorMiddleware(app)
+    
+    # Собранные статические файлы
+    from app.utils.assets import init_assets
+    init_assets(app)
     
     # Регистрация blueprints
     register_blueprints(app)
@@ -77,29 +86,25 @@ def register_blueprints(app: Flask) -> None:
 
 def register_error_handlers(app: Flask) -> None:
     """Регистрация обработчиков ошибок."""
-    from app.utils import log_request
+    # Запись о запросе с итоговым статусом пишет LoggingMiddleware
     
     @app.errorhandler(404)
     def not_found(error):
         logger.warning(f"404 ошибка: {error}")
-        log_request(response_status=404)
         return {"error": "Ресурс не найден"}, 404
     
     @app.errorhandler(500)
     def internal_error(error):
         logger.error(f"500 ошибка: {error}", exc_info=True)
-        log_request(response_status=500)
         db.session.rollback()
         return {"error": "Внутренняя ошибка сервера"}, 500
     
     @app.errorhandler(400)
     def bad_request(error):
         logger.warning(f"400 ошибка: {error}")
-        log_request(response_status=400)
         return {"error": "Неверный запрос"}, 400
     
     @app.errorhandler(413)
     def request_entity_too_large(error):
         logger.warning(f"413 ошибка: Файл слишком большой - {error}")
-        log_request(response_status=413)
         return {"error": "Файл слишком большой. Максимальный размер: 100 МБ"}, 413 
\ No newline at end of file
@@ -26,6 +26,26 @@ class Config:
     # Настройки загрузки файлов
     MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100 MB
     
+    # Собранная статика (build_assets.py): подставлять файлы из манифеста
+    USE_ASSET_MANIFEST = False
+    
+    # Заголовок Server-Timing с фазами запроса: 'off', 'admin' (только для
+    # вошедших в админку) или 'all'
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', 'admin')
+    
+    # Каталог mmap-файлов метрик воркеров (gunicorn -w N); без него метрики
+    # хранятся в памяти процесса. Каталог очищается перед запуском сервера
+    METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+    
+    # Анализ SQL запросов: медленные запросы, повторы одного запроса (N+1)
+    # и бюджеты @query_budget пишутся в performance.log
+    QUERY_INSPECTOR = {
+        'enabled': True,
+        'slow_query_threshold': 0.1,  # Секунды
+        'repeat_threshold': 5,        # Повторов одного отпечатка за запрос
+        'enforce_budgets': False      # QueryBudgetExceeded при превышении бюджета
+    }
+    
     # Другие настройки
     JSON_AS_ASCII = False  # Поддержка UTF-8 в JSON ответах
     JSONIFY_PRETTYPRINT_REGULAR = True
@@ -42,6 +62,9 @@ class DevelopmentConfig(Config):
     
     # Расширенное логирование
     SQLALCHEMY_ECHO = True
+    
+    # Фазы запроса видны в DevTools для всех страниц
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', 'all')
 
 
 class ProductionConfig(Config):
@@ -57,6 +80,9 @@ class ProductionConfig(Config):
     # Безопасность
     SQLALCHEMY_ECHO = False
     
+    # Минифицированные CSS/JS и сжатые изображения
+    USE_ASSET_MANIFEST = True
+    
     # Проверка обязательных переменных окружения
     @classmethod
     def init_app(cls, app):
@@ -84,6 +110,9 @@ class TestingConfig(Config):
     
     # Быстрые хеши для тестов
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=1)
+    
+    # Превышение бюджета запросов маршрута проваливает тест
+    QUERY_INSPECTOR = {**Config.QUERY_INSPECTOR, 'enforce_budgets': True}
 
 
 # Словарь конфигураций
@@ -13,15 +13,29 @@ class LoggingConfig:
     # Директория для логов
     LOG_DIR = "logs"
     
-    # Общие настройки
+    # Ротация и хранение файлов, для которых в LOG_FILES они не заданы
     DEFAULT_ROTATION = "10 MB"
     DEFAULT_RETENTION = "30 days"
     
-    # Настройки компрессии
-    COMPRESSION = "gz"
+    # Сжатие ротированных файлов в фоновых потоках: method - 'gz', 'zst'
+    # (нужен пакет zstandard) или None; level - None для уровня метода по умолчанию
+    COMPRESSION = {
+        'method': os.getenv('LOG_COMPRESSION', 'gz') or None,
+        'level': int(os.environ['LOG_COMPRESSION_LEVEL']) if os.getenv('LOG_COMPRESSION_LEVEL') else None,
+        'max_concurrent': 1  # Одновременных сжатий на процесс
+    }
     
     # Базовый уровень логирования
     DEFAULT_LEVEL = "INFO"
+    
+    # Формат файлов логов: 'text' (строки с разделителем |) или 'jsonl' (JSON Lines с полями extra)
+    FILE_FORMAT = os.getenv('LOG_FILE_FORMAT', 'text')
+    
+    # Несколько воркеров: строки отправляются в Unix сокет процесса-агрегатора
+    # (python -m app.utils.log_aggregator), который один пишет и ротирует файлы
+    AGGREGATOR = {
+        'socket': os.getenv('LOG_AGGREGATOR_SOCKET') or None
+    }
 
 
 class DevelopmentLoggingConfig(LoggingConfig):
@@ -30,7 +44,7 @@ class DevelopmentLoggingConfig(LoggingConfig):
     # Более подробное логирование в разработке
     DEFAULT_LEVEL = "DEBUG"
     
-    # Настройки файлов логов
+    # Файлы логов: logs/<имя>.log с уровнем, ротацией и сроком хранения
     LOG_FILES = {
         'app': {
             'level': 'DEBUG',
@@ -82,6 +96,23 @@ class DevelopmentLoggingConfig(LoggingConfig):
     DIAGNOSE = True
     ENQUEUE = False  # Для разработки синхронно
     
+    # Фоновая запись файлов логов
+    ASYNC_WRITER = {
+        'enabled': False
+    }
+    
+    # Выборочное логирование запросов (в разработке пишем все)
+    REQUEST_SAMPLING = {
+        'enabled': False
+    }
+    
+    # Одна компактная запись на запрос вместо входящего запроса, REQUEST и ответа
+    # (в разработке удобнее подробные записи)
+    ACCESS_LOG = {
+        'enabled': False,
+        'fast_path': False
+    }
+    
     # SQLAlchemy логирование
     SQLALCHEMY_ECHO = True
 
@@ -92,10 +123,10 @@ class ProductionLoggingConfig(LoggingConfig):
     # Минимальное логирование в продакшене
     DEFAULT_LEVEL = "WARNING"
     
-    # Настройки файлов логов
+    # Файлы логов: logs/<имя>.log с уровнем, ротацией и сроком хранения
     LOG_FILES = {
         'app': {
-            'level': 'INFO',
+            'level': 'WARNING',
             'rotation': '100 MB',
             'retention': '60 days'
         },
@@ -128,6 +159,10 @@ class ProductionLoggingConfig(LoggingConfig):
         'performance': {
             'level': 'WARNING',
             'retention': '30 days'
+        },
+        'access': {
+            'rotation': '200 MB',
+            'retention': '30 days'
         }
     }
     
@@ -144,6 +179,32 @@ class ProductionLoggingConfig(LoggingConfig):
     DIAGNOSE = False   # Отключаем diagnose в продакшене
     ENQUEUE = True     # Асинхронное логирование в продакшене
     
+    # Фоновая запись файлов логов: диск не блокирует потоки запросов
+    ASYNC_WRITER = {
+        'enabled': True,
+        'max_queue': 10000,        # Ограничение очереди
+        'batch_size': 500,         # Пачка для досрочной записи
+        'flush_interval': 0.5,     # Максимальная задержка записи, сек
+        'overload_policy': 'drop'  # 'drop' - отбрасывать DEBUG/INFO, 'block' - ждать
+    }
+    
+    # Выборочное логирование запросов: из быстрых успешных запросов пишется 1 из rate,
+    # ошибки, медленные запросы и запросы к чувствительным путям пишутся всегда
+    REQUEST_SAMPLING = {
+        'enabled': True,
+        'rate': 10,
+        'slow_threshold': 1.0,  # Секунды
+        'always_paths': ['/admin', '/login', '/logout', '/auth'],
+        'always_methods': ['POST', 'PUT', 'PATCH', 'DELETE']
+    }
+    
+    # Одна компактная запись на запрос. fast_path - писать ее только в access.log
+    # с фиксированными колонками в обход loguru
+    ACCESS_LOG = {
+        'enabled': True,
+        'fast_path': os.getenv('LOG_ACCESS_FAST_PATH', 'false').lower() == 'true'
+    }
+    
     # SQLAlchemy логирование
     SQLALCHEMY_ECHO = False
 
@@ -154,7 +215,7 @@ class TestingLoggingConfig(LoggingConfig):
     # Минимальное логирование в тестах
     DEFAULT_LEVEL = "ERROR"
     
-    # Настройки файлов логов
+    # Файлы логов: logs/<имя>.log с уровнем, ротацией и сроком хранения
     LOG_FILES = {
         'app': {
             'level': 'ERROR',
@@ -184,6 +245,22 @@ class TestingLoggingConfig(LoggingConfig):
     DIAGNOSE = False
     ENQUEUE = False  # Синхронно в тестах
     
+    # Фоновая запись файлов логов
+    ASYNC_WRITER = {
+        'enabled': False
+    }
+    
+    # Выборочное логирование запросов
+    REQUEST_SAMPLING = {
+        'enabled': False
+    }
+    
+    # Компактная запись о запросе
+    ACCESS_LOG = {
+        'enabled': False,
+        'fast_path': False
+    }
+    
     # SQLAlchemy логирование
     SQLALCHEMY_ECHO = False
 
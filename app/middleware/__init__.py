@@ -4,5 +4,8 @@ Middleware приложения.
 """
 
 from .logging_middleware import LoggingMiddleware
+from .timing_middleware import RequestTimingMiddleware
+from .metrics_middleware import MetricsMiddleware
+from .query_middleware import QueryInspectorMiddleware
 
-__all__ = ['LoggingMiddleware'] 
\ No newline at end of file
+__all__ = ['LoggingMiddleware', 'RequestTimingMiddleware', 'MetricsMiddleware', 'QueryInspectorMiddleware'] 
\ No newline at end of file
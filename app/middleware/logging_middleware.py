@@ -5,11 +5,43 @@ Middleware для логирования HTTP запросов.
 
 import time
 import uuid
-from typing import Any
+import itertools
+from typing import Any, Dict, Iterable, Iterator
 from flask import Flask, request, g, Response, current_app
 from loguru import logger
-from app.utils import log_request, log_performance
-from app.utils.logging import get_logger
+from app.utils import log_request, log_access, log_performance
+from app.utils.logging import get_logger, get_request_context
+from app.utils.request_timing import get_phase_timings, phase_log_fields
+
+
+class CountingResponseIterable:
+    """
+    Обертка WSGI-итератора ответа, считающая отданные байты.
+    Тело не буферизуется: куски передаются серверу по мере генерации.
+    """
+    
+    def __init__(self, iterable: Iterable):
+        """
+        Инициализация обертки.
+        
+        Args:
+            iterable: Исходное тело ответа
+        """
+        self.iterable = iterable
+        self.bytes_sent = 0
+    
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self.iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            self.bytes_sent += len(chunk)
+            yield chunk
+    
+    def close(self) -> None:
+        """Закрытие исходного итератора (файлы, генераторы)."""
+        close = getattr(self.iterable, 'close', None)
+        if close is not None:
+            close()
 
 
 class LoggingMiddleware:
@@ -23,6 +55,9 @@ class LoggingMiddleware:
             app: Flask приложение
         """
         self.app = app
+        self.sampling = {'enabled': False}
+        self.access_log = False
+        self._sample_counter = itertools.count()
         if app is not None:
             self.init_app(app)
     
@@ -33,6 +68,11 @@ class LoggingMiddleware:
         Args:
             app: Flask приложение
         """
+        from app.config.logging import get_logging_config
+        logging_config = get_logging_config()
+        self.sampling = logging_config.REQUEST_SAMPLING
+        self.access_log = logging_config.ACCESS_LOG['enabled']
+        
         app.before_request(self._before_request)
         app.after_request(self._after_request)
         app.teardown_appcontext(self._teardown_request)
@@ -54,8 +94,20 @@ class LoggingMiddleware:
         # Пропускаем логирование для статических файлов в production
         if self._is_static_request() and current_app.config.get('ENV') == 'production':
             return
-            
-        logger = get_logger('requests').bind(request_id=g.request_id)
+        
+        # При выборочном логировании решение принимается после ответа,
+        # когда известны статус и длительность
+        if self.sampling['enabled'] and not self._is_always_logged():
+            g.log_deferred = True
+            return
+        
+        g.log_sample_rate = 1
+        if not self.access_log:
+            self._log_incoming()
+    
+    def _log_incoming(self) -> None:
+        """Логирование входящего запроса, параметров и заголовков."""
+        logger = get_logger('requests').bind(request_id=g.request_id, sample_rate=g.log_sample_rate)
         
         # Логируем основную информацию о запросе
         logger.info(
@@ -66,19 +118,60 @@ class LoggingMiddleware:
             user_agent=request.headers.get('User-Agent', 'Unknown')[:100]
         )
         
+        # Параметры и заголовки пишутся на DEBUG: словари строятся только если
+        # запись будет принята хотя бы одним sink
+        lazy_logger = logger.opt(lazy=True)
+        
         # Логируем параметры запроса (кроме чувствительных)
         if request.args:
-            sensitive_params = ['password', 'token', 'api_key', 'secret']
-            safe_args = {k: '***' if any(s in k.lower() for s in sensitive_params) else v 
-                        for k, v in request.args.items()}
-            if safe_args:
-                logger.debug("Query parameters", params=safe_args)
+            lazy_logger.debug("Query parameters", params=self._safe_args)
         
         # Логируем заголовки (кроме чувствительных)
+        lazy_logger.debug("Request headers", headers=self._safe_headers)
+    
+    @staticmethod
+    def _safe_args() -> Dict[str, Any]:
+        """Параметры запроса со скрытыми чувствительными значениями."""
+        sensitive_params = ['password', 'token', 'api_key', 'secret']
+        return {k: '***' if any(s in k.lower() for s in sensitive_params) else v
+                for k, v in request.args.items()}
+    
+    @staticmethod
+    def _safe_headers() -> Dict[str, Any]:
+        """Заголовки запроса без чувствительных."""
         sensitive_headers = ['authorization', 'cookie', 'x-api-key', 'x-auth-token']
-        safe_headers = {k: v for k, v in request.headers.items() 
-                       if k.lower() not in sensitive_headers}
-        logger.debug("Request headers", headers=safe_headers)
+        return {k: v for k, v in request.headers.items()
+                if k.lower() not in sensitive_headers}
+    
+    def _is_always_logged(self) -> bool:
+        """
+        Запрос, который логируется независимо от выборки (чувствительные пути и методы).
+        
+        Returns:
+            bool: True если запрос нельзя отбрасывать
+        """
+        if request.method in self.sampling.get('always_methods', ()):
+            return True
+        return any(marker in request.path for marker in self.sampling.get('always_paths', ()))
+    
+    def _sample_rate(self, status_code: int, duration: float) -> int:
+        """
+        Решение о логировании отложенного запроса.
+        
+        Args:
+            status_code: HTTP статус ответа
+            duration: Длительность обработки в секундах
+            
+        Returns:
+            int: Вес записи (1 - пишем всегда, N - пишем 1 из N) или 0 если запрос не логируется
+        """
+        if status_code >= 300 or duration >= self.sampling.get('slow_threshold', 1.0):
+            return 1
+        
+        rate = self.sampling.get('rate', 1)
+        if next(self._sample_counter) % rate == 0:
+            return rate
+        return 0
     
     def _after_request(self, response: Response) -> Response:
         """
@@ -98,46 +191,113 @@ class LoggingMiddleware:
         duration = time.time() - getattr(g, 'start_time', time.time())
         request_id = getattr(g, 'request_id', None)
         
-        # Получаем размер ответа
-        response_size = len(response.get_data()) if hasattr(response, 'get_data') else None
-        
-        logger = get_logger('requests').bind(request_id=request_id)
-        
-        # Логируем ответ
-        log_request(
-            response_status=response.status_code,
-            response_size=response_size,
-            duration=duration
-        )
-        
         # Добавляем заголовок с ID запроса
         if request_id:
             response.headers['X-Request-ID'] = request_id
         
+        if getattr(g, 'log_deferred', False):
+            g.log_sample_rate = self._sample_rate(response.status_code, duration)
+            if not g.log_sample_rate:
+                return response
+            if not self.access_log:
+                self._log_incoming()
+        
+        sample_rate = getattr(g, 'log_sample_rate', 1)
+        context = get_request_context()
+        phases = phase_log_fields(get_phase_timings())
+        status_code = response.status_code
+        content_type = response.content_type
+        
+        # Размер ответа без чтения тела: из Content-Length или по кускам готового ответа
+        response_size = response.content_length
+        if response_size is None and not response.is_streamed:
+            response_size = response.calculate_content_length()
+        
+        if response_size is None:
+            # Потоковый ответ неизвестной длины: считаем байты по мере отдачи
+            # и логируем после закрытия итератора
+            body = CountingResponseIterable(response.response)
+            response.response = body
+            start_time = getattr(g, 'start_time', time.time())
+            response.call_on_close(lambda: self._log_response(
+                context, status_code, content_type, body.bytes_sent,
+                time.time() - start_time, sample_rate, phases
+            ))
+            return response
+        
+        self._log_response(context, status_code, content_type, response_size, duration, sample_rate, phases)
+        return response
+    
+    def _log_response(self, context: Dict[str, Any], status_code: int, content_type: str,
+                      response_size: int, duration: float, sample_rate: int,
+                      phases: Dict[str, Any] = None) -> None:
+        """
+        Логирование завершенного ответа.
+        
+        Args:
+            context: Контекст запроса
+            status_code: HTTP статус ответа
+            content_type: Тип содержимого ответа
+            response_size: Размер ответа в байтах
+            duration: Длительность обработки в секундах
+            sample_rate: Вес записи при выборочном логировании
+            phases: Время фаз запроса (см. phase_log_fields)
+        """
+        request_id = context.get('request_id')
+        method = context.get('method', 'UNKNOWN')
+        path = context.get('path', 'UNKNOWN')
+        
+        if self.access_log:
+            # Одна компактная запись вместо REQUEST и "Response completed"
+            log_access(
+                method=method,
+                path=path,
+                status=status_code,
+                duration=duration,
+                size=response_size,
+                request_id=request_id,
+                remote_addr=context.get('remote_addr'),
+                user_agent=context.get('user_agent'),
+                sample_rate=sample_rate,
+                phases=phases
+            )
+        else:
+            # Логируем ответ
+            log_request(
+                response_status=status_code,
+                response_size=response_size,
+                duration=duration,
+                sample_rate=sample_rate,
+                context=context
+            )
+        
         # Логируем медленные запросы
         if duration > 1.0:
             log_performance(
-                operation=f"{getattr(g, 'request_method', 'UNKNOWN')} {getattr(g, 'request_path', 'UNKNOWN')}",
+                operation=f"{method} {path}",
                 duration=duration,
                 details={
                     'request_id': request_id,
-                    'status_code': response.status_code,
+                    'status_code': status_code,
                     'response_size': response_size
                 }
             )
         
+        if self.access_log:
+            return
+        
         # Логируем подробности ответа
+        logger = get_logger('requests').bind(request_id=request_id, sample_rate=sample_rate)
         logger.info(
             "Response completed",
-            method=getattr(g, 'request_method', 'UNKNOWN'),
-            path=getattr(g, 'request_path', 'UNKNOWN'),
-            status_code=response.status_code,
+            method=method,
+            path=path,
+            status_code=status_code,
             duration=round(duration, 3),
             response_size=response_size,
-            content_type=response.content_type
+            content_type=content_type,
+            **(phases or {})
         )
-        
-        return response
     
     def _teardown_request(self, error: Any = None) -> None:
         """
@@ -0,0 +1,95 @@
+"""
+Middleware для сбора метрик запросов.
+Счетчики и гистограммы длительности по маршрутам, состояние пула БД, время загрузок.
+"""
+
+import time
+from flask import Flask, Response, request, g
+
+from app.utils.logging import get_route_label
+from app.utils.metrics import metrics
+from app.utils.request_timing import get_phase_timings
+
+# Состояния пула соединений SQLAlchemy и методы QueuePool для них
+POOL_STATES = (
+    ('size', 'size'),
+    ('checked_out', 'checkedout'),
+    ('checked_in', 'checkedin'),
+    ('overflow', 'overflow'),
+)
+
+
+class MetricsMiddleware:
+    """Middleware для сбора метрик запросов."""
+
+    def __init__(self, app: Flask = None):
+        """
+        Инициализация middleware.
+
+        Args:
+            app: Flask приложение
+        """
+        self.app = app
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Инициализация middleware для приложения.
+
+        Args:
+            app: Flask приложение
+        """
+        metrics.configure(app.config.get('METRICS_MULTIPROC_DIR'))
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self) -> None:
+        """Начало отсчета длительности запроса."""
+        g.metrics_start = time.perf_counter()
+
+    def _after_request(self, response: Response) -> Response:
+        """
+        Учет запроса в метриках.
+
+        Args:
+            response: HTTP ответ
+
+        Returns:
+            Response: Ответ без изменений
+        """
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+
+        route = get_route_label()
+        metrics.inc('http_requests_total', {
+            'method': request.method,
+            'route': route,
+            'status': response.status_code
+        })
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - start, {
+            'method': request.method,
+            'route': route
+        })
+
+        timings = get_phase_timings()
+        if 'db' in timings:
+            metrics.inc('db_queries_total', amount=timings['db'][1])
+        if 'upload' in timings:
+            metrics.observe('upload_processing_seconds', timings['upload'][0])
+
+        self._update_pool_gauges()
+        return response
+
+    @staticmethod
+    def _update_pool_gauges() -> None:
+        """Состояние пула соединений текущего процесса."""
+        from app import db
+
+        pool = db.engine.pool
+        for state, method in POOL_STATES:
+            getter = getattr(pool, method, None)
+            if getter is not None:
+                metrics.set('db_pool_connections', getter(), {'state': state})
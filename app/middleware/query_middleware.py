@@ -0,0 +1,93 @@
+"""
+Middleware для анализа SQL запросов.
+Повторяющиеся (N+1) и медленные запросы, контроль бюджета запросов маршрута.
+"""
+
+from flask import Flask, Response, request, g, current_app
+
+from app.utils.logging import get_logger, get_route_label
+from app.utils.query_inspector import (
+    start_query_log, get_request_queries, find_repeated_queries, QueryBudgetExceeded
+)
+
+
+class QueryInspectorMiddleware:
+    """Middleware для анализа SQL запросов."""
+
+    def __init__(self, app: Flask = None):
+        """
+        Инициализация middleware.
+
+        Args:
+            app: Flask приложение
+        """
+        self.app = app
+        self.settings = {'enabled': False}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Инициализация middleware для приложения.
+
+        Args:
+            app: Flask приложение
+        """
+        self.settings = app.config.get('QUERY_INSPECTOR', {'enabled': False})
+        if not self.settings['enabled']:
+            return
+
+        # SQL запросы замеряют слушатели фазы db (RequestTimingMiddleware)
+        app.before_request(start_query_log)
+        app.after_request(self._after_request)
+
+    def _after_request(self, response: Response) -> Response:
+        """
+        Анализ SQL запросов завершенного HTTP запроса.
+
+        Args:
+            response: HTTP ответ
+
+        Returns:
+            Response: Ответ без изменений
+
+        Raises:
+            QueryBudgetExceeded: Бюджет маршрута превышен и включен enforce_budgets
+        """
+        queries = get_request_queries()
+        if not queries:
+            return response
+
+        route = get_route_label()
+        logger = get_logger('performance').bind(
+            type='QUERY',
+            route=route,
+            request_id=g.get('request_id')
+        )
+
+        # Медленные запросы
+        slow_threshold = self.settings['slow_query_threshold']
+        for query, duration in queries:
+            if duration >= slow_threshold:
+                logger.bind(query=query, duration=round(duration, 3)).warning(
+                    f"SLOW QUERY {duration:.3f}s on {request.method} {route}: {query[:300]}"
+                )
+
+        # Повторы одного и того же запроса (N+1)
+        repeated = find_repeated_queries(queries, self.settings['repeat_threshold'])
+        for query, stats in repeated.items():
+            logger.bind(query=query, count=stats['count'], duration=round(stats['total_time'], 3)).warning(
+                f"N+1 QUERY x{stats['count']} ({stats['total_time']:.3f}s) on "
+                f"{request.method} {route}: {query[:300]}"
+            )
+
+        # Бюджет запросов маршрута (@query_budget)
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None and len(queries) > budget:
+            message = f"QUERY BUDGET exceeded on {request.method} {route}: {len(queries)} > {budget}"
+            logger.bind(count=len(queries), budget=budget).warning(message)
+            if self.settings.get('enforce_budgets'):
+                raise QueryBudgetExceeded(message)
+
+        return response
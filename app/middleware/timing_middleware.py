@@ -0,0 +1,124 @@
+"""
+Middleware для замера фаз обработки запроса.
+Время SQL запросов и рендеринга шаблонов, заголовок Server-Timing.
+"""
+
+import time
+from typing import Any
+from flask import Flask, Response, g, session, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.request_timing import PHASES, record_phase, record_query, get_phase_timings
+
+# Режимы заголовка Server-Timing
+SERVER_TIMING_MODES = ('off', 'admin', 'all')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Начало SQL запроса."""
+    if context is not None:
+        context.phase_timing_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Конец SQL запроса: время добавляется к фазе db, запрос - к анализу запросов."""
+    start = getattr(context, 'phase_timing_start', None)
+    if start is not None:
+        record_query(statement, time.perf_counter() - start)
+
+
+class RequestTimingMiddleware:
+    """Middleware для замера фаз обработки запроса."""
+
+    def __init__(self, app: Flask = None):
+        """
+        Инициализация middleware.
+
+        Args:
+            app: Flask приложение
+        """
+        self.app = app
+        self.mode = 'off'
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Инициализация middleware для приложения.
+
+        Args:
+            app: Flask приложение
+        """
+        self.mode = app.config.get('SERVER_TIMING', 'admin')
+        if self.mode not in SERVER_TIMING_MODES:
+            raise ValueError(f"Неизвестный режим SERVER_TIMING: {self.mode}")
+
+        # Слушатели на классе Engine действуют для всех движков; регистрируем один раз,
+        # даже если приложение создается несколько раз
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self) -> None:
+        """Начало отсчета фаз запроса."""
+        g.timing_start = time.perf_counter()
+        g.phase_timings = {}
+
+    def _before_render(self, sender: Flask, template: Any, context: dict, **extra) -> None:
+        """Начало рендеринга шаблона."""
+        g.setdefault('render_starts', []).append(time.perf_counter())
+
+    def _after_render(self, sender: Flask, template: Any, context: dict, **extra) -> None:
+        """Конец рендеринга шаблона: время добавляется к фазе render."""
+        starts = g.get('render_starts')
+        if starts:
+            record_phase('render', time.perf_counter() - starts.pop())
+
+    def _after_request(self, response: Response) -> Response:
+        """
+        Добавление заголовка Server-Timing.
+
+        Args:
+            response: HTTP ответ
+
+        Returns:
+            Response: Обработанный ответ
+        """
+        if self.mode == 'off' or 'timing_start' not in g:
+            return response
+
+        # Проверка через "in" не отмечает сессию прочитанной и не добавляет Vary: Cookie
+        if self.mode == 'admin' and 'admin_user_id' not in session:
+            return response
+
+        response.headers['Server-Timing'] = self.format_server_timing(time.perf_counter() - g.timing_start)
+        return response
+
+    @staticmethod
+    def format_server_timing(total: float) -> str:
+        """
+        Значение заголовка Server-Timing.
+
+        Args:
+            total: Полное время обработки в секундах
+
+        Returns:
+            str: Метрики вида 'db;dur=12.3;desc="4", total;dur=20.1' (миллисекунды,
+                в desc - количество операций)
+        """
+        timings = get_phase_timings()
+        metrics = []
+        for phase in PHASES:
+            if phase not in timings:
+                continue
+            duration, count = timings[phase]
+            metrics.append(f'{phase};dur={duration * 1000:.1f};desc="{count}"')
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ', '.join(metrics)
@@ -3,7 +3,7 @@
 Содержит все роуты для управления контентом через JWT авторизацию.
 """
 
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, g
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from functools import wraps
 from loguru import logger
@@ -13,6 +13,7 @@ import uuid
 from app import db
 from app.models import User, Service, Portfolio
 from app.utils import upload_image, delete_image, get_image_info, log_security_event, log_admin_action
+from app.utils.query_inspector import query_budget
 
 
 def create_admin_blueprint(jwt_secret: str) -> Blueprint:
@@ -51,16 +52,18 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
                 details={'email': user.email}
             )
             
-            # Сохраняем пользователя в сессии
+            # Сохраняем пользователя в сессии и для view (без повторного запроса к БД)
             session['admin_user_id'] = str(user.id)
+            g.admin_user = user
             return f(*args, **kwargs)
         return decorated_function
     
     @admin_bp.route('/', strict_slashes=False)
+    @query_budget(8)
     @admin_required
     def dashboard():
         """Главная страница админки."""
-        user = User.get_by_jwt_secret(jwt_secret)
+        user = g.admin_user
         user.update_last_login()
         db.session.commit()
         
@@ -78,14 +81,16 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
     # ===== SERVICES ROUTES =====
     
     @admin_bp.route('/services', strict_slashes=False)
+    @query_budget(3)
     @admin_required
     def services():
         """Страница управления услугами."""
-        user = User.get_by_jwt_secret(jwt_secret)
+        user = g.admin_user
         services_list = Service.query.order_by(Service.sort_order).all()
         return render_template('admin/services.html', user=user, services=services_list, jwt_secret=jwt_secret)
     
     @admin_bp.route('/services/new', methods=['GET', 'POST'])
+    @query_budget(5)
     @admin_required
     def service_new():
         """Создание новой услуги."""
@@ -132,7 +137,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
                 
                 # Проверка ошибок загрузки изображения
                 if upload_error:
-                    user = User.get_by_jwt_secret(jwt_secret)
+                    user = g.admin_user
                     return render_template('admin/service_form.html', 
                                          user=user,
                                          error=f"Ошибка загрузки изображения: {upload_error}",
@@ -160,16 +165,17 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
             except Exception as e:
                 logger.error(f"Ошибка создания услуги: {e}")
                 db.session.rollback()
-                user = User.get_by_jwt_secret(jwt_secret)
+                user = g.admin_user
                 return render_template('admin/service_form.html', 
                                      user=user,
                                      error="Ошибка создания услуги", 
                                      jwt_secret=jwt_secret)
         
-        user = User.get_by_jwt_secret(jwt_secret)
+        user = g.admin_user
         return render_template('admin/service_form.html', user=user, jwt_secret=jwt_secret)
     
     @admin_bp.route('/services/<service_id>/edit', methods=['GET', 'POST'])
+    @query_budget(5)
     @admin_required
     def service_edit(service_id):
         """Редактирование услуги."""
@@ -224,7 +230,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
                 
                 # Проверка ошибок загрузки изображения
                 if upload_error:
-                    user = User.get_by_jwt_secret(jwt_secret)
+                    user = g.admin_user
                     return render_template('admin/service_form.html', 
                                          user=user,
                                          service=service,
@@ -253,17 +259,18 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
             except Exception as e:
                 logger.error(f"Ошибка обновления услуги: {e}")
                 db.session.rollback()
-                user = User.get_by_jwt_secret(jwt_secret)
+                user = g.admin_user
                 return render_template('admin/service_form.html', 
                                      user=user,
                                      service=service, 
                                      error="Ошибка обновления услуги",
                                      jwt_secret=jwt_secret)
         
-        user = User.get_by_jwt_secret(jwt_secret)
+        user = g.admin_user
         return render_template('admin/service_form.html', user=user, service=service, jwt_secret=jwt_secret)
     
     @admin_bp.route('/services/<service_id>/delete', methods=['POST'])
+    @query_budget(5)
     @admin_required
     def service_delete(service_id):
         """Удаление услуги."""
@@ -304,14 +311,16 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
     # ===== PORTFOLIO ROUTES =====
     
     @admin_bp.route('/portfolio')
+    @query_budget(3)
     @admin_required
     def portfolio():
         """Страница управления портфолио."""
-        user = User.get_by_jwt_secret(jwt_secret)
+        user = g.admin_user
         portfolio_list = Portfolio.query.order_by(Portfolio.sort_order.desc(), Portfolio.completion_date.desc()).all()
         return render_template('admin/portfolio.html', user=user, portfolio=portfolio_list, jwt_secret=jwt_secret)
     
     @admin_bp.route('/portfolio/new', methods=['GET', 'POST'])
+    @query_budget(5)
     @admin_required
     def portfolio_new():
         """Создание нового проекта."""
@@ -366,7 +375,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
                 
                 # Проверка ошибок загрузки изображения
                 if upload_error:
-                    user = User.get_by_jwt_secret(jwt_secret)
+                    user = g.admin_user
                     return render_template('admin/portfolio_form.html', 
                                          user=user,
                                          error=f"Ошибка загрузки изображения: {upload_error}",
@@ -399,7 +408,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
             except Exception as e:
                 logger.error(f"Ошибка создания проекта: {e}")
                 db.session.rollback()
-                user = User.get_by_jwt_secret(jwt_secret)
+                user = g.admin_user
                 return render_template('admin/portfolio_form.html', 
                                      user=user,
                                      error="Ошибка создания проекта",
@@ -407,7 +416,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
                                      statuses=Portfolio.Status.__dict__,
                                      jwt_secret=jwt_secret)
         
-        user = User.get_by_jwt_secret(jwt_secret)
+        user = g.admin_user
         return render_template('admin/portfolio_form.html', 
                              user=user,
                              categories=Portfolio.Category.__dict__,
@@ -415,6 +424,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
                              jwt_secret=jwt_secret)
     
     @admin_bp.route('/portfolio/<project_id>/edit', methods=['GET', 'POST'])
+    @query_budget(5)
     @admin_required
     def portfolio_edit(project_id):
         """Редактирование проекта."""
@@ -477,7 +487,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
                 
                 # Проверка ошибок загрузки изображения
                 if upload_error:
-                    user = User.get_by_jwt_secret(jwt_secret)
+                    user = g.admin_user
                     return render_template('admin/portfolio_form.html', 
                                          user=user,
                                          project=project,
@@ -511,7 +521,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
             except Exception as e:
                 logger.error(f"Ошибка обновления проекта: {e}")
                 db.session.rollback()
-                user = User.get_by_jwt_secret(jwt_secret)
+                user = g.admin_user
                 return render_template('admin/portfolio_form.html', 
                                      user=user,
                                      project=project, 
@@ -520,7 +530,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
                                      statuses=Portfolio.Status.__dict__,
                                      jwt_secret=jwt_secret)
         
-        user = User.get_by_jwt_secret(jwt_secret)
+        user = g.admin_user
         return render_template('admin/portfolio_form.html', 
                              user=user,
                              project=project,
@@ -529,6 +539,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
                              jwt_secret=jwt_secret)
     
     @admin_bp.route('/portfolio/<project_id>/delete', methods=['POST'])
+    @query_budget(5)
     @admin_required
     def portfolio_delete(project_id):
         """Удаление проекта."""
@@ -572,6 +583,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
     # ===== API ROUTES =====
     
     @admin_bp.route('/api/services')
+    @query_budget(3)
     @admin_required
     def api_services():
         """API для получения услуг."""
@@ -579,6 +591,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
         return jsonify([service.to_dict() for service in services_list])
     
     @admin_bp.route('/api/portfolio')
+    @query_budget(3)
     @admin_required
     def api_portfolio():
         """API для получения портфолио."""
@@ -586,6 +599,7 @@ def create_admin_blueprint(jwt_secret: str) -> Blueprint:
         return jsonify([project.to_dict() for project in portfolio_list])
     
     @admin_bp.route('/logout')
+    @query_budget(2)
     @admin_required
     def logout():
         """Выход из админки."""
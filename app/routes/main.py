@@ -3,16 +3,21 @@
 Содержит все основные страницы веб-сайта.
 """
 
-from flask import Blueprint, render_template, jsonify, request
+import time
+from flask import Blueprint, render_template, jsonify, request, Response
 from loguru import logger
 from datetime import datetime
+from sqlalchemy import text
 from app.models import Service, Portfolio
+from app.utils.metrics import metrics, PROCESS_START_TIME
+from app.utils.query_inspector import query_budget
 
 # Создание blueprint
 main_bp = Blueprint('main', __name__)
 
 
 @main_bp.route('/', methods=['GET'])
+@query_budget(3)
 def homepage():
     """Главная страница."""
     logger.info("Запрос к главной странице")
@@ -43,6 +48,7 @@ def api_index():
         "timestamp": datetime.utcnow().isoformat(),
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }), 200
@@ -56,6 +62,7 @@ def about():
 
 
 @main_bp.route('/services', methods=['GET'])
+@query_budget(2)
 def services():
     """Страница услуг."""
     logger.info("Запрос к странице услуг")
@@ -67,6 +74,7 @@ def services():
 
 
 @main_bp.route('/portfolio', methods=['GET'])
+@query_budget(2)
 def portfolio():
     """Страница портфолио."""
     logger.info("Запрос к странице портфолио")
@@ -111,7 +119,8 @@ def health_check():
         from app import db
         
         # Простая проверка подключения к БД
-        db.engine.execute('SELECT 1')
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
         db_status = "connected"
         
     except Exception as e:
@@ -125,7 +134,7 @@ def health_check():
             "database": db_status,
             "api": "active"
         },
-        "uptime": "OK"
+        "uptime": round(time.time() - PROCESS_START_TIME)  # Секунды с запуска процесса
     }
     
     status_code = 200 if health_data["status"] == "healthy" else 503
@@ -133,6 +142,17 @@ def health_check():
     return jsonify(health_data), status_code
 
 
+@main_bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Метрики в текстовом формате Prometheus.
+    
+    Returns:
+        Response: Метрики всех воркеров
+    """
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @main_bp.route('/docs', methods=['GET'])
 def api_docs():
     """
@@ -5,12 +5,12 @@
 
 from .upload_handler import upload_image, validate_image_file, get_upload_path, delete_image, get_image_info
 from .logging import (
-    setup_logging, get_logger, log_request, log_security_event, 
+    setup_logging, get_logger, log_request, log_access, log_security_event, 
     log_admin_action, log_file_operation, log_performance
 )
 
 __all__ = [
     'upload_image', 'validate_image_file', 'get_upload_path', 'delete_image', 'get_image_info',
-    'setup_logging', 'get_logger', 'log_request', 'log_security_event', 
+    'setup_logging', 'get_logger', 'log_request', 'log_access', 'log_security_event', 
     'log_admin_action', 'log_file_operation', 'log_performance'
 ] 
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Манифест собранных статических файлов.
+Сопоставляет исходные пути в static/ с оптимизированными версиями из static/dist/.
+"""
+
+import os
+import json
+from typing import Dict, Any, Optional
+from flask import Flask, url_for
+from loguru import logger
+
+# Каталог собранных файлов относительно static/
+DIST_DIR = 'dist'
+
+# Имя файла манифеста внутри DIST_DIR
+MANIFEST_NAME = 'manifest.json'
+
+
+def get_manifest_path(static_folder: str) -> str:
+    """
+    Путь к файлу манифеста.
+
+    Args:
+        static_folder: Абсолютный путь к папке static
+
+    Returns:
+        str: Абсолютный путь к manifest.json
+    """
+    return os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+
+
+def load_asset_manifest(static_folder: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Загрузка манифеста собранных файлов.
+
+    Args:
+        static_folder: Абсолютный путь к папке static
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Записи манифеста по исходному пути (пустой словарь если сборки нет)
+    """
+    manifest_path = get_manifest_path(static_folder)
+    if not os.path.exists(manifest_path):
+        return {}
+
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('assets', {})
+    except (OSError, ValueError) as e:
+        logger.warning(f"Не удалось прочитать манифест статики {manifest_path}: {e}")
+        return {}
+
+
+def init_assets(app: Flask) -> None:
+    """
+    Регистрация функций asset_url и asset_webp_url в шаблонах.
+
+    Манифест читается один раз при создании приложения. Если сборка
+    не выполнялась или USE_ASSET_MANIFEST выключен, шаблоны получают
+    исходные файлы.
+
+    Args:
+        app: Flask приложение
+    """
+    manifest = {}
+    if app.config.get('USE_ASSET_MANIFEST'):
+        manifest = load_asset_manifest(app.static_folder)
+        if manifest:
+            logger.info(f"Загружен манифест статики: {len(manifest)} файлов")
+        else:
+            logger.warning("Манифест статики не найден, используются исходные файлы "
+                           "(запустите python build_assets.py)")
+
+    def asset_url(filename: str) -> str:
+        """URL оптимизированной версии файла или исходного файла."""
+        entry = manifest.get(filename)
+        return url_for('static', filename=entry['file'] if entry else filename)
+
+    def asset_webp_url(filename: str) -> Optional[str]:
+        """URL WebP-копии изображения или None, если ее нет."""
+        entry = manifest.get(filename)
+        if not entry or not entry.get('webp'):
+            return None
+        return url_for('static', filename=entry['webp'])
+
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.jinja_env.globals['asset_webp_url'] = asset_webp_url
@@ -0,0 +1,321 @@
+"""
+Запись логов нескольких процессов через один процесс-агрегатор.
+Воркеры отправляют готовые строки в Unix сокет, агрегатор владеет файлами и ротацией.
+
+Запуск агрегатора (до воркеров):
+    python -m app.utils.log_aggregator [путь_к_сокету]
+"""
+
+import os
+import sys
+import socket
+import signal
+import threading
+from collections import Counter
+from typing import Dict, Any, Iterable, Tuple, Callable
+
+from .log_writer import WARNING_LEVEL_NO, ERROR_LEVEL_NO
+
+# Максимальный размер строки в одной датаграмме; длинные строки обрезаются
+MAX_RECORD_SIZE = 60 * 1024
+
+# Пометка обрезанной строки
+TRUNCATED_MARK = b' ...[truncated]\n'
+
+# Буфер приема агрегатора: запас на пики записи, пока поток записи занят диском
+RECEIVE_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def encode_packet(level_no: int, level_name: str, routes: Tuple[str, ...], data: bytes) -> bytes:
+    """
+    Датаграмма: заголовок "уровень\\tимя уровня\\tмаршруты через запятую\\n" и строка.
+
+    Args:
+        level_no: Номер уровня
+        level_name: Имя уровня
+        routes: Имена маршрутов
+        data: Закодированная строка лога
+
+    Returns:
+        bytes: Датаграмма
+    """
+    if len(data) > MAX_RECORD_SIZE:
+        data = data[:MAX_RECORD_SIZE].decode('utf-8', 'ignore').encode('utf-8') + TRUNCATED_MARK
+    return f"{level_no}\t{level_name}\t{','.join(routes)}\n".encode('utf-8') + data
+
+
+def decode_packet(packet: bytes) -> Tuple[int, str, Tuple[str, ...], bytes]:
+    """
+    Разбор датаграммы encode_packet.
+
+    Args:
+        packet: Датаграмма
+
+    Returns:
+        Tuple[int, str, Tuple[str, ...], bytes]: Номер и имя уровня, маршруты, строка
+
+    Raises:
+        ValueError: Некорректный заголовок
+    """
+    header, data = packet.split(b'\n', 1)
+    level_no, level_name, routes = header.decode('utf-8').split('\t')
+    return int(level_no), level_name, tuple(routes.split(',')), data
+
+
+class SocketLogWriter:
+    """
+    Отправка строк логов процессу-агрегатору.
+
+    Поток запроса делает одну неблокирующую отправку датаграммы. Если буфер
+    сокета заполнен, обычные записи отбрасываются, а защищенные (ERROR+ и
+    категории protected_routes) ждут места не дольше send_timeout. Если
+    агрегатор не запущен, записи отбрасываются с сообщением в stderr.
+    Количество отброшенных записей отправляется в app.log, как только
+    агрегатор снова принимает записи.
+    """
+
+    def __init__(self, socket_path: str, format_notice: Callable[[str, str, str], bytes],
+                 protected_routes: Iterable[str] = ('security', 'errors'), send_timeout: float = 0.5):
+        """
+        Инициализация писателя.
+
+        Args:
+            socket_path: Путь к Unix сокету агрегатора
+            format_notice: Построение служебной строки (уровень, источник, сообщение)
+            protected_routes: Маршруты, записи которых не отбрасываются при заполненном буфере
+            send_timeout: Максимальное ожидание места в буфере для защищенных записей
+        """
+        self.socket_path = socket_path
+        self.format_notice = format_notice
+        self.protected_routes = frozenset(protected_routes)
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        self._blocking_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._blocking_socket.settimeout(send_timeout)
+
+        self.dropped = Counter()
+        self._reported_dropped = 0
+        self._unavailable = False
+        self._lock = threading.Lock()
+
+    def is_protected(self, level_no: int, routes: Tuple[str, ...]) -> bool:
+        """Запись, которую нельзя отбрасывать при заполненном буфере."""
+        return level_no >= ERROR_LEVEL_NO or not self.protected_routes.isdisjoint(routes)
+
+    def submit(self, level_no: int, level_name: str, routes: Tuple[str, ...], data: bytes) -> bool:
+        """
+        Отправка строки агрегатору.
+
+        Args:
+            level_no: Номер уровня записи
+            level_name: Имя уровня (для счетчика отброшенных)
+            routes: Имена маршрутов
+            data: Закодированная строка
+
+        Returns:
+            bool: False если запись отброшена
+        """
+        packet = encode_packet(level_no, level_name, routes, data)
+        try:
+            self._socket.sendto(packet, self.socket_path)
+        except BlockingIOError:
+            if not (self.is_protected(level_no, routes) and self._send_blocking(packet)):
+                return self._drop(level_name)
+        except OSError as e:
+            # Агрегатор не запущен или перезапускается
+            self._report_unavailable(e)
+            return self._drop(level_name)
+
+        if self._unavailable or sum(self.dropped.values()) != self._reported_dropped:
+            self._report_recovered()
+        return True
+
+    def _send_blocking(self, packet: bytes) -> bool:
+        """Отправка с ожиданием места в буфере сокета."""
+        try:
+            self._blocking_socket.sendto(packet, self.socket_path)
+            return True
+        except OSError:
+            return False
+
+    def _drop(self, level_name: str) -> bool:
+        """Учет отброшенной записи."""
+        with self._lock:
+            self.dropped[level_name] += 1
+        return False
+
+    def _report_unavailable(self, error: OSError) -> None:
+        """Одно сообщение в stderr на каждый период недоступности агрегатора."""
+        with self._lock:
+            if self._unavailable:
+                return
+            self._unavailable = True
+        sys.stderr.write(f"Агрегатор логов недоступен ({self.socket_path}): {error!r}, записи отбрасываются\n")
+
+    def _report_recovered(self) -> None:
+        """Сообщение о потерях в app.log после восстановления связи."""
+        with self._lock:
+            self._unavailable = False
+            total_dropped = sum(self.dropped.values())
+            if total_dropped == self._reported_dropped:
+                return
+            message = (f"LOGGING aggregator unavailable or overloaded, dropped "
+                       f"{total_dropped - self._reported_dropped} records (total by level: {dict(self.dropped)})")
+            self._reported_dropped = total_dropped
+
+        notice = self.format_notice('WARNING', 'app.utils.log_aggregator:submit', message)
+        try:
+            self._socket.sendto(encode_packet(WARNING_LEVEL_NO, 'WARNING', ('app',), notice), self.socket_path)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Состояние отправки.
+
+        Returns:
+            Dict[str, Any]: Путь к сокету, доступность агрегатора и отброшенные записи по уровням
+        """
+        with self._lock:
+            return {
+                'socket': self.socket_path,
+                'available': not self._unavailable,
+                'dropped': dict(self.dropped),
+            }
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Закрытие сокетов (строки уже у агрегатора).
+
+        Args:
+            timeout: Не используется, совместимость с AsyncLogWriter.stop
+        """
+        self._socket.close()
+        self._blocking_socket.close()
+
+
+class LogAggregator:
+    """
+    Процесс-агрегатор: принимает строки воркеров и пишет их через LogRouter.
+
+    Запись на диск, ротация и сжатие выполняются только здесь, поэтому
+    воркеры не конкурируют за файлы и не ротируют их повторно. Роутер
+    агрегатора должен писать через AsyncLogWriter с политикой 'block':
+    прием датаграмм не ждет диска, а при перегрузке заполняется буфер
+    сокета и решение об отбрасывании принимает воркер.
+    """
+
+    def __init__(self, socket_path: str, router: Any):
+        """
+        Инициализация агрегатора.
+
+        Args:
+            socket_path: Путь к Unix сокету
+            router: LogRouter с файлами логов
+        """
+        self.socket_path = socket_path
+        self.router = router
+        self.received = 0
+        self.invalid = 0
+        self._socket = None
+        self._stopped = threading.Event()
+
+    def bind(self) -> None:
+        """Создание сокета (оставшийся от прошлого запуска файл удаляется)."""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_SIZE)
+        self._socket.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self._socket.settimeout(0.5)  # Проверка флага остановки
+
+    def serve_forever(self) -> None:
+        """Прием строк до вызова stop."""
+        if self._socket is None:
+            self.bind()
+
+        buffer_size = MAX_RECORD_SIZE + len(TRUNCATED_MARK) + 1024
+        try:
+            while not self._stopped.is_set():
+                try:
+                    packet = self._socket.recv(buffer_size)
+                except socket.timeout:
+                    continue
+
+                try:
+                    level_no, level_name, routes, data = decode_packet(packet)
+                except ValueError:
+                    self.invalid += 1
+                    continue
+
+                routes = tuple(name for name in routes if name in self.router.routes or name in self.router.raw_writers)
+                if routes:
+                    self.router.write_encoded(level_no, level_name, routes, data)
+                    self.received += 1
+        finally:
+            self._socket.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self.router.stop()
+
+    def stop(self) -> None:
+        """Остановка приема; оставшиеся строки дописываются в serve_forever."""
+        self._stopped.set()
+
+
+def create_log_aggregator(socket_path: str = None, config_name: str = None) -> LogAggregator:
+    """
+    Создание агрегатора с файлами логов окружения.
+
+    Args:
+        socket_path: Путь к сокету; по умолчанию AGGREGATOR['socket'] конфигурации
+        config_name: Окружение; по умолчанию FLASK_ENV
+
+    Returns:
+        LogAggregator: Агрегатор (сокет создается в serve_forever)
+    """
+    from app.config.logging import get_logging_config
+    from .log_router import LogRouter
+    from .logging import build_file_routes, create_log_directory
+
+    logging_config = get_logging_config(config_name or os.getenv('FLASK_ENV', 'development'))
+    socket_path = socket_path or logging_config.AGGREGATOR['socket']
+    if not socket_path:
+        raise ValueError("Не задан путь к сокету агрегатора логов (LOG_AGGREGATOR_SOCKET)")
+
+    create_log_directory()
+    # access.log открывается только при первой записи, если воркеры его используют
+    routes, raw_writers = build_file_routes(logging_config, include_access=True)
+    async_options = {key: value for key, value in logging_config.ASYNC_WRITER.items() if key != 'enabled'}
+    async_options['overload_policy'] = 'block'
+
+    router = LogRouter(
+        routes,
+        output_format=logging_config.FILE_FORMAT,
+        async_options=async_options,
+        raw_writers=raw_writers
+    )
+    return LogAggregator(socket_path, router)
+
+
+def main() -> None:
+    """CLI: запуск агрегатора до SIGTERM/SIGINT."""
+    aggregator = create_log_aggregator(sys.argv[1] if len(sys.argv) > 1 else None)
+
+    def handle_signal(signum, frame):
+        aggregator.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    aggregator.bind()
+    print(f"Агрегатор логов слушает {aggregator.socket_path}")
+    aggregator.serve_forever()
+    print(f"Агрегатор логов остановлен, принято записей: {aggregator.received}")
+
+
+if __name__ == '__main__':
+    main()
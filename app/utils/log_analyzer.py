@@ -5,13 +5,72 @@
 
 import os
 import re
+import io
+import gzip
 import json
-from typing import Dict, List, Any, Optional, Tuple
+import heapq
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Iterator, Callable
 from datetime import datetime, timedelta
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, deque
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+from .log_router import ACCESS_COLUMNS
+from .log_checkpoint import LogCheckpointStore, FileCheckpoint, fingerprint_line
+from .log_rollup import LogRollupStore, minute_bucket, duration_bucket, route_key
+
+try:
+    import zstandard
+except ImportError:  # Архивы .zst читаются, только если установлен zstandard
+    zstandard = None
+
+# Ротированный файл: app.2024-07-14_15-30-45_123456.log[.2][.gz|.zst]; время в имени -
+# создание файла, то есть начало его диапазона
+ROTATED_LOG_NAME = re.compile(
+    r'^(?P<name>.+?)\.(?P<stamp>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}_\d{6})(?:\.(?P<counter>\d+))?\.log(?:\.gz|\.zst)?$'
+)
+
+# Ключевые слова текстовых логов для подсчета файловых операций и событий безопасности
+FILE_KEYWORDS = ('UPLOAD', 'FILE', 'IMAGE', 'DELETE')
+SECURITY_KEYWORDS = ('AUTH', 'LOGIN', 'SECURITY', 'JWT')
+
+# Уровни, которые считаются ошибками
+ERROR_LEVELS = ('ERROR', 'CRITICAL')
+
+# Логи с записями о длительности запросов и операций
+SLOW_REQUEST_LOGS = ('performance', 'requests', 'access')
+
+# Порог медленного запроса в отчете
+SLOW_REQUEST_THRESHOLD = 1.0
+
+# Файл контрольных точек инкрементального отчета (в директории логов)
+CHECKPOINT_FILE = 'analyzer_checkpoints.json'
+
+# База поминутных агрегатов (в директории логов)
+ROLLUP_FILE = 'log_rollups.sqlite3'
+
+# Текстовая запись о запросе: "REQUEST GET /path [from addr] -> 200 (0.123s)"
+REQUEST_MESSAGE = re.compile(r'REQUEST (\S+) (\S+) .*?-> (\d{3})')
+
+# Размер части файла при параллельном разборе
+SHARD_SIZE = 32 * 1024 * 1024
+
+# Сжатые архивы: читаются только последовательно
+ARCHIVE_SUFFIXES = ('.gz', '.zst')
+
+# Диапазон, который дочитывается подряд после бинарного поиска по времени
+SEEK_MIN_RANGE = 64 * 1024
+
+# Допустимое нарушение порядка времени строк (записи нескольких потоков и процессов)
+SEEK_TOLERANCE = timedelta(seconds=5)
+
+# Размер блока при чтении файла с конца
+REVERSE_BLOCK_SIZE = 64 * 1024
+
+# Миллисекунды времени записи: сложение с готовым timedelta быстрее datetime.replace
+MILLISECONDS = tuple(timedelta(milliseconds=value) for value in range(1000))
+
 
 @dataclass
 class LogEntry:
@@ -38,32 +97,256 @@ class LogStats:
     security_events: int
 
 
+class LogStatsAggregator:
+    """
+    Потоковое вычисление LogStats.
+    
+    Записи добавляются по одной и сразу забываются: память зависит только от
+    количества уровней, источников и часов, а не от размера логов.
+    """
+    
+    # Счетчики по ключам и скалярные счетчики состояния
+    COUNTER_FIELDS = ('by_level', 'by_source', 'by_hour')
+    SCALAR_FIELDS = ('total_entries', 'errors_count', 'warnings_count', 'requests_count',
+                     'admin_actions', 'file_operations', 'security_events')
+    
+    def __init__(self):
+        self.by_level = Counter()
+        self.by_source = Counter()
+        self.by_hour = Counter()
+        
+        self.total_entries = 0
+        self.errors_count = 0
+        self.warnings_count = 0
+        self.requests_count = 0
+        self.admin_actions = 0
+        self.file_operations = 0
+        self.security_events = 0
+    
+    def merge(self, other: 'LogStatsAggregator') -> 'LogStatsAggregator':
+        """
+        Добавление состояния другого агрегатора (другого файла, часа или процесса).
+        
+        Args:
+            other: Агрегатор
+            
+        Returns:
+            LogStatsAggregator: self
+        """
+        for field in self.COUNTER_FIELDS:
+            getattr(self, field).update(getattr(other, field))
+        for field in self.SCALAR_FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        return self
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Состояние для сохранения в JSON.
+        
+        Returns:
+            Dict[str, Any]: Счетчики агрегатора
+        """
+        state = {field: dict(getattr(self, field)) for field in self.COUNTER_FIELDS}
+        state.update({field: getattr(self, field) for field in self.SCALAR_FIELDS})
+        return state
+    
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'LogStatsAggregator':
+        """
+        Восстановление агрегатора из to_dict().
+        
+        Args:
+            state: Сохраненное состояние
+            
+        Returns:
+            LogStatsAggregator: Агрегатор
+        """
+        aggregator = cls()
+        for field in cls.COUNTER_FIELDS:
+            getattr(aggregator, field).update(state.get(field, {}))
+        for field in cls.SCALAR_FIELDS:
+            setattr(aggregator, field, state.get(field, 0))
+        return aggregator
+    
+    def add(self, entry: LogEntry) -> None:
+        """
+        Учет записи.
+        
+        Args:
+            entry: Запись лога
+        """
+        # Записи выборочного логирования представляют sample_rate запросов
+        weight = LogAnalyzer.get_sample_weight(entry)
+        self.total_entries += weight
+        
+        # Статистика по уровням
+        self.by_level[entry.level] += weight
+        
+        # Статистика по источникам
+        self.by_source[entry.source] += weight
+        
+        # Статистика по часам
+        self.by_hour[f"{entry.timestamp.hour:02d}:00"] += weight
+        
+        if entry.level in ERROR_LEVELS:
+            self.errors_count += weight
+        elif entry.level == 'WARNING':
+            self.warnings_count += weight
+        
+        # Подсчет специальных типов: в JSON логах только по полю type, в текстовых по тексту
+        if entry.extra_data is not None:
+            entry_type = entry.extra_data.get('type')
+            self.requests_count += weight * (entry_type == 'REQUEST')
+            self.admin_actions += weight * (entry_type == 'ADMIN_ACTION')
+            self.file_operations += weight * (entry_type == 'FILE_OPERATION')
+            self.security_events += weight * (entry_type == 'SECURITY')
+            return
+        
+        message = entry.message.upper()
+        
+        if 'REQUEST' in message or 'RESPONSE' in message:
+            self.requests_count += weight
+        
+        if 'ADMIN' in message:
+            self.admin_actions += weight
+        
+        if any(keyword in message for keyword in FILE_KEYWORDS):
+            self.file_operations += weight
+        
+        if any(keyword in message for keyword in SECURITY_KEYWORDS):
+            self.security_events += weight
+    
+    def result(self) -> LogStats:
+        """
+        Итоговая статистика.
+        
+        Returns:
+            LogStats: Статистика по учтенным записям
+        """
+        return LogStats(
+            total_entries=self.total_entries,
+            by_level=dict(self.by_level),
+            by_source=dict(self.by_source),
+            by_hour=dict(self.by_hour),
+            errors_count=self.errors_count,
+            warnings_count=self.warnings_count,
+            requests_count=self.requests_count,
+            admin_actions=self.admin_actions,
+            file_operations=self.file_operations,
+            security_events=self.security_events
+        )
+
+
 class LogAnalyzer:
-    """Анализатор логов приложения."""
+    """
+    Анализатор логов приложения.
     
-    def __init__(self, log_dir: str = "logs"):
+    Чтение построено как цепочка генераторов: строки файла -> записи ->
+    фильтры -> агрегатор. Файлы не загружаются в память целиком, поэтому
+    анализ многогигабайтных логов требует памяти только на агрегаты.
+    """
+    
+    def __init__(self, log_dir: str = "logs", checkpoint_file: str = None, rollup_file: str = None):
         """
         Инициализация анализатора.
         
         Args:
             log_dir: Директория с логами
+            checkpoint_file: Файл контрольных точек; если задан, generate_report
+                читает только байты, дописанные с прошлого запуска
+            rollup_file: База поминутных агрегатов; если задана, analyze_logs
+                дописывает в нее новые строки и считает статистику запросом
         """
         self.log_dir = Path(log_dir)
+        self.checkpoints = LogCheckpointStore(checkpoint_file) if checkpoint_file else None
+        self.rollups = LogRollupStore(rollup_file) if rollup_file else None
         self.log_pattern = re.compile(
             r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) \| (\w+)\s*\| ([^|]+) \| (.+)'
         )
+        # Последняя разобранная секунда: (строка "YYYY-MM-DD HH:MM:SS", datetime)
+        self._second: Tuple[str, Optional[datetime]] = ('', None)
+    
+    def parse_timestamp(self, value: str, separator: str = ' ') -> datetime:
+        """
+        Разбор времени "YYYY-MM-DD HH:MM:SS.fff" без strptime на каждую строку.
+        
+        Строки одной секунды идут подряд, поэтому strptime вызывается один раз
+        на секунду, а дробная часть добавляется к закешированному значению.
+        
+        Args:
+            value: Время записи
+            separator: Разделитель даты и времени (' ' или 'T' в access.log)
+            
+        Returns:
+            datetime: Время записи
+            
+        Raises:
+            ValueError: Некорректное время
+        """
+        fraction = value[20:]
+        if value[19:20] != '.' or not fraction.isdigit() or len(fraction) > 6:
+            return datetime.strptime(value, f'%Y-%m-%d{separator}%H:%M:%S.%f')
+        
+        key, second = self._second
+        if key != value[:19]:
+            key = value[:19]
+            second = datetime.strptime(key, f'%Y-%m-%d{separator}%H:%M:%S')
+            self._second = (key, second)
+        if len(fraction) == 3:
+            return second + MILLISECONDS[int(fraction)]
+        return second + timedelta(microseconds=int(fraction.ljust(6, '0')))
     
     def parse_log_line(self, line: str) -> Optional[LogEntry]:
         """
         Парсинг строки лога.
         
+        Текстовые строки формата LoggerConfig.JSON_FORMAT разбираются по
+        фиксированной ширине времени и разделителям " | "; регулярное
+        выражение используется только для строк, не прошедших быстрый путь.
+        
         Args:
             line: Строка лога
             
         Returns:
             LogEntry или None если не удалось распарсить
         """
-        match = self.log_pattern.match(line.strip())
+        line = line.strip()
+        if line.startswith('{'):
+            return self.parse_json_line(line)
+        if line[10:11] == 'T':
+            return self.parse_access_line(line)
+        
+        # "YYYY-MM-DD HH:MM:SS.fff | LEVEL | name:function:line | сообщение"
+        parts = line.split(' | ', 3)
+        if len(parts) == 4:
+            stamp, level, source, message = parts
+            level, source = level.rstrip(), source.strip()
+            if (len(stamp) == 23 and stamp[20:].isdigit() and level.isalpha()
+                    and source and '|' not in source):
+                key, second = self._second
+                if stamp[:19] == key:
+                    timestamp = second + MILLISECONDS[int(stamp[20:])]
+                else:
+                    try:
+                        timestamp = self.parse_timestamp(stamp)
+                    except ValueError:
+                        return None
+                # Позиционные аргументы: заметно быстрее именованных на миллионах строк
+                return LogEntry(timestamp, level, source, message.strip())
+        
+        return self.parse_text_line_regex(line)
+    
+    def parse_text_line_regex(self, line: str) -> Optional[LogEntry]:
+        """
+        Разбор текстовой строки регулярным выражением и strptime.
+        
+        Args:
+            line: Строка лога без пробелов по краям
+            
+        Returns:
+            LogEntry или None если не удалось распарсить
+        """
+        match = self.log_pattern.match(line)
         if not match:
             return None
         
@@ -81,6 +364,287 @@ class LogAnalyzer:
             message=message.strip()
         )
     
+    def parse_json_line(self, line: str) -> Optional[LogEntry]:
+        """
+        Парсинг строки лога в формате JSON Lines (LOG_FILE_FORMAT=jsonl).
+        
+        Args:
+            line: Строка лога
+            
+        Returns:
+            LogEntry с полями extra или None если не удалось распарсить
+        """
+        try:
+            data = json.loads(line)
+            timestamp = self.parse_timestamp(data['time'])
+        except (ValueError, KeyError, TypeError):
+            return None
+        
+        message = data.get('message', '')
+        if data.get('exception'):
+            message = f"{message}\n{data['exception']}"
+        
+        return LogEntry(
+            timestamp=timestamp,
+            level=data.get('level', ''),
+            source=data.get('source', ''),
+            message=message,
+            extra_data=data.get('extra') or {}
+        )
+    
+    def parse_access_line(self, line: str) -> Optional[LogEntry]:
+        """
+        Парсинг строки access.log с фиксированными колонками ACCESS_COLUMNS.
+        
+        Args:
+            line: Строка лога
+            
+        Returns:
+            LogEntry с типизированными полями запроса или None если не удалось распарсить
+        """
+        values = line.split(' ', len(ACCESS_COLUMNS) - 1)
+        if len(values) != len(ACCESS_COLUMNS):
+            return None
+        
+        fields = dict(zip(ACCESS_COLUMNS, values))
+        try:
+            timestamp = self.parse_timestamp(fields['time'], 'T')
+            status = int(fields['status'])
+            duration = float(fields['duration'])
+            sample_rate = int(fields['sample_rate'])
+        except ValueError:
+            return None
+        
+        extra = {key: (None if value == '-' else value) for key, value in fields.items() if key != 'time'}
+        extra.update({
+            'type': 'REQUEST',
+            'status': status,
+            'duration': duration,
+            'sample_rate': sample_rate,
+        })
+        try:
+            for key, cast in (('size', int), ('db_queries', int), ('db_ms', float),
+                              ('render_ms', float), ('upload_ms', float)):
+                if extra[key] is not None:
+                    extra[key] = cast(extra[key])
+        except ValueError:
+            return None
+        
+        level = 'ERROR' if status >= 500 else 'WARNING' if status >= 400 else 'INFO'
+        return LogEntry(
+            timestamp=timestamp,
+            level=level,
+            source='access',
+            message=f"REQUEST {fields['method']} {fields['path']} -> {status} ({duration:.3f}s)",
+            extra_data=extra
+        )
+    
+    @staticmethod
+    def open_log_file(file_path: Path, binary: bool = False):
+        """
+        Открытие файла логов на чтение; архивы .gz и .zst распаковываются потоково.
+        
+        Args:
+            file_path: Путь к файлу
+            binary: Байтовый режим (смещения в несжатом содержимом)
+            
+        Returns:
+            Текстовый или байтовый файловый объект
+            
+        Raises:
+            OSError: Файл не открывается или zstandard не установлен для .zst
+        """
+        if file_path.suffix == '.gz':
+            raw = gzip.open(file_path, 'rb')
+        elif file_path.suffix == '.zst':
+            if zstandard is None:
+                raise OSError("для чтения .zst нужен пакет zstandard")
+            raw = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True))
+        elif binary:
+            return open(file_path, 'rb')
+        else:
+            return open(file_path, 'r', encoding='utf-8', errors='replace')
+        
+        return raw if binary else io.TextIOWrapper(raw, encoding='utf-8', errors='replace')
+    
+    def iter_lines(self, file_path: Path, start: int = 0) -> Iterator[str]:
+        """
+        Строки файла логов по одной.
+        
+        Args:
+            file_path: Путь к файлу или архиву
+            start: Смещение начала строки в несжатом файле (см. find_offset)
+            
+        Yields:
+            str: Строка файла
+        """
+        try:
+            if start:
+                with open(file_path, 'rb') as raw:
+                    raw.seek(start)
+                    yield from io.TextIOWrapper(raw, encoding='utf-8', errors='replace')
+                return
+            
+            with self.open_log_file(file_path) as f:
+                yield from f
+        except (OSError, EOFError) as e:
+            # EOFError - архив, который еще дописывается или поврежден
+            print(f"Ошибка чтения файла {file_path}: {e}")
+    
+    @staticmethod
+    def iter_lines_reversed(file_path: Path, block_size: int = REVERSE_BLOCK_SIZE) -> Iterator[str]:
+        """
+        Строки несжатого файла от последней к первой.
+        
+        Файл читается блоками с конца, поэтому последние строки большого
+        файла доступны без чтения его начала.
+        
+        Args:
+            file_path: Путь к файлу
+            block_size: Размер блока чтения
+            
+        Yields:
+            str: Строка файла (без перевода строки)
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                position = f.seek(0, os.SEEK_END)
+                head = b''
+                while position > 0:
+                    size = min(block_size, position)
+                    position -= size
+                    f.seek(position)
+                    lines = (f.read(size) + head).split(b'\n')
+                    # Первая строка блока может начинаться в предыдущем блоке
+                    head = lines.pop(0)
+                    for line in reversed(lines):
+                        if line:
+                            yield line.decode('utf-8', 'replace')
+                if head:
+                    yield head.decode('utf-8', 'replace')
+        except OSError as e:
+            print(f"Ошибка чтения файла {file_path}: {e}")
+    
+    def iter_errors_reversed(self, name: str, since: datetime = None, limit: int = 50) -> Iterator[LogEntry]:
+        """
+        Записи ERROR+ одного лога от новых к старым.
+        
+        Текущий и ротированные файлы читаются с конца и от новых к старым;
+        чтение останавливается на записи старше since - SEEK_TOLERANCE.
+        Архив нельзя читать с конца, поэтому из него читаются все строки,
+        но в памяти остаются только последние limit ошибок.
+        
+        Args:
+            name: Имя лога ('errors', 'app')
+            since: Начало периода
+            limit: Сколько ошибок может понадобиться из одного архива
+            
+        Yields:
+            LogEntry: Ошибка
+        """
+        for file_path in reversed(self.get_log_files(name, since)):
+            if file_path.suffix in ARCHIVE_SUFFIXES:
+                errors = deque(maxlen=limit)
+                errors.extend(entry for entry in self.iter_log_file(file_path, since)
+                              if entry.level in ERROR_LEVELS)
+                yield from reversed(errors)
+                continue
+            
+            for line in self.iter_lines_reversed(file_path):
+                entry = self.parse_log_line(line)
+                if entry is None:
+                    continue
+                if since is not None and entry.timestamp < since:
+                    if entry.timestamp < since - SEEK_TOLERANCE:
+                        return  # Дальше только более старые записи
+                    continue
+                if entry.level in ERROR_LEVELS:
+                    yield entry
+    
+    def iter_log_file(self, file_path: Path, since: datetime = None) -> Iterator[LogEntry]:
+        """
+        Записи файла логов по одной.
+        
+        Args:
+            file_path: Путь к файлу
+            since: Пропускать записи раньше этого времени
+            
+        Yields:
+            LogEntry: Запись лога
+        """
+        if not file_path.exists():
+            return
+        
+        start = self.find_offset(file_path, since) if since is not None else 0
+        for line in self.iter_lines(file_path, start):
+            entry = self.parse_log_line(line)
+            if entry and (since is None or entry.timestamp >= since):
+                yield entry
+    
+    def find_offset(self, file_path: Path, since: datetime) -> int:
+        """
+        Смещение, с которого начинаются записи не раньше since (бинарный поиск).
+        
+        Строки пишутся в порядке времени, поэтому хватает O(log n) чтений:
+        середина диапазона выравнивается до начала следующей строки, и по
+        времени первой разобранной строки отбрасывается половина диапазона.
+        Ищется since - SEEK_TOLERANCE, а точный фильтр применяется при чтении.
+        Архивы не поддерживают быстрый переход и читаются с начала.
+        
+        Args:
+            file_path: Путь к файлу
+            since: Начало периода
+            
+        Returns:
+            int: Начало строки; все строки до него раньше since (0 - читать с начала)
+        """
+        if file_path.suffix in ARCHIVE_SUFFIXES:
+            return 0
+        
+        target = since - SEEK_TOLERANCE
+        low = 0
+        try:
+            with open(file_path, 'rb') as f:
+                high = os.fstat(f.fileno()).st_size
+                while high - low > SEEK_MIN_RANGE:
+                    middle = (low + high) // 2
+                    # Хвост строки, начатой до middle (строка с начала в middle не пропускается)
+                    f.seek(middle - 1)
+                    f.readline()
+                    
+                    # Первая разбираемая строка (продолжения многострочных записей пропускаются)
+                    timestamp = None
+                    while timestamp is None and f.tell() < high:
+                        raw = f.readline()
+                        if not raw.endswith(b'\n'):
+                            break
+                        entry = self.parse_log_line(raw.decode('utf-8', 'replace'))
+                        if entry is not None:
+                            timestamp = entry.timestamp
+                    
+                    if timestamp is not None and timestamp < target:
+                        low = f.tell()
+                    else:
+                        high = middle
+        except OSError:
+            return 0
+        
+        return low
+    
+    def iter_entries(self, log_files: Iterable[Path], since: datetime = None) -> Iterator[LogEntry]:
+        """
+        Записи нескольких файлов логов подряд.
+        
+        Args:
+            log_files: Пути к файлам
+            since: Пропускать записи раньше этого времени
+            
+        Yields:
+            LogEntry: Запись лога
+        """
+        for file_path in log_files:
+            yield from self.iter_log_file(file_path, since)
+    
     def read_log_file(self, file_path: Path, since: datetime = None) -> List[LogEntry]:
         """
         Чтение файла логов.
@@ -92,127 +656,188 @@ class LogAnalyzer:
         Returns:
             Список записей логов
         """
-        entries = []
+        return list(self.iter_log_file(file_path, since))
+    
+    @staticmethod
+    def get_time_range(file_path: Path) -> Tuple[Optional[datetime], datetime]:
+        """
+        Диапазон времени записей файла без его чтения.
         
-        if not file_path.exists():
-            return entries
+        Начало берется из имени ротированного файла, конец - время изменения
+        файла (не раньше последней записи: архив создается после ротации).
         
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    entry = self.parse_log_line(line)
-                    if entry and (since is None or entry.timestamp >= since):
-                        entries.append(entry)
-        except Exception as e:
-            print(f"Ошибка чтения файла {file_path}: {e}")
+        Args:
+            file_path: Путь к файлу
+            
+        Returns:
+            Tuple[Optional[datetime], datetime]: Начало (None для текущего файла) и конец
+        """
+        match = ROTATED_LOG_NAME.match(file_path.name)
+        start = datetime.strptime(match.group('stamp'), '%Y-%m-%d_%H-%M-%S_%f') if match else None
+        return start, datetime.fromtimestamp(file_path.stat().st_mtime)
+    
+    @staticmethod
+    def get_log_name(file_path: Path) -> Tuple[Optional[str], int]:
+        """
+        Имя лога и номер ротированного файла.
         
-        return entries
+        Args:
+            file_path: Путь к файлу
+            
+        Returns:
+            Tuple[Optional[str], int]: Имя ('app' для app.log и его архивов; None - не файл лога)
+                и номер при совпадении времени ротации (0 - текущий файл)
+        """
+        match = ROTATED_LOG_NAME.match(file_path.name)
+        if match:
+            return match.group('name'), int(match.group('counter') or 1)
+        if file_path.suffix == '.log':
+            return file_path.stem, 0
+        return None, 0
     
-    def get_log_files(self) -> List[Path]:
+    def get_log_files(self, name: str = None, since: datetime = None) -> List[Path]:
         """
-        Получение списка файлов логов.
+        Получение списка файлов логов, включая ротированные архивы.
         
+        Файлы упорядочены по времени: сначала ротированные от старых к новым,
+        затем текущий файл. Файлы, закончившиеся раньше since, не возвращаются.
+        
+        Args:
+            name: Только файлы этого лога ('errors' - errors.log и его архивы)
+            since: Пропустить файлы, все записи которых раньше этого времени
+            
         Returns:
             Список путей к файлам логов
         """
         if not self.log_dir.exists():
             return []
         
-        return [f for f in self.log_dir.glob("*.log") if f.is_file()]
+        files = []
+        for file_path in self.log_dir.glob(f"{name or '*'}.*log*"):
+            if not file_path.is_file():
+                continue
+            
+            log_name, counter = self.get_log_name(file_path)
+            if log_name is None:
+                continue  # Временные файлы сжатия и посторонние файлы
+            if name is not None and log_name != name:
+                continue
+            
+            try:
+                start, end = self.get_time_range(file_path)
+            except OSError:
+                continue  # Удален при очистке архивов
+            if since is not None and end < since:
+                continue
+            files.append((log_name, start or datetime.max, counter, str(file_path)))
+        
+        files.sort()
+        return [Path(file_path) for *_, file_path in files]
     
-    def analyze_logs(self, since: datetime = None, log_types: List[str] = None) -> LogStats:
+    def analyze_logs(self, since: datetime = None, log_types: List[str] = None,
+                     workers: int = None) -> LogStats:
         """
         Анализ логов.
         
         Args:
             since: Анализировать логи с определенного времени
             log_types: Типы логов для анализа
+            workers: Количество процессов для параллельного разбора (None или 1 - в текущем процессе)
             
         Returns:
             Статистика логов
         """
-        all_entries = []
+        if self.rollups is not None and not log_types:
+            # Статистика за период по поминутным агрегатам (since округляется до минуты)
+            self.update_rollups()
+            return LogStatsAggregator.from_dict(self.rollups.get_stats_state(since)).result()
         
-        # Получаем все файлы логов
-        log_files = self.get_log_files()
+        # Получаем все файлы логов (архивы, закончившиеся до since, не открываются)
+        log_files = self.get_log_files(since=since)
         
         # Фильтруем по типам если указано
         if log_types:
             log_files = [f for f in log_files 
                         if any(log_type in f.name for log_type in log_types)]
         
-        # Читаем все файлы
-        for file_path in log_files:
-            entries = self.read_log_file(file_path, since)
-            all_entries.extend(entries)
+        if workers and workers > 1:
+            return self._analyze_parallel(log_files, since, workers)
         
-        # Анализируем записи
-        return self._calculate_stats(all_entries)
+        # Записи читаются и агрегируются по одной
+        return self._calculate_stats(self.iter_entries(log_files, since))
     
-    def _calculate_stats(self, entries: List[LogEntry]) -> LogStats:
+    def get_shards(self, log_files: Iterable[Path], shard_size: int = SHARD_SIZE) -> List[Tuple[str, int, Optional[int]]]:
         """
-        Вычисление статистики по записям.
+        Разбиение файлов на части для параллельного разбора.
+        
+        Несжатые файлы больше shard_size делятся на диапазоны байтов; границы
+        выравниваются по строкам при чтении (см. aggregate_shard). Архив
+        распаковывается только последовательно и всегда образует одну часть.
         
         Args:
-            entries: Список записей логов
+            log_files: Пути к файлам
+            shard_size: Размер части в байтах
             
         Returns:
-            Статистика
+            List[Tuple[str, int, Optional[int]]]: Путь, начало и конец (None - до конца файла)
         """
-        by_level = Counter()
-        by_source = Counter()
-        by_hour = Counter()
-        
-        errors_count = 0
-        warnings_count = 0
-        requests_count = 0
-        admin_actions = 0
-        file_operations = 0
-        security_events = 0
-        
-        for entry in entries:
-            # Статистика по уровням
-            by_level[entry.level] += 1
-            
-            # Статистика по источникам
-            by_source[entry.source] += 1
-            
-            # Статистика по часам
-            hour_key = entry.timestamp.strftime('%H:00')
-            by_hour[hour_key] += 1
-            
-            # Подсчет специальных типов
-            message = entry.message.upper()
-            
-            if entry.level in ['ERROR', 'CRITICAL']:
-                errors_count += 1
-            elif entry.level == 'WARNING':
-                warnings_count += 1
-            
-            if 'REQUEST' in message or 'RESPONSE' in message:
-                requests_count += 1
+        shards = []
+        for file_path in log_files:
+            try:
+                size = file_path.stat().st_size
+            except OSError:
+                continue
             
-            if 'ADMIN' in message:
-                admin_actions += 1
+            if file_path.suffix in ARCHIVE_SUFFIXES or size <= shard_size:
+                shards.append((str(file_path), 0, None))
+                continue
             
-            if any(keyword in message for keyword in ['UPLOAD', 'FILE', 'IMAGE', 'DELETE']):
-                file_operations += 1
+            for start in range(0, size, shard_size):
+                end = start + shard_size
+                shards.append((str(file_path), start, end if end < size else None))
+        
+        # Крупные части первыми: меньше простоя процессов в конце
+        shards.sort(key=lambda shard: (shard[2] or os.path.getsize(shard[0])) - shard[1], reverse=True)
+        return shards
+    
+    def _analyze_parallel(self, log_files: List[Path], since: Optional[datetime], workers: int) -> LogStats:
+        """
+        Разбор частей файлов в пуле процессов и слияние частичных агрегатов.
+        
+        Args:
+            log_files: Пути к файлам
+            since: Пропускать записи раньше этого времени
+            workers: Количество процессов
             
-            if any(keyword in message for keyword in ['AUTH', 'LOGIN', 'SECURITY', 'JWT']):
-                security_events += 1
+        Returns:
+            Статистика логов
+        """
+        shards = self.get_shards(log_files)
+        aggregator = LogStatsAggregator()
+        if not shards:
+            return aggregator.result()
         
-        return LogStats(
-            total_entries=len(entries),
-            by_level=dict(by_level),
-            by_source=dict(by_source),
-            by_hour=dict(by_hour),
-            errors_count=errors_count,
-            warnings_count=warnings_count,
-            requests_count=requests_count,
-            admin_actions=admin_actions,
-            file_operations=file_operations,
-            security_events=security_events
-        )
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+            futures = [executor.submit(aggregate_shard, path, start, end, since) for path, start, end in shards]
+            for future in as_completed(futures):
+                aggregator.merge(LogStatsAggregator.from_dict(future.result()))
+        
+        return aggregator.result()
+    
+    def _calculate_stats(self, entries: Iterable[LogEntry]) -> LogStats:
+        """
+        Вычисление статистики по записям.
+        
+        Args:
+            entries: Записи логов (список или генератор)
+            
+        Returns:
+            Статистика
+        """
+        aggregator = LogStatsAggregator()
+        for entry in entries:
+            aggregator.add(entry)
+        return aggregator.result()
     
     def find_errors(self, since: datetime = None, limit: int = 50) -> List[LogEntry]:
         """
@@ -225,25 +850,94 @@ class LogAnalyzer:
         Returns:
             Список ошибок
         """
-        errors = []
+        if limit <= 0:
+            return []
         
-        # Читаем файл ошибок
-        error_file = self.log_dir / "errors.log"
-        if error_file.exists():
-            entries = self.read_log_file(error_file, since)
-            errors.extend([e for e in entries if e.level in ['ERROR', 'CRITICAL']])
+        # Файл ошибок и основной файл: потоки от новых к старым сливаются через кучу
+        streams = [self.iter_errors_reversed(name, since, limit) for name in ('errors', 'app')]
+        errors, seen = [], set()
+        cutoff = None
         
-        # Читаем основной файл для дополнительных ошибок
-        app_file = self.log_dir / "app.log"
-        if app_file.exists():
-            entries = self.read_log_file(app_file, since)
-            errors.extend([e for e in entries if e.level in ['ERROR', 'CRITICAL']])
+        for entry in heapq.merge(*streams, key=lambda x: x.timestamp, reverse=True):
+            if cutoff is not None and entry.timestamp < cutoff:
+                break
+            
+            # Одна и та же ошибка пишется и в errors.log, и в app.log
+            key = (entry.timestamp, entry.message)
+            if key in seen:
+                continue
+            seen.add(key)
+            errors.append(entry)
+            
+            if cutoff is None and len(errors) >= limit:
+                # Записи разных потоков могут идти с небольшим нарушением порядка
+                cutoff = min(error.timestamp for error in errors) - SEEK_TOLERANCE
         
         # Сортируем по времени (новые сначала)
         errors.sort(key=lambda x: x.timestamp, reverse=True)
         
         return errors[:limit]
     
+    @staticmethod
+    def get_sample_weight(entry: LogEntry) -> int:
+        """
+        Вес записи при выборочном логировании запросов.
+        
+        Args:
+            entry: Запись лога
+            
+        Returns:
+            Количество запросов, которые представляет запись (1 если выборки не было)
+        """
+        if entry.extra_data:
+            return int(entry.extra_data.get('sample_rate') or 1)
+        
+        if 'sample:1/' in entry.message:
+            sample_match = re.search(r'sample:1/(\d+)', entry.message)
+            if sample_match:
+                return int(sample_match.group(1))
+        return 1
+    
+    @staticmethod
+    def get_duration(entry: LogEntry, pattern: str) -> Optional[float]:
+        """
+        Длительность операции из записи.
+        
+        Args:
+            entry: Запись лога
+            pattern: Регулярное выражение для текстовых логов (группа 1 - секунды)
+            
+        Returns:
+            Длительность в секундах или None
+        """
+        if entry.extra_data and isinstance(entry.extra_data.get('duration'), (int, float)):
+            return float(entry.extra_data['duration'])
+        
+        time_match = re.search(pattern, entry.message)
+        return float(time_match.group(1)) if time_match else None
+    
+    def get_request_duration(self, entry: LogEntry, log_name: str) -> Optional[float]:
+        """
+        Длительность запроса или операции из записи файла производительности или запросов.
+        
+        Args:
+            entry: Запись лога
+            log_name: Имя лога ('performance', 'requests', 'access')
+            
+        Returns:
+            Длительность в секундах или None, если запись не итоговая запись о запросе
+        """
+        if log_name == 'performance':
+            return self.get_duration(entry, r'(\d+\.\d+)s')
+        
+        if entry.extra_data:
+            # JSON логи: берем только итоговую запись log_request
+            if entry.extra_data.get('type') != 'REQUEST':
+                return None
+        elif not entry.message.startswith('REQUEST '):
+            return None
+        return self.get_duration(entry, r'\((\d+\.\d+)s\)')
+    
     def find_slow_requests(self, threshold: float = 1.0, since: datetime = None) -> List[LogEntry]:
         """
         Поиск медленных запросов.
@@ -257,29 +951,12 @@ class LogAnalyzer:
         """
         slow_requests = []
         
-        # Читаем файл производительности
-        perf_file = self.log_dir / "performance.log"
-        if perf_file.exists():
-            entries = self.read_log_file(perf_file, since)
-            for entry in entries:
-                # Ищем время выполнения в сообщении
-                time_match = re.search(r'(\d+\.\d+)s', entry.message)
-                if time_match:
-                    duration = float(time_match.group(1))
-                    if duration >= threshold:
-                        slow_requests.append(entry)
-        
-        # Читаем файл запросов
-        requests_file = self.log_dir / "requests.log"
-        if requests_file.exists():
-            entries = self.read_log_file(requests_file, since)
-            for entry in entries:
-                if 'RESPONSE' in entry.message:
-                    time_match = re.search(r'\((\d+\.\d+)s\)', entry.message)
-                    if time_match:
-                        duration = float(time_match.group(1))
-                        if duration >= threshold:
-                            slow_requests.append(entry)
+        # Файл производительности и файлы запросов (access.log - компактные записи)
+        for log_name in SLOW_REQUEST_LOGS:
+            for entry in self.iter_entries(self.get_log_files(log_name, since), since):
+                duration = self.get_request_duration(entry, log_name)
+                if duration is not None and duration >= threshold:
+                    slow_requests.append(entry)
         
         # Сортируем по времени
         slow_requests.sort(key=lambda x: x.timestamp, reverse=True)
@@ -296,12 +973,7 @@ class LogAnalyzer:
         Returns:
             Список событий безопасности
         """
-        events = []
-        
-        security_file = self.log_dir / "security.log"
-        if security_file.exists():
-            entries = self.read_log_file(security_file, since)
-            events.extend(entries)
+        events = list(self.iter_entries(self.get_log_files('security', since), since))
         
         # Сортируем по времени (новые сначала)
         events.sort(key=lambda x: x.timestamp, reverse=True)
@@ -312,6 +984,9 @@ class LogAnalyzer:
         """
         Генерация отчета по логам.
         
+        С файлом контрольных точек читаются только новые байты, а статистика
+        считается по целым часам, начиная с часа since.
+        
         Args:
             since: Генерировать отчет с определенного времени
             
@@ -321,11 +996,35 @@ class LogAnalyzer:
         if since is None:
             since = datetime.now() - timedelta(hours=24)
         
+        if self.checkpoints is not None:
+            return self._generate_incremental_report(since)
+        
         stats = self.analyze_logs(since)
         errors = self.find_errors(since, limit=10)
-        slow_requests = self.find_slow_requests(threshold=1.0, since=since)
+        slow_requests = self.find_slow_requests(threshold=SLOW_REQUEST_THRESHOLD, since=since)
         security_events = self.get_security_events(since)
         
+        return self._build_report(
+            since, stats,
+            [self._issue(error) for error in errors],
+            [self._issue(req) for req in slow_requests[:5]],
+            [self._issue(event) for event in security_events[:10]]
+        )
+    
+    @staticmethod
+    def _issue(entry: LogEntry) -> Dict[str, Any]:
+        """Запись для раздела issues отчета."""
+        return {
+            'timestamp': entry.timestamp.isoformat(),
+            'level': entry.level,
+            'source': entry.source,
+            'message': entry.message
+        }
+    
+    @staticmethod
+    def _build_report(since: datetime, stats: LogStats, errors: List[Dict[str, Any]],
+                      slow_requests: List[Dict[str, Any]], security_events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Сборка словаря отчета."""
         return {
             'period': {
                 'from': since.isoformat(),
@@ -346,33 +1045,263 @@ class LogAnalyzer:
                 'by_hour': stats.by_hour
             },
             'issues': {
-                'recent_errors': [
-                    {
-                        'timestamp': error.timestamp.isoformat(),
-                        'level': error.level,
-                        'source': error.source,
-                        'message': error.message
-                    }
-                    for error in errors
-                ],
+                'recent_errors': errors,
                 'slow_requests': [
-                    {
-                        'timestamp': req.timestamp.isoformat(),
-                        'message': req.message
-                    }
-                    for req in slow_requests[:5]
+                    {'timestamp': req['timestamp'], 'message': req['message']}
+                    for req in slow_requests
                 ],
                 'security_events': [
-                    {
-                        'timestamp': event.timestamp.isoformat(),
-                        'level': event.level,
-                        'message': event.message
-                    }
-                    for event in security_events[:10]
+                    {'timestamp': event['timestamp'], 'level': event['level'], 'message': event['message']}
+                    for event in security_events
                 ]
             }
         }
     
+    def update_checkpoints(self) -> LogCheckpointStore:
+        """
+        Чтение байтов, дописанных с прошлого запуска, во все контрольные точки.
+        
+        Returns:
+            LogCheckpointStore: Обновленное хранилище
+        """
+        return self._update_files(self.checkpoints, self._read_into_checkpoint)
+    
+    def update_rollups(self) -> LogRollupStore:
+        """
+        Индексация новых строк в поминутные агрегаты и сворачивание старых минут в часы.
+        
+        Returns:
+            LogRollupStore: Обновленная база
+        """
+        self._update_files(self.rollups, self._read_into_rollups)
+        self.rollups.downsample()
+        return self.rollups
+    
+    def _update_files(self, store: LogCheckpointStore,
+                      read_file: Callable[[Path, FileCheckpoint], None]) -> LogCheckpointStore:
+        """
+        Чтение байтов, дописанных с прошлого запуска, для всех файлов хранилища.
+        
+        Неизменившиеся файлы пропускаются по inode, размеру и времени изменения.
+        Ротированный файл узнается по первой строке и дочитывается с сохраненного
+        смещения; сжатый после этого архив не читается вовсе. Усеченный файл
+        читается заново.
+        
+        Args:
+            store: Хранилище контрольных точек
+            read_file: Чтение файла с checkpoint.offset с обновлением смещения
+            
+        Returns:
+            LogCheckpointStore: Обновленное хранилище
+        """
+        seen = set()
+        
+        for file_path in self.get_log_files():
+            log_name, counter = self.get_log_name(file_path)
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            
+            path = str(file_path)
+            key = store.find_by_path(path)
+            if key is not None and store.files[key].is_unchanged(stat):
+                seen.add(key)
+                continue
+            
+            first_line = self._read_first_line(file_path)
+            if first_line is None:
+                continue  # Пустой файл или первая строка еще дописывается
+            
+            key = fingerprint_line(log_name, first_line)
+            checkpoint = store.get(key, log_name, path)
+            seen.add(key)
+            
+            rotated = counter > 0
+            if not rotated and checkpoint.inode == stat.st_ino and stat.st_size < checkpoint.offset:
+                checkpoint.reset()  # Файл усечен
+            
+            if not checkpoint.complete:
+                read_file(file_path, checkpoint)
+                # Ротированный файл больше не дописывается
+                checkpoint.complete = rotated
+            checkpoint.inode, checkpoint.size, checkpoint.mtime = stat.st_ino, stat.st_size, stat.st_mtime
+        
+        store.prune(seen)
+        store.save()
+        return store
+    
+    def _read_first_line(self, file_path: Path) -> Optional[bytes]:
+        """Первая полная строка файла или None."""
+        try:
+            with self.open_log_file(file_path, binary=True) as f:
+                line = f.readline()
+        except (OSError, EOFError):
+            return None
+        return line if line.endswith(b'\n') else None
+    
+    def _read_into_checkpoint(self, file_path: Path, checkpoint: FileCheckpoint) -> None:
+        """
+        Разбор строк файла после checkpoint.offset в часовые агрегаты и списки issues.
+        
+        Незавершенная последняя строка не учитывается и будет прочитана в следующий раз.
+        
+        Args:
+            file_path: Путь к файлу
+            checkpoint: Контрольная точка файла
+        """
+        log_name = checkpoint.log_name
+        buckets: Dict[str, LogStatsAggregator] = {}
+        
+        try:
+            with self.open_log_file(file_path, binary=True) as f:
+                if checkpoint.offset:
+                    f.seek(checkpoint.offset)
+                for raw in f:
+                    if not raw.endswith(b'\n'):
+                        break
+                    checkpoint.offset += len(raw)
+                    
+                    entry = self.parse_log_line(raw.decode('utf-8', 'replace'))
+                    if entry is None:
+                        continue
+                    
+                    moment = entry.timestamp
+                    hour = f"{moment.year:04d}-{moment.month:02d}-{moment.day:02d}T{moment.hour:02d}"
+                    aggregator = buckets.get(hour)
+                    if aggregator is None:
+                        aggregator = buckets[hour] = LogStatsAggregator.from_dict(checkpoint.buckets.get(hour, {}))
+                    aggregator.add(entry)
+                    
+                    if log_name in ('errors', 'app') and entry.level in ERROR_LEVELS:
+                        checkpoint.add_issue('errors', self._issue(entry))
+                    elif log_name == 'security':
+                        checkpoint.add_issue('security_events', self._issue(entry))
+                    elif log_name in SLOW_REQUEST_LOGS:
+                        duration = self.get_request_duration(entry, log_name)
+                        if duration is not None and duration >= SLOW_REQUEST_THRESHOLD:
+                            checkpoint.add_issue('slow_requests', self._issue(entry))
+        except (OSError, EOFError) as e:
+            print(f"Ошибка чтения файла {file_path}: {e}")
+        finally:
+            # Смещение и агрегаты сохраняются согласованно, даже если чтение прервано
+            for hour, aggregator in buckets.items():
+                checkpoint.buckets[hour] = aggregator.to_dict()
+    
+    def _read_into_rollups(self, file_path: Path, checkpoint: FileCheckpoint) -> None:
+        """
+        Разбор строк файла после checkpoint.offset в поминутные агрегаты.
+        
+        Агрегаты и новое смещение записываются в базу одной транзакцией.
+        Незавершенная последняя строка не учитывается и будет прочитана в следующий раз.
+        
+        Args:
+            file_path: Путь к файлу
+            checkpoint: Контрольная точка файла
+        """
+        minutes: Dict[str, LogStatsAggregator] = {}
+        rows = Counter()
+        
+        try:
+            with self.open_log_file(file_path, binary=True) as f:
+                if checkpoint.offset:
+                    f.seek(checkpoint.offset)
+                for raw in f:
+                    if not raw.endswith(b'\n'):
+                        break
+                    checkpoint.offset += len(raw)
+                    
+                    entry = self.parse_log_line(raw.decode('utf-8', 'replace'))
+                    if entry is None:
+                        continue
+                    
+                    minute = minute_bucket(entry.timestamp)
+                    aggregator = minutes.get(minute)
+                    if aggregator is None:
+                        aggregator = minutes[minute] = LogStatsAggregator()
+                    aggregator.add(entry)
+                    self._add_request_rollups(rows, minute, entry, checkpoint.log_name)
+        except (OSError, EOFError) as e:
+            print(f"Ошибка чтения файла {file_path}: {e}")
+        
+        for minute, aggregator in minutes.items():
+            state = aggregator.to_dict()
+            for dimension in ('by_level', 'by_source'):
+                for key, value in state[dimension].items():
+                    rows[(minute, dimension, key)] += value
+            for field in LogStatsAggregator.SCALAR_FIELDS:
+                if state[field]:
+                    rows[(minute, 'stats', field)] += state[field]
+        
+        self.rollups.add(self.rollups.find_by_path(str(file_path)), checkpoint, rows)
+    
+    def _add_request_rollups(self, rows: Counter, minute: str, entry: LogEntry, log_name: str) -> None:
+        """
+        Агрегаты запросов и ошибок записи: классы статусов, маршруты, длительность.
+        
+        Args:
+            rows: Значения по (корзина, измерение, ключ)
+            minute: Корзина записи
+            entry: Запись лога
+            log_name: Имя лога
+        """
+        weight = self.get_sample_weight(entry)
+        if entry.level in ERROR_LEVELS:
+            rows[(minute, 'error_source', entry.source)] += weight
+        
+        if log_name not in ('requests', 'access'):
+            return
+        duration = self.get_request_duration(entry, log_name)
+        if duration is None:
+            return
+        
+        if entry.extra_data:
+            method, path, status = (entry.extra_data.get('method'), entry.extra_data.get('path'),
+                                    entry.extra_data.get('status'))
+        else:
+            match = REQUEST_MESSAGE.match(entry.message)
+            method, path, status = match.groups() if match else (None, None, None)
+        
+        if status:
+            rows[(minute, 'status', f"{int(status) // 100}xx")] += weight
+        if method and path:
+            rows[(minute, 'route', route_key(method, path))] += weight
+        rows[(minute, 'duration', duration_bucket(duration))] += weight
+        rows[(minute, 'duration_sum', '')] += duration * weight
+    
+    def _generate_incremental_report(self, since: datetime) -> Dict[str, Any]:
+        """
+        Отчет по контрольным точкам.
+        
+        Args:
+            since: Начало периода
+            
+        Returns:
+            Словарь с отчетом
+        """
+        store = self.update_checkpoints()
+        since_hour = f"{since.year:04d}-{since.month:02d}-{since.day:02d}T{since.hour:02d}"
+        since_iso = since.isoformat()
+        
+        aggregator = LogStatsAggregator()
+        errors, slow_requests, security_events = [], [], []
+        for checkpoint in store.files.values():
+            for hour, state in checkpoint.buckets.items():
+                if hour >= since_hour:
+                    aggregator.merge(LogStatsAggregator.from_dict(state))
+            errors.extend(item for item in checkpoint.errors if item['timestamp'] >= since_iso)
+            slow_requests.extend(item for item in checkpoint.slow_requests if item['timestamp'] >= since_iso)
+            security_events.extend(item for item in checkpoint.security_events if item['timestamp'] >= since_iso)
+        
+        # Новые сначала
+        for items in (errors, slow_requests, security_events):
+            items.sort(key=lambda item: item['timestamp'], reverse=True)
+        
+        # Ошибка из errors.log и app.log учитывается один раз, как в find_errors
+        errors = list({(item['timestamp'], item['message']): item for item in errors}.values())
+        
+        return self._build_report(since, aggregator.result(), errors[:10], slow_requests[:5], security_events[:10])
+    
     def clean_old_logs(self, days: int = 30) -> int:
         """
         Очистка старых логов.
@@ -400,23 +1329,90 @@ class LogAnalyzer:
         return deleted_count
 
 
-def create_log_analyzer() -> LogAnalyzer:
+def aggregate_shard(path: str, start: int, end: Optional[int], since: Optional[datetime]) -> Dict[str, Any]:
+    """
+    Агрегаты части файла (выполняется в процессе пула).
+    
+    Часть содержит строки, первый байт которых лежит в [start, end): строка,
+    начатая до start, принадлежит предыдущей части, а строка, начатая до end,
+    дочитывается целиком.
+    
+    Args:
+        path: Путь к файлу
+        start: Начальное смещение
+        end: Конечное смещение (None - до конца файла)
+        since: Пропускать записи раньше этого времени
+        
+    Returns:
+        Dict[str, Any]: Состояние LogStatsAggregator
+    """
+    analyzer = LogAnalyzer(os.path.dirname(path))
+    file_path = Path(path)
+    aggregator = LogStatsAggregator()
+    
+    if start == 0 and end is None:
+        for entry in analyzer.iter_log_file(file_path, since):
+            aggregator.add(entry)
+        return aggregator.to_dict()
+    
+    offset = analyzer.find_offset(file_path, since) if since is not None else 0
+    if end is not None and offset >= end:
+        return aggregator.to_dict()  # Вся часть раньше since
+    
+    try:
+        with open(file_path, 'rb') as f:
+            position = start
+            if offset > start:
+                # Начало строки: выравнивание не нужно
+                f.seek(offset)
+                position = offset
+            elif start > 0:
+                # Пропускаем хвост строки, начатой в предыдущей части
+                f.seek(start - 1)
+                position = start - 1 + len(f.readline())
+            
+            while end is None or position < end:
+                raw = f.readline()
+                if not raw:
+                    break
+                position += len(raw)
+                
+                entry = analyzer.parse_log_line(raw.decode('utf-8', 'replace'))
+                if entry and (since is None or entry.timestamp >= since):
+                    aggregator.add(entry)
+    except OSError as e:
+        print(f"Ошибка чтения файла {file_path}: {e}")
+    
+    return aggregator.to_dict()
+
+
+def create_log_analyzer(incremental: bool = False, rollups: bool = False) -> LogAnalyzer:
     """
     Создание анализатора логов.
     
+    Args:
+        incremental: Хранить контрольные точки в logs/analyzer_checkpoints.json
+            и читать при повторных отчетах только новые байты
+        rollups: Считать статистику по поминутным агрегатам logs/log_rollups.sqlite3
+    
     Returns:
         Настроенный анализатор логов
     """
-    return LogAnalyzer()
+    log_dir = "logs"
+    return LogAnalyzer(
+        log_dir,
+        checkpoint_file=os.path.join(log_dir, CHECKPOINT_FILE) if incremental else None,
+        rollup_file=os.path.join(log_dir, ROLLUP_FILE) if rollups else None
+    )
 
 
 # CLI функции для работы с логами
-def print_log_stats(days: int = 1):
+def print_log_stats(days: int = 1, workers: int = None, rollups: bool = False):
     """Вывод статистики логов за последние дни."""
-    analyzer = create_log_analyzer()
+    analyzer = create_log_analyzer(rollups=rollups)
     since = datetime.now() - timedelta(days=days)
     
-    stats = analyzer.analyze_logs(since)
+    stats = analyzer.analyze_logs(since, workers=workers)
     
     print(f"\n=== Статистика логов за последние {days} дн. ===")
     print(f"Всего записей: {stats.total_entries}")
@@ -452,19 +1448,33 @@ if __name__ == "__main__":
         command = sys.argv[1]
         
         if command == "stats":
-            days = int(sys.argv[2]) if len(sys.argv) > 2 else 1
-            print_log_stats(days)
+            days = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2].isdigit() else 1
+            workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None
+            print_log_stats(days, workers, rollups='--rollup' in sys.argv[2:])
         
         elif command == "errors":
             limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
             print_recent_errors(limit)
         
         elif command == "report":
-            analyzer = create_log_analyzer()
+            analyzer = create_log_analyzer(incremental='--incremental' in sys.argv[2:])
             since = datetime.now() - timedelta(hours=24)
             report = analyzer.generate_report(since)
             print(json.dumps(report, indent=2, ensure_ascii=False))
         
+        elif command == "follow":
+            from .log_follow import follow_logs
+            
+            interval = float(sys.argv[sys.argv.index('--interval') + 1]) if '--interval' in sys.argv else 5.0
+            serve = sys.argv[sys.argv.index('--serve') + 1] if '--serve' in sys.argv else None
+            follow_logs("logs", interval, as_json='--json' in sys.argv[2:], serve=serve)
+        
+        elif command == "rollup":
+            analyzer = create_log_analyzer(rollups=True)
+            analyzer.update_rollups()
+            since = datetime.now() - timedelta(hours=24)
+            print(json.dumps(analyzer.rollups.get_request_stats(since), indent=2, ensure_ascii=False))
+        
         elif command == "clean":
             days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
             analyzer = create_log_analyzer()
@@ -473,7 +1483,9 @@ if __name__ == "__main__":
     
     else:
         print("Использование:")
-        print("  python log_analyzer.py stats [days]     - статистика за дни")
+        print("  python log_analyzer.py stats [days] [--workers N] [--rollup] - статистика за дни")
         print("  python log_analyzer.py errors [limit]   - последние ошибки")
-        print("  python log_analyzer.py report           - полный отчет")
+        print("  python log_analyzer.py report [--incremental] - полный отчет (с контрольными точками)")
+        print("  python log_analyzer.py rollup        - индексация агрегатов и запросы за сутки")
+        print("  python log_analyzer.py follow [--interval N] [--json] [--serve HOST:PORT] - окна 1/5/15 мин")
         print("  python log_analyzer.py clean [days]     - очистка старых логов") 
\ No newline at end of file
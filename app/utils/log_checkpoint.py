@@ -0,0 +1,174 @@
+"""
+Контрольные точки инкрементального анализа логов.
+Для каждого файла хранится прочитанное смещение и агрегированное состояние.
+"""
+
+import os
+import json
+import hashlib
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional
+
+# Версия формата файла контрольных точек
+CHECKPOINT_VERSION = 1
+
+# Сколько последних записей каждого вида хранится на файл
+ISSUES_KEEP = 50
+
+
+def fingerprint_line(log_name: str, first_line: bytes) -> str:
+    """
+    Ключ файла по первой строке.
+
+    Первая строка (время с миллисекундами и сообщение) не меняется при
+    переименовании и сжатии, поэтому ротированный архив получает тот же ключ,
+    что и файл, из которого он получен.
+
+    Args:
+        log_name: Имя лога ('app', 'requests', ...)
+        first_line: Первая полная строка файла
+
+    Returns:
+        str: Ключ контрольной точки
+    """
+    return f"{log_name}:{hashlib.blake2b(first_line, digest_size=8).hexdigest()}"
+
+
+@dataclass
+class FileCheckpoint:
+    """Состояние одного файла (текущего или ротированного)."""
+    log_name: str
+    path: str
+    inode: int = 0
+    size: int = 0
+    mtime: float = 0.0
+    offset: int = 0          # Прочитанные байты несжатого содержимого
+    complete: bool = False   # Архив прочитан полностью и больше не изменится
+    # Состояние LogStatsAggregator по часам "YYYY-MM-DDTHH"
+    buckets: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Последние записи для отчета: ошибки, медленные запросы, события безопасности
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    slow_requests: List[Dict[str, Any]] = field(default_factory=list)
+    security_events: List[Dict[str, Any]] = field(default_factory=list)
+
+    def is_unchanged(self, stat: os.stat_result) -> bool:
+        """Файл не менялся с последнего чтения."""
+        return (self.inode == stat.st_ino and self.size == stat.st_size
+                and self.mtime == stat.st_mtime)
+
+    def reset(self) -> None:
+        """Сброс состояния (файл усечен или перезаписан)."""
+        self.offset = 0
+        self.complete = False
+        self.buckets = {}
+        self.errors = []
+        self.slow_requests = []
+        self.security_events = []
+
+    def add_issue(self, kind: str, item: Dict[str, Any]) -> None:
+        """
+        Добавление записи в список последних (не больше ISSUES_KEEP самых новых).
+
+        Args:
+            kind: 'errors', 'slow_requests' или 'security_events'
+            item: Запись для отчета с полем timestamp
+        """
+        items = getattr(self, kind)
+        items.append(item)
+        if len(items) > ISSUES_KEEP:
+            items.remove(min(items, key=lambda value: value['timestamp']))
+
+
+class LogCheckpointStore:
+    """
+    JSON-файл контрольных точек.
+
+    Файлы ищутся по пути и inode (без чтения), а при переименовании или
+    сжатии - по ключу первой строки. Запись атомарная: временный файл и
+    os.replace, поэтому прерванное сохранение не портит предыдущее.
+    """
+
+    def __init__(self, path: str):
+        """
+        Инициализация хранилища.
+
+        Args:
+            path: Путь к JSON-файлу
+        """
+        self.path = path
+        self.files: Dict[str, FileCheckpoint] = {}
+        self._by_path: Dict[str, str] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Загрузка сохраненных контрольных точек (поврежденный файл игнорируется)."""
+        self.files = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CHECKPOINT_VERSION:
+                self.files = {key: FileCheckpoint(**value) for key, value in data['files'].items()}
+        except (OSError, ValueError, TypeError, KeyError):
+            self.files = {}
+        self._by_path = {checkpoint.path: key for key, checkpoint in self.files.items()}
+
+    def find_by_path(self, path: str) -> Optional[str]:
+        """
+        Ключ контрольной точки файла по пути.
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            Ключ или None
+        """
+        return self._by_path.get(path)
+
+    def get(self, key: str, log_name: str, path: str) -> FileCheckpoint:
+        """
+        Контрольная точка по ключу первой строки (создается при отсутствии).
+
+        Args:
+            key: Ключ fingerprint_line
+            log_name: Имя лога
+            path: Текущий путь файла
+
+        Returns:
+            FileCheckpoint: Контрольная точка
+        """
+        checkpoint = self.files.get(key)
+        if checkpoint is None:
+            checkpoint = self.files[key] = FileCheckpoint(log_name=log_name, path=path)
+        if checkpoint.path != path:
+            # Файл переименован при ротации или сжат; по старому пути может быть уже новый файл
+            if self._by_path.get(checkpoint.path) == key:
+                del self._by_path[checkpoint.path]
+            checkpoint.path = path
+        self._by_path[path] = key
+        return checkpoint
+
+    def prune(self, keep_keys: set) -> None:
+        """
+        Удаление контрольных точек файлов, которых больше нет.
+
+        Args:
+            keep_keys: Ключи существующих файлов
+        """
+        for key in set(self.files) - keep_keys:
+            path = self.files.pop(key).path
+            if self._by_path.get(path) == key:
+                del self._by_path[path]
+
+    def save(self) -> None:
+        """Атомарное сохранение."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': CHECKPOINT_VERSION,
+                'files': {key: asdict(checkpoint) for key, checkpoint in self.files.items()}
+            }, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, self.path)
@@ -0,0 +1,147 @@
+"""
+Фоновое сжатие ротированных файлов логов.
+Ротация только переименовывает файл; сжатие выполняется в отдельных потоках.
+"""
+
+import os
+import sys
+import gzip
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Callable, BinaryIO
+
+try:
+    import zstandard
+except ImportError:  # zstd - необязательная зависимость
+    zstandard = None
+
+# Расширения архивов по методу сжатия
+COMPRESSION_EXTENSIONS = {
+    'gz': '.gz',
+    'zst': '.zst',
+}
+
+# Уровни сжатия по умолчанию
+DEFAULT_LEVELS = {
+    'gz': 6,
+    'zst': 3,
+}
+
+# Размер блока копирования
+CHUNK_SIZE = 1024 * 1024
+
+
+def _archive_writer(method: str, raw: BinaryIO, name: str, level: int) -> BinaryIO:
+    """Сжимающая обертка над открытым файлом архива (сам файл не закрывает)."""
+    if method == 'gz':
+        return gzip.GzipFile(filename=name, mode='wb', compresslevel=level, fileobj=raw)
+    return zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=False)
+
+
+class LogCompressor:
+    """
+    Сжатие ротированных файлов в пуле фоновых потоков.
+
+    Количество одновременных сжатий ограничено max_concurrent: остальные
+    файлы ждут в очереди пула. Архив пишется во временный файл и
+    переименовывается после завершения, поэтому анализатор никогда не видит
+    недописанный архив; исходный файл удаляется последним.
+    """
+
+    def __init__(self, method: str = 'gz', level: Optional[int] = None, max_concurrent: int = 1):
+        """
+        Инициализация компрессора.
+
+        Args:
+            method: 'gz' или 'zst' (без пакета zstandard используется gz)
+            level: Уровень сжатия; None - уровень метода по умолчанию
+            max_concurrent: Максимальное количество одновременных сжатий
+        """
+        if method not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Неизвестный метод сжатия логов: {method}")
+
+        if method == 'zst' and zstandard is None:
+            sys.stderr.write("Пакет zstandard не установлен, логи сжимаются в gzip\n")
+            method = 'gz'
+            level = None
+
+        self.method = method
+        self.extension = COMPRESSION_EXTENSIONS[method]
+        self.level = DEFAULT_LEVELS[method] if level is None else level
+        self.max_concurrent = max(max_concurrent, 1)
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, path: str, on_done: Optional[Callable[[], None]] = None) -> Future:
+        """
+        Постановка файла в очередь сжатия.
+
+        Args:
+            path: Путь к ротированному файлу
+            on_done: Вызывается после сжатия (например, очистка старых архивов)
+
+        Returns:
+            Future: Путь к архиву по завершении
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrent,
+                    thread_name_prefix='log-compressor'
+                )
+            return self._executor.submit(self._run, path, on_done)
+
+    def _run(self, path: str, on_done: Optional[Callable[[], None]]) -> Optional[str]:
+        """Сжатие в потоке пула; ошибки не должны убивать поток."""
+        try:
+            archive_path = self.compress(path)
+        except Exception as e:
+            sys.stderr.write(f"Ошибка сжатия лога {path}: {e!r}\n")
+            return None
+
+        if on_done is not None:
+            try:
+                on_done()
+            except Exception as e:
+                sys.stderr.write(f"Ошибка очистки логов после сжатия {path}: {e!r}\n")
+        return archive_path
+
+    def compress(self, path: str) -> str:
+        """
+        Сжатие файла в текущем потоке.
+
+        Args:
+            path: Путь к ротированному файлу
+
+        Returns:
+            str: Путь к архиву
+        """
+        archive_path = path + self.extension
+        temp_path = f"{archive_path}.{os.getpid()}.tmp"
+
+        try:
+            with open(path, 'rb') as src, open(temp_path, 'wb') as raw:
+                with _archive_writer(self.method, raw, os.path.basename(path), self.level) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            os.replace(temp_path, archive_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        os.remove(path)
+        return archive_path
+
+    def stop(self, wait: bool = True) -> None:
+        """
+        Остановка пула.
+
+        Args:
+            wait: Дождаться сжатия файлов из очереди
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,498 @@
+"""
+Слежение за логами в реальном времени.
+Дописываемые строки активных файлов учитываются в скользящих окнах за 1, 5 и 15 минут:
+частота запросов и ошибок, доля 5xx и перцентили длительности без повторного чтения файлов.
+
+Запуск:
+    python -m app.utils.log_analyzer follow [--interval N] [--json] [--serve HOST:PORT]
+"""
+
+import os
+import sys
+import json
+import time
+import math
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .log_analyzer import LogAnalyzer, LogEntry, ERROR_LEVELS, REQUEST_MESSAGE
+
+# Окна статистики: имя и длительность в секундах
+WINDOWS = (('1m', 60), ('5m', 300), ('15m', 900))
+
+# Количество слотов окна: память окна постоянна и не зависит от частоты запросов
+WINDOW_SLOTS = 60
+
+# Границы корзин длительности: геометрическая сетка от 1 мс до ~100 с с шагом 10%,
+# поэтому перцентиль завышается не больше чем на 10%
+LATENCY_BOUNDS = tuple(0.001 * 1.1 ** index for index in range(int(math.log(1e5) / math.log(1.1)) + 1))
+
+# Перцентили длительности в снимке
+PERCENTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))
+
+# Логи запросов (первый существующий) и лог ошибок
+REQUEST_LOGS = ('access', 'requests')
+ERROR_LOG = 'errors'
+
+# Период опроса файлов
+POLL_INTERVAL = 0.5
+
+
+def latency_bucket(duration: float) -> int:
+    """
+    Индекс корзины длительности (последний индекс - длиннее всех границ).
+
+    Args:
+        duration: Длительность в секундах
+
+    Returns:
+        int: Индекс в LATENCY_BOUNDS
+    """
+    if duration <= LATENCY_BOUNDS[0]:
+        return 0
+    index = math.ceil(math.log(duration / LATENCY_BOUNDS[0]) / math.log(1.1))
+    return min(index, len(LATENCY_BOUNDS))
+
+
+class RollingWindow:
+    """
+    Скользящее окно счетчиков запросов и гистограммы длительности.
+
+    Окно разбито на WINDOW_SLOTS слотов по seconds / slots секунд. Текущие
+    суммы окна поддерживаются при добавлении, а слот, выпавший из окна,
+    вычитается из сумм при повторном использовании, поэтому и добавление,
+    и снимок не зависят от количества записей.
+    """
+
+    def __init__(self, seconds: int, slots: int = WINDOW_SLOTS, started: float = None):
+        """
+        Инициализация окна.
+
+        Args:
+            seconds: Длительность окна
+            slots: Количество слотов
+            started: Начало наблюдения (epoch); по умолчанию текущее время
+        """
+        self.seconds = seconds
+        self.slot_seconds = seconds / slots
+        self.started = started or time.time()
+
+        size = len(LATENCY_BOUNDS) + 1
+        self._slot_index = [None] * slots
+        self._slots = [self._empty(size) for _ in range(slots)]
+        self._totals = self._empty(size)
+
+    @staticmethod
+    def _empty(size: int) -> Dict[str, Any]:
+        """Пустые счетчики слота."""
+        return {'requests': 0, 'errors': 0, 'server_errors': 0, 'duration_sum': 0.0, 'latency': [0] * size}
+
+    def _slot(self, moment: float, now: float) -> Optional[Dict[str, Any]]:
+        """Слот момента; None если момент уже вне окна."""
+        index = int(moment // self.slot_seconds)
+        if index <= int(now // self.slot_seconds) - len(self._slots):
+            return None
+
+        position = index % len(self._slots)
+        if self._slot_index[position] != index:
+            if self._slot_index[position] is not None and self._slot_index[position] > index:
+                return None  # Слот уже занят более новой записью
+            self._reset(position)
+            self._slot_index[position] = index
+        return self._slots[position]
+
+    def _reset(self, position: int) -> None:
+        """Вычитание слота из сумм окна и его очистка."""
+        slot, totals = self._slots[position], self._totals
+        for key in ('requests', 'errors', 'server_errors', 'duration_sum'):
+            totals[key] -= slot[key]
+            slot[key] = 0
+        for bucket, count in enumerate(slot['latency']):
+            if count:
+                totals['latency'][bucket] -= count
+                slot['latency'][bucket] = 0
+        self._slot_index[position] = None
+
+    def expire(self, now: float) -> None:
+        """
+        Удаление слотов, выпавших из окна.
+
+        Args:
+            now: Текущее время (epoch)
+        """
+        oldest = int(now // self.slot_seconds) - len(self._slots)
+        for position, index in enumerate(self._slot_index):
+            if index is not None and index <= oldest:
+                self._reset(position)
+
+    def add_request(self, moment: float, now: float, duration: float, status: Optional[int],
+                    weight: int = 1) -> None:
+        """
+        Учет запроса.
+
+        Args:
+            moment: Время записи (epoch)
+            now: Текущее время (epoch)
+            duration: Длительность в секундах
+            status: HTTP статус (None если неизвестен)
+            weight: Вес записи при выборочном логировании
+        """
+        slot = self._slot(moment, now)
+        if slot is None:
+            return
+
+        server_error = weight if status is not None and status >= 500 else 0
+        bucket = latency_bucket(duration)
+        for counters in (slot, self._totals):
+            counters['requests'] += weight
+            counters['server_errors'] += server_error
+            counters['duration_sum'] += duration * weight
+            counters['latency'][bucket] += weight
+
+    def add_error(self, moment: float, now: float, weight: int = 1) -> None:
+        """
+        Учет записи ERROR+.
+
+        Args:
+            moment: Время записи (epoch)
+            now: Текущее время (epoch)
+            weight: Вес записи
+        """
+        slot = self._slot(moment, now)
+        if slot is None:
+            return
+        slot['errors'] += weight
+        self._totals['errors'] += weight
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """
+        Перцентиль длительности по гистограмме окна (верхняя граница корзины).
+
+        Args:
+            quantile: Доля от 0 до 1
+
+        Returns:
+            Длительность в секундах или None без запросов
+        """
+        total = sum(self._totals['latency'])
+        if not total:
+            return None
+
+        rank = quantile * total
+        cumulative = 0
+        for bucket, count in enumerate(self._totals['latency']):
+            cumulative += count
+            if cumulative >= rank:
+                return LATENCY_BOUNDS[min(bucket, len(LATENCY_BOUNDS) - 1)]
+        return LATENCY_BOUNDS[-1]
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        """
+        Значения окна.
+
+        Пока окно не заполнено (после запуска), частоты считаются по прошедшему времени.
+
+        Args:
+            now: Текущее время (epoch)
+
+        Returns:
+            Dict[str, Any]: Частоты, доля 5xx и перцентили длительности
+        """
+        self.expire(now)
+        totals = self._totals
+        percentiles = {name: self.percentile(quantile) for name, quantile in PERCENTILES}
+        elapsed = min(self.seconds, max(now - self.started, self.slot_seconds))
+        requests = totals['requests']
+
+        return {
+            'requests': requests,
+            'requests_per_second': round(requests / elapsed, 3),
+            'errors': totals['errors'],
+            'errors_per_second': round(totals['errors'] / elapsed, 3),
+            'server_error_ratio': round(totals['server_errors'] / requests, 4) if requests else 0.0,
+            'latency': {
+                'mean': round(totals['duration_sum'] / requests, 4) if requests else None,
+                **{name: round(value, 4) if value is not None else None for name, value in percentiles.items()},
+            },
+        }
+
+
+class FollowedFile:
+    """
+    Дописываемый файл логов.
+
+    Ротация определяется по смене inode пути (и по уменьшению размера при
+    усечении): старый файл дочитывается до конца, затем открывается новый
+    с начала. Незавершенная последняя строка ждет следующего опроса.
+    """
+
+    def __init__(self, path: Path, from_end: bool = True):
+        """
+        Инициализация.
+
+        Args:
+            path: Путь к активному файлу
+            from_end: Начать с конца файла (только новые строки)
+        """
+        self.path = path
+        self.from_end = from_end
+        self._handle = None
+        self._inode = None
+        self._pending = b''
+        if not self._open():
+            self.from_end = False  # Файл появится позже: все его строки новые
+
+    def _open(self) -> bool:
+        """Открытие текущего файла по пути."""
+        try:
+            handle = open(self.path, 'rb')
+        except OSError:
+            return False
+
+        self._handle = handle
+        self._inode = os.fstat(handle.fileno()).st_ino
+        self._pending = b''
+        if self.from_end:
+            handle.seek(0, os.SEEK_END)
+        # Файлы, созданные после запуска (ротация), читаются с начала
+        self.from_end = False
+        return True
+
+    def _read_available(self) -> List[bytes]:
+        """Полные строки, дописанные с прошлого чтения."""
+        data = self._handle.read()
+        if not data:
+            return []
+        lines = (self._pending + data).split(b'\n')
+        self._pending = lines.pop()
+        return lines
+
+    def read_lines(self) -> List[bytes]:
+        """
+        Новые строки файла, включая дочитанные после ротации.
+
+        Returns:
+            List[bytes]: Строки без перевода строки
+        """
+        if self._handle is None and not self._open():
+            return []
+
+        lines = self._read_available()
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return lines  # Файл переименован, новый еще не создан
+
+        if stat.st_ino != self._inode:
+            # Ротация: строки, записанные в старый файл до переоткрытия, дочитываются
+            lines.extend(self._read_available())
+            self._handle.close()
+            self._handle = None
+            if self._open():
+                lines.extend(self._read_available())
+        elif stat.st_size < self._handle.tell():
+            # Усечение: читаем с начала
+            self._handle.seek(0)
+            self._pending = b''
+            lines.extend(self._read_available())
+        return lines
+
+    def close(self) -> None:
+        """Закрытие файла."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class LogFollower:
+    """
+    Слежение за активными файлами запросов и ошибок со скользящими окнами.
+
+    Память постоянна: окна хранят только слоты счетчиков и гистограмм.
+    """
+
+    def __init__(self, log_dir: str = "logs", windows: Tuple[Tuple[str, int], ...] = WINDOWS,
+                 from_end: bool = True):
+        """
+        Инициализация.
+
+        Args:
+            log_dir: Директория логов
+            windows: Имена и длительности окон
+            from_end: Учитывать только строки, дописанные после запуска
+        """
+        self.analyzer = LogAnalyzer(log_dir)
+        self.windows = {name: RollingWindow(seconds) for name, seconds in windows}
+        self.request_log = next(
+            (name for name in REQUEST_LOGS if (self.analyzer.log_dir / f"{name}.log").exists()),
+            REQUEST_LOGS[-1]
+        )
+        self.files = {
+            name: FollowedFile(self.analyzer.log_dir / f"{name}.log", from_end)
+            for name in (self.request_log, ERROR_LOG)
+        }
+        self._lock = threading.Lock()
+
+    def poll(self, now: float = None) -> int:
+        """
+        Учет строк, дописанных с прошлого опроса.
+
+        Args:
+            now: Текущее время (epoch)
+
+        Returns:
+            int: Количество учтенных записей
+        """
+        now = now or time.time()
+        counted = 0
+
+        for log_name, followed in self.files.items():
+            for raw in followed.read_lines():
+                entry = self.analyzer.parse_log_line(raw.decode('utf-8', 'replace'))
+                if entry is not None and self._add(log_name, entry, now):
+                    counted += 1
+        return counted
+
+    def _add(self, log_name: str, entry: LogEntry, now: float) -> bool:
+        """Учет записи во всех окнах."""
+        moment = entry.timestamp.timestamp()
+        weight = self.analyzer.get_sample_weight(entry)
+
+        if log_name == ERROR_LOG:
+            if entry.level not in ERROR_LEVELS:
+                return False
+            with self._lock:
+                for window in self.windows.values():
+                    window.add_error(moment, now, weight)
+            return True
+
+        duration = self.analyzer.get_request_duration(entry, log_name)
+        if duration is None:
+            return False
+
+        if entry.extra_data:
+            status = entry.extra_data.get('status')
+        else:
+            match = REQUEST_MESSAGE.match(entry.message)
+            status = int(match.group(3)) if match else None
+
+        with self._lock:
+            for window in self.windows.values():
+                window.add_request(moment, now, duration, status, weight)
+        return True
+
+    def snapshot(self, now: float = None) -> Dict[str, Any]:
+        """
+        Значения всех окон.
+
+        Args:
+            now: Текущее время (epoch)
+
+        Returns:
+            Dict[str, Any]: Время снимка и значения по окнам
+        """
+        now = now or time.time()
+        with self._lock:
+            return {
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now)),
+                'request_log': f"{self.request_log}.log",
+                'windows': {name: window.snapshot(now) for name, window in self.windows.items()},
+            }
+
+    def close(self) -> None:
+        """Закрытие файлов."""
+        for followed in self.files.values():
+            followed.close()
+
+
+def format_snapshot(snapshot: Dict[str, Any]) -> str:
+    """
+    Таблица снимка для терминала.
+
+    Args:
+        snapshot: Результат LogFollower.snapshot
+
+    Returns:
+        str: Текст таблицы
+    """
+    def seconds(value: Optional[float]) -> str:
+        return f"{value:.3f}" if value is not None else '-'
+
+    lines = [
+        f"\n=== Логи в реальном времени {snapshot['time']} ({snapshot['request_log']}) ===",
+        f"{'окно':<6}{'запросов/с':>12}{'ошибок/с':>10}{'5xx':>8}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}",
+    ]
+    for name, values in snapshot['windows'].items():
+        latency = values['latency']
+        lines.append(
+            f"{name:<6}{values['requests_per_second']:>12.2f}{values['errors_per_second']:>10.2f}"
+            f"{values['server_error_ratio'] * 100:>7.1f}%{seconds(latency['mean']):>9}"
+            f"{seconds(latency['p50']):>9}{seconds(latency['p90']):>9}{seconds(latency['p99']):>9}"
+        )
+    return '\n'.join(lines)
+
+
+def serve_snapshots(follower: LogFollower, address: str) -> ThreadingHTTPServer:
+    """
+    HTTP endpoint с текущим снимком в JSON (в фоновом потоке).
+
+    Args:
+        follower: Источник снимков
+        address: "HOST:PORT"
+
+    Returns:
+        ThreadingHTTPServer: Запущенный сервер
+    """
+    host, port = address.rsplit(':', 1)
+
+    class SnapshotHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(follower.snapshot(), ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Опросы мониторинга не выводятся в терминал
+
+    server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), SnapshotHandler)
+    threading.Thread(target=server.serve_forever, name='log-follow-http', daemon=True).start()
+    return server
+
+
+def follow_logs(log_dir: str = "logs", interval: float = 5.0, as_json: bool = False,
+                serve: str = None) -> None:
+    """
+    Слежение за логами до Ctrl+C.
+
+    Args:
+        log_dir: Директория логов
+        interval: Период вывода снимка в секундах
+        as_json: Выводить снимок строкой JSON вместо таблицы
+        serve: "HOST:PORT" для JSON endpoint (None - без сервера)
+    """
+    follower = LogFollower(log_dir)
+    server = serve_snapshots(follower, serve) if serve else None
+    if server is not None:
+        print(f"Снимки статистики: http://{serve}/", file=sys.stderr)
+
+    next_output = time.time() + interval
+    try:
+        while True:
+            follower.poll()
+            now = time.time()
+            if now >= next_output:
+                snapshot = follower.snapshot(now)
+                print(json.dumps(snapshot, ensure_ascii=False) if as_json else format_snapshot(snapshot), flush=True)
+                next_output = now + interval
+            time.sleep(POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.shutdown()
+        follower.close()
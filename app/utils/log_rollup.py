@@ -0,0 +1,315 @@
+"""
+Поминутные агрегаты логов в локальной базе SQLite.
+Индексатор (LogAnalyzer.update_rollups) один раз сводит новые строки в агрегаты,
+после чего статистика за любой период считается запросом без чтения логов.
+"""
+
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+
+from .log_checkpoint import LogCheckpointStore, FileCheckpoint
+from .metrics import DEFAULT_BUCKETS
+
+# Корзины: минута "YYYY-MM-DDTHH:MM"; час хранится как минута ":00" с resolution='hour'
+MINUTE = 'minute'
+HOUR = 'hour'
+
+# Сколько хранятся поминутные агрегаты (старые сворачиваются в часы) и часовые
+MINUTE_RETENTION = timedelta(days=7)
+HOUR_RETENTION = timedelta(days=90)
+
+# Измерения агрегатов: счетчики LogStatsAggregator и агрегаты запросов
+STATS_DIMENSIONS = ('by_level', 'by_source', 'stats')
+REQUEST_DIMENSIONS = ('status', 'route', 'duration', 'duration_sum', 'error_source')
+
+# Корзина после всех корзин "YYYY-..." (конец открытого периода)
+BUCKET_MAX = '~'
+
+# Числовые сегменты пути заменяются, чтобы маршруты не плодили ключи на каждый id
+ROUTE_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    bucket TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value NUMERIC NOT NULL,
+    PRIMARY KEY (bucket, resolution, dimension, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS files (
+    key TEXT PRIMARY KEY,
+    log_name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    offset INTEGER NOT NULL,
+    complete INTEGER NOT NULL
+);
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (bucket, resolution, dimension, key, value) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (bucket, resolution, dimension, key) DO UPDATE SET value = value + excluded.value
+"""
+
+# Колонки файлов: состояние FileCheckpoint без часовых агрегатов и списков issues
+FILE_COLUMNS = ('key', 'log_name', 'path', 'inode', 'size', 'mtime', 'offset', 'complete')
+
+INSERT_FILE = f"INSERT OR REPLACE INTO files ({', '.join(FILE_COLUMNS)}) VALUES ({', '.join('?' * len(FILE_COLUMNS))})"
+
+
+def minute_bucket(moment: datetime) -> str:
+    """
+    Корзина минуты.
+
+    Args:
+        moment: Время записи
+
+    Returns:
+        str: "YYYY-MM-DDTHH:MM"
+    """
+    return f"{moment.year:04d}-{moment.month:02d}-{moment.day:02d}T{moment.hour:02d}:{moment.minute:02d}"
+
+
+def duration_bucket(duration: float) -> str:
+    """
+    Корзина гистограммы длительности (верхняя граница DEFAULT_BUCKETS).
+
+    Args:
+        duration: Длительность в секундах
+
+    Returns:
+        str: Граница ('0.25', '+Inf')
+    """
+    for bound in DEFAULT_BUCKETS:
+        if duration <= bound:
+            return f"{bound:g}"
+    return '+Inf'
+
+
+def route_key(method: str, path: str) -> str:
+    """
+    Ключ маршрута: метод и путь без query и числовых id.
+
+    Args:
+        method: HTTP метод
+        path: Путь запроса
+
+    Returns:
+        str: "GET /api/projects/<id>"
+    """
+    return f"{method} {ROUTE_ID_SEGMENT.sub('/<id>', path.split('?', 1)[0])}"
+
+
+class LogRollupStore(LogCheckpointStore):
+    """
+    База поминутных агрегатов и прочитанных смещений файлов.
+
+    Файлы отслеживаются так же, как контрольные точки инкрементального
+    отчета (путь, inode, ключ первой строки), но состояние хранится в
+    таблице files: агрегаты файла и его смещение записываются одной
+    транзакцией, поэтому прерванная индексация не учитывает строки дважды.
+    Поминутные агрегаты старше minute_retention сворачиваются в часовые,
+    часовые удаляются через hour_retention.
+    """
+
+    def __init__(self, path: str, minute_retention: timedelta = MINUTE_RETENTION,
+                 hour_retention: timedelta = HOUR_RETENTION):
+        """
+        Инициализация хранилища.
+
+        Args:
+            path: Путь к файлу SQLite
+            minute_retention: Срок хранения поминутных агрегатов
+            hour_retention: Срок хранения часовых агрегатов
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.minute_retention = minute_retention
+        self.hour_retention = hour_retention
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        super().__init__(path)
+
+    def load(self) -> None:
+        """Загрузка состояния файлов."""
+        rows = self._connection.execute(f"SELECT {', '.join(FILE_COLUMNS)} FROM files")
+        self.files = {}
+        for key, log_name, path, inode, size, mtime, offset, complete in rows:
+            self.files[key] = FileCheckpoint(log_name=log_name, path=path, inode=inode, size=size,
+                                             mtime=mtime, offset=offset, complete=bool(complete))
+        self._by_path = {checkpoint.path: key for key, checkpoint in self.files.items()}
+
+    @staticmethod
+    def _file_row(key: str, checkpoint: FileCheckpoint) -> Tuple[Any, ...]:
+        """Строка таблицы files."""
+        return (key, checkpoint.log_name, checkpoint.path, checkpoint.inode, checkpoint.size,
+                checkpoint.mtime, checkpoint.offset, int(checkpoint.complete))
+
+    def save(self) -> None:
+        """Сохранение состояния всех файлов (удаленные файлы забываются)."""
+        with self._connection:
+            self._connection.execute("DELETE FROM files")
+            self._connection.executemany(
+                INSERT_FILE,
+                [self._file_row(key, checkpoint) for key, checkpoint in self.files.items()]
+            )
+
+    def add(self, key: str, checkpoint: FileCheckpoint, rows: Dict[Tuple[str, str, str], Any]) -> None:
+        """
+        Добавление поминутных агрегатов прочитанной части файла.
+
+        Args:
+            key: Ключ файла
+            checkpoint: Состояние файла с новым смещением
+            rows: Значения по (корзина, измерение, ключ)
+        """
+        with self._connection:
+            self._connection.executemany(
+                UPSERT_ROLLUP,
+                [(bucket, MINUTE, dimension, name, value) for (bucket, dimension, name), value in rows.items()]
+            )
+            self._connection.execute(INSERT_FILE, self._file_row(key, checkpoint))
+
+    def downsample(self, now: datetime = None) -> Tuple[int, int]:
+        """
+        Сворачивание старых минут в часы и удаление старых часов.
+
+        Граница минут выравнивается по часу, поэтому час не делится между
+        поминутными и часовыми агрегатами.
+
+        Args:
+            now: Текущее время (для проверки)
+
+        Returns:
+            Tuple[int, int]: Удалено поминутных и часовых строк
+        """
+        now = now or datetime.now()
+        minute_cutoff = minute_bucket((now - self.minute_retention).replace(minute=0))
+        hour_cutoff = minute_bucket((now - self.hour_retention).replace(minute=0))
+
+        with self._connection:
+            self._connection.execute(
+                """
+                INSERT INTO rollups (bucket, resolution, dimension, key, value)
+                SELECT substr(bucket, 1, 13) || ':00', ?, dimension, key, SUM(value)
+                FROM rollups WHERE resolution = ? AND bucket < ?
+                GROUP BY substr(bucket, 1, 13), dimension, key
+                ON CONFLICT (bucket, resolution, dimension, key) DO UPDATE SET value = value + excluded.value
+                """,
+                (HOUR, MINUTE, minute_cutoff)
+            )
+            minutes = self._connection.execute(
+                "DELETE FROM rollups WHERE resolution = ? AND bucket < ?", (MINUTE, minute_cutoff)
+            ).rowcount
+            hours = self._connection.execute(
+                "DELETE FROM rollups WHERE resolution = ? AND bucket < ?", (HOUR, hour_cutoff)
+            ).rowcount
+        return minutes, hours
+
+    def _range(self, since: Optional[datetime], until: Optional[datetime]) -> Tuple[str, str]:
+        """Границы корзин периода [since, until)."""
+        return (minute_bucket(since) if since else '',
+                minute_bucket(until) if until else BUCKET_MAX)
+
+    def query(self, dimensions: Iterable[str], since: datetime = None,
+              until: datetime = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Суммы измерений за период.
+
+        Период округляется до минут, а для свернутых в часы агрегатов - до часов.
+
+        Args:
+            dimensions: Имена измерений
+            since: Начало периода
+            until: Конец периода (не включая)
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Значения по измерению и ключу
+        """
+        dimensions = tuple(dimensions)
+        result = {dimension: {} for dimension in dimensions}
+        rows = self._connection.execute(
+            f"""
+            SELECT dimension, key, SUM(value) FROM rollups
+            WHERE bucket >= ? AND bucket < ? AND dimension IN ({', '.join('?' * len(dimensions))})
+            GROUP BY dimension, key
+            """,
+            (*self._range(since, until), *dimensions)
+        )
+        for dimension, key, value in rows:
+            result[dimension][key] = value
+        return result
+
+    def get_series(self, dimension: str, key: str, since: datetime = None,
+                   until: datetime = None) -> List[Tuple[str, Any]]:
+        """
+        Значения одного ключа по корзинам (графики админки).
+
+        Args:
+            dimension: Измерение ('stats', 'status', 'route', ...)
+            key: Ключ ('errors_count', '5xx', ...)
+            since: Начало периода
+            until: Конец периода (не включая)
+
+        Returns:
+            List[Tuple[str, Any]]: Корзина и значение по возрастанию времени
+        """
+        return list(self._connection.execute(
+            """
+            SELECT bucket, SUM(value) FROM rollups
+            WHERE bucket >= ? AND bucket < ? AND dimension = ? AND key = ?
+            GROUP BY bucket ORDER BY bucket
+            """,
+            (*self._range(since, until), dimension, key)
+        ))
+
+    def get_stats_state(self, since: datetime = None, until: datetime = None) -> Dict[str, Any]:
+        """
+        Состояние LogStatsAggregator за период.
+
+        Args:
+            since: Начало периода
+            until: Конец периода (не включая)
+
+        Returns:
+            Dict[str, Any]: Состояние для LogStatsAggregator.from_dict
+        """
+        values = self.query(STATS_DIMENSIONS, since, until)
+        state = dict(values['stats'])
+        state['by_level'] = values['by_level']
+        state['by_source'] = values['by_source']
+        state['by_hour'] = dict(self._connection.execute(
+            """
+            SELECT substr(bucket, 12, 2) || ':00', SUM(value) FROM rollups
+            WHERE bucket >= ? AND bucket < ? AND dimension = 'stats' AND key = 'total_entries'
+            GROUP BY 1
+            """,
+            self._range(since, until)
+        ))
+        return state
+
+    def get_request_stats(self, since: datetime = None, until: datetime = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Запросы за период: классы статусов, маршруты, гистограмма длительности, ошибки по источникам.
+
+        Args:
+            since: Начало периода
+            until: Конец периода (не включая)
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Значения по измерениям REQUEST_DIMENSIONS
+        """
+        return self.query(REQUEST_DIMENSIONS, since, until)
+
+    def close(self) -> None:
+        """Закрытие соединения."""
+        self._connection.close()
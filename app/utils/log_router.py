@@ -0,0 +1,556 @@
+"""
+Маршрутизация записей логов по файлам.
+Один sink loguru классифицирует запись один раз и пишет ее только в подходящие файлы.
+"""
+
+import os
+import re
+import json
+import traceback
+import glob
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, FrozenSet, List, Tuple
+
+from loguru import logger
+
+from app.config.logging import LOG_FILTERS
+from .log_writer import AsyncLogWriter
+from .log_compressor import LogCompressor, COMPRESSION_EXTENSIONS
+
+
+# Категории, которые можно задать через bind(name=...) (см. get_logger)
+EXTRA_CATEGORIES = frozenset({'requests', 'security', 'admin', 'files', 'performance', 'database', 'errors'})
+
+# Категории по полю type, которое передают log_* функции
+TYPE_CATEGORIES = {
+    'REQUEST': 'requests',
+    'SECURITY': 'security',
+    'ADMIN_ACTION': 'admin',
+    'FILE_OPERATION': 'files',
+    'PERFORMANCE': 'performance',
+}
+
+# Префиксы имен стандартных логгеров, относящихся к базе данных
+DATABASE_LOGGERS = ('sqlalchemy', 'alembic')
+
+# Форматы строк в файлах логов
+OUTPUT_FORMATS = ('text', 'jsonl')
+
+# Колонки access.log (разделитель - пробел, отсутствующее значение - '-').
+# Путь идет последним, так как может содержать пробелы
+ACCESS_COLUMNS = ('time', 'status', 'duration', 'size', 'request_id',
+                  'remote_addr', 'ua_hash', 'sample_rate',
+                  'db_ms', 'db_queries', 'render_ms', 'upload_ms', 'method', 'path')
+
+
+def format_access_line(moment: datetime, status: int, duration: float, size: Optional[int],
+                       request_id: Optional[str], remote_addr: Optional[str], ua_hash: Optional[str],
+                       sample_rate: int, phases: Dict[str, Any], method: str, path: str) -> str:
+    """
+    Строка access.log с фиксированными колонками ACCESS_COLUMNS.
+
+    Args:
+        moment: Время ответа
+        status: HTTP статус
+        duration: Длительность в секундах
+        size: Размер ответа в байтах
+        request_id: ID запроса
+        remote_addr: IP клиента
+        ua_hash: Хеш User-Agent
+        sample_rate: Вес записи при выборочном логировании
+        phases: Поля фаз запроса (db_ms, db_queries, render_ms, upload_ms)
+        method: HTTP метод
+        path: Путь запроса
+
+    Returns:
+        str: Строка с переводом строки в конце
+    """
+    phase_columns = ' '.join(
+        str(phases[key]) if phases.get(key) is not None else '-'
+        for key in ('db_ms', 'db_queries', 'render_ms', 'upload_ms')
+    )
+    return (f"{moment.isoformat(timespec='milliseconds')} {status} {duration:.3f} "
+            f"{size if size is not None else '-'} {request_id or '-'} {remote_addr or '-'} "
+            f"{ua_hash or '-'} {sample_rate} {phase_columns} {method} {path}\n")
+
+
+# Номер уровня ERROR (стандартный уровень loguru)
+ERROR_LEVEL_NO = 40
+
+
+def _build_keyword_index(filters: Dict[str, List[str]]) -> Dict[str, FrozenSet[str]]:
+    """Ключевое слово -> категории, в которые оно направляет запись."""
+    index: Dict[str, set] = {}
+    for category, keywords in filters.items():
+        for keyword in keywords:
+            index.setdefault(keyword.upper(), set()).add(category)
+    return {keyword: frozenset(categories) for keyword, categories in index.items()}
+
+
+# Категории, которые ищутся по ключевым словам без учета регистра. requests и admin
+# определяются точными маркерами сообщений (REQUEST/RESPONSE, ADMIN) и модулем
+_KEYWORD_FILTERS = ('security', 'files', 'performance')
+
+_KEYWORD_CATEGORIES = _build_keyword_index({category: LOG_FILTERS[category] for category in _KEYWORD_FILTERS})
+
+# Одно регулярное выражение по всем ключевым словам (длинные первыми), только целые слова.
+# Ключевые слова ASCII: re.ASCII и просмотр первой буквы заметно ускоряют
+# поиск по кириллическим сообщениям.
+_KEYWORD_PATTERN = re.compile(
+    r'\b(?=[' + ''.join(sorted({k[0] for k in _KEYWORD_CATEGORIES})) + r'])('
+    + '|'.join(re.escape(k) for k in sorted(_KEYWORD_CATEGORIES, key=len, reverse=True)) + r')\b',
+    re.IGNORECASE | re.ASCII
+)
+
+_REQUESTS = frozenset(('requests',))
+_ADMIN = frozenset(('admin',))
+
+
+def classify_record(record: Dict[str, Any]) -> FrozenSet[str]:
+    """
+    Определение тематических категорий записи.
+
+    Сначала используются структурированные поля (extra, имя модуля),
+    и только если их нет - маркеры REQUEST/RESPONSE и ADMIN (с учетом регистра)
+    и целые ключевые слова LOG_FILTERS security/files/performance в сообщении.
+
+    Args:
+        record: Запись loguru
+
+    Returns:
+        FrozenSet[str]: Категории записи (без общих app/errors)
+    """
+    extra = record['extra']
+
+    category = extra.get('name')
+    if category in EXTRA_CATEGORIES:
+        return frozenset((category,))
+    if category == 'app':
+        return frozenset()  # Явно общая запись: без поиска ключевых слов
+
+    category = TYPE_CATEGORIES.get(extra.get('type'))
+    if category:
+        return frozenset((category,))
+
+    logger_name = extra.get('logger_name')
+    if logger_name and logger_name.startswith(DATABASE_LOGGERS):
+        return frozenset(('database',))
+
+    message = record['message']
+    categories = frozenset()
+    if 'REQUEST' in message or 'RESPONSE' in message:
+        categories = _REQUESTS
+    if 'admin' in record['name'] or 'ADMIN' in message:
+        categories |= _ADMIN
+    for match in _KEYWORD_PATTERN.finditer(message):
+        categories |= _KEYWORD_CATEGORIES[match.group(1).upper()]
+    return categories
+
+
+_SIZE_UNITS = {'B': 1, 'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3,
+               'KIB': 1024, 'MIB': 1024 ** 2, 'GIB': 1024 ** 3}
+
+_DURATION_UNITS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400, 'week': 604800}
+
+
+def parse_size(value: Optional[str]) -> Optional[int]:
+    """
+    Разбор размера вида "10 MB".
+
+    Args:
+        value: Строка размера или число байт
+
+    Returns:
+        Optional[int]: Размер в байтах
+    """
+    if value is None or isinstance(value, int):
+        return value
+    number, unit = value.split()
+    return int(float(number) * _SIZE_UNITS[unit.upper()])
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Разбор длительности вида "30 days".
+
+    Args:
+        value: Строка длительности
+
+    Returns:
+        Optional[float]: Длительность в секундах
+    """
+    if value is None:
+        return None
+    number, unit = value.split()
+    return float(number) * _DURATION_UNITS[unit.lower().rstrip('s')]
+
+
+class RotatingFileWriter:
+    """Файл лога с ротацией по размеру, фоновым сжатием и удалением старых архивов."""
+
+    def __init__(self, path: str, rotation: Optional[str] = None, retention: Optional[str] = None,
+                 compressor: Optional[LogCompressor] = None):
+        """
+        Инициализация файла.
+
+        Args:
+            path: Путь к файлу лога
+            rotation: Размер, после которого файл ротируется ("10 MB")
+            retention: Время хранения ротированных файлов ("30 days")
+            compressor: Фоновое сжатие ротированных файлов; None - без сжатия
+        """
+        self.path = path
+        self.rotation = parse_size(rotation)
+        self.retention = parse_duration(retention)
+        self.compressor = compressor
+
+        self._file = None
+        self._size = 0
+        self._created_at = 0.0
+
+    def _open(self) -> None:
+        """Открытие файла на дозапись."""
+        self._file = open(self.path, 'ab')
+        stat = os.fstat(self._file.fileno())
+        self._size = stat.st_size
+        if not self._size:
+            self._created_at = time.time()  # Файл создан этим процессом
+        else:
+            # Файл предыдущего запуска: st_ctime в Linux меняется при chmod и rename,
+            # поэтому берется время создания, где оно есть, иначе время изменения
+            self._created_at = getattr(stat, 'st_birthtime', None) or stat.st_mtime
+
+    def write(self, data: bytes) -> None:
+        """
+        Запись данных с ротацией при превышении размера.
+
+        Args:
+            data: Закодированные строки лога
+        """
+        if self._file is None:
+            self._open()
+
+        if self.rotation and self._size and self._size + len(data) > self.rotation:
+            self.rotate()
+
+        self._file.write(data)
+        self._size += len(data)
+
+    def flush(self) -> None:
+        """Сброс буфера на диск."""
+        if self._file is not None:
+            self._file.flush()
+
+    def rotate(self) -> None:
+        """Переименование текущего файла и передача его на сжатие."""
+        self.close()
+
+        root, ext = os.path.splitext(self.path)
+        # Имя совместимо с loguru: app.2024-07-14_15-30-45_123456.log
+        stamp = datetime.fromtimestamp(self._created_at).strftime('%Y-%m-%d_%H-%M-%S_%f')
+        rotated_path = f"{root}.{stamp}{ext}"
+        counter = 1
+        while any(os.path.exists(rotated_path + suffix) for suffix in ('', *COMPRESSION_EXTENSIONS.values())):
+            counter += 1
+            rotated_path = f"{root}.{stamp}.{counter}{ext}"
+
+        os.rename(self.path, rotated_path)
+        self._open()
+
+        # Сжатие и очистка архивов - в фоне, поток записи не ждет
+        if self.compressor is not None:
+            self.compressor.submit(rotated_path, on_done=self.apply_retention if self.retention else None)
+        elif self.retention:
+            self.apply_retention()
+
+    def apply_retention(self) -> None:
+        """Удаление ротированных файлов старше срока хранения."""
+        root, ext = os.path.splitext(self.path)
+        cutoff = time.time() - self.retention
+
+        for rotated in glob.glob(f"{glob.escape(root)}.*{ext}*"):
+            if rotated == self.path:
+                continue
+            try:
+                if os.path.getmtime(rotated) < cutoff:
+                    os.remove(rotated)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """Закрытие файла."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LogRoute:
+    """Файл лога с минимальным уровнем записей."""
+
+    def __init__(self, name: str, writer: RotatingFileWriter, level: str):
+        """
+        Инициализация маршрута.
+
+        Args:
+            name: Категория (app, errors, requests, ...)
+            writer: Файл для записи
+            level: Минимальный уровень записей
+        """
+        self.name = name
+        self.writer = writer
+        self.level = level
+        self.level_no = logger.level(level).no
+
+
+class LogRouter:
+    """
+    Единый sink loguru для всех файлов логов.
+
+    Запись классифицируется один раз (в filter, до форматирования) и пишется
+    только в файлы своих категорий. Категория app получает все записи,
+    errors - записи уровня ERROR и выше.
+
+    Sink подключается с format="{message}": строка собирается здесь, а время
+    форматируется один раз в секунду. Формат файлов - текст в стиле
+    LoggerConfig.JSON_FORMAT ("text") или JSON-строки со всеми полями
+    extra ("jsonl").
+    """
+
+    # Ключ записи loguru, в котором filter передает выбранные маршруты в write
+    RECORD_KEY = 'log_routes'
+
+    def __init__(self, routes: List[LogRoute], output_format: str = 'text',
+                 async_options: Optional[Dict[str, Any]] = None,
+                 raw_writers: Optional[Dict[str, RotatingFileWriter]] = None,
+                 aggregator_socket: Optional[str] = None):
+        """
+        Инициализация маршрутизатора.
+
+        Args:
+            routes: Маршруты по категориям
+            output_format: Формат строк в файлах ('text' или 'jsonl')
+            async_options: Параметры AsyncLogWriter; None - синхронная запись
+            raw_writers: Файлы для готовых строк в обход loguru (см. write_raw)
+            aggregator_socket: Unix сокет процесса-агрегатора; строки отправляются
+                ему, а файлы этот процесс не открывает (async_options не используются)
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Неизвестный формат логов: {output_format}")
+
+        self.routes = {route.name: route for route in routes}
+        self.min_level_no = min(route.level_no for route in routes)
+        self.output_format = output_format
+
+        self._second = None
+        self._second_prefix = ''
+
+        self.raw_writers = dict(raw_writers or {})
+        self._raw_lock = threading.Lock()
+
+        self.async_writer = None
+        if aggregator_socket is not None:
+            # Модуль агрегатора запускается как CLI и импортируется только при необходимости
+            from .log_aggregator import SocketLogWriter
+            self.async_writer = SocketLogWriter(aggregator_socket, self.format_notice)
+        elif async_options is not None:
+            self.async_writer = AsyncLogWriter(
+                {**{name: route.writer for name, route in self.routes.items()}, **self.raw_writers},
+                self.format_notice,
+                **async_options
+            )
+
+    def select_routes(self, record: Dict[str, Any]) -> Tuple[str, ...]:
+        """
+        Выбор файлов для записи.
+
+        Args:
+            record: Запись loguru
+
+        Returns:
+            Tuple[str, ...]: Имена маршрутов, принимающих запись
+        """
+        level_no = record['level'].no
+        categories = classify_record(record)
+
+        return tuple(
+            name for name, route in self.routes.items()
+            if level_no >= route.level_no
+            and (name == 'app' or name in categories or (name == 'errors' and level_no >= ERROR_LEVEL_NO))
+        )
+
+    def min_level_for(self, categories: Optional[FrozenSet[str]] = None) -> int:
+        """
+        Минимальный уровень, который примет хотя бы один файл.
+
+        Args:
+            categories: Категории записей; None - категория заранее неизвестна
+
+        Returns:
+            int: Номер уровня
+        """
+        if categories is None:
+            return self.min_level_no
+        return min(
+            route.level_no for name, route in self.routes.items()
+            if name in ('app', 'errors') or name in categories
+        )
+
+    def filter(self, record: Dict[str, Any]) -> bool:
+        """
+        Фильтр sink: отбрасывает запись до форматирования, если ее не принимает ни один файл.
+
+        Args:
+            record: Запись loguru
+
+        Returns:
+            bool: Нужно ли обрабатывать запись
+        """
+        selected = self.select_routes(record)
+        record[self.RECORD_KEY] = selected
+        return bool(selected)
+
+    def format_time(self, record: Dict[str, Any]) -> str:
+        """
+        Время записи в формате "YYYY-MM-DD HH:mm:ss.SSS".
+
+        Args:
+            record: Запись loguru
+
+        Returns:
+            str: Отформатированное время
+        """
+        moment = record['time']
+        second = moment.replace(microsecond=0)
+        if second != self._second:
+            self._second = second
+            self._second_prefix = moment.strftime('%Y-%m-%d %H:%M:%S')
+
+        return f"{self._second_prefix}.{moment.microsecond // 1000:03d}"
+
+    def format_text(self, record: Dict[str, Any], message: str) -> str:
+        """
+        Текстовая строка: "время | LEVEL | name:function:line | сообщение".
+
+        Args:
+            record: Запись loguru
+            message: Сообщение loguru (с трассировкой исключения, если есть)
+
+        Returns:
+            str: Строка лога
+        """
+        return (f"{self.format_time(record)} | {record['level'].name} | "
+                f"{record['name']}:{record['function']}:{record['line']} | {message}")
+
+    def format_json(self, record: Dict[str, Any]) -> str:
+        """
+        JSON-строка с типизированными полями extra.
+
+        Args:
+            record: Запись loguru
+
+        Returns:
+            str: Строка лога в формате JSON Lines
+        """
+        entry = {
+            'time': self.format_time(record),
+            'level': record['level'].name,
+            'source': f"{record['name']}:{record['function']}:{record['line']}",
+            'message': record['message'],
+        }
+
+        if record['extra']:
+            entry['extra'] = record['extra']
+
+        exception = record['exception']
+        if exception is not None:
+            entry['exception'] = ''.join(
+                traceback.format_exception(exception.type, exception.value, exception.traceback)
+            )
+
+        return json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+
+    def format_notice(self, level: str, source: str, message: str) -> bytes:
+        """
+        Служебная строка без записи loguru (например, о потерях при перегрузке).
+
+        Args:
+            level: Уровень
+            source: Источник в виде "module:function"
+            message: Сообщение
+
+        Returns:
+            bytes: Закодированная строка в формате файлов
+        """
+        moment = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        if self.output_format == 'jsonl':
+            line = json.dumps({'time': moment, 'level': level, 'source': f"{source}:0",
+                               'message': message}, ensure_ascii=False) + '\n'
+        else:
+            line = f"{moment} | {level} | {source}:0 | {message}\n"
+        return line.encode('utf-8')
+
+    def write(self, message) -> None:
+        """
+        Обработка сообщения loguru.
+
+        Args:
+            message: Отформатированное сообщение с атрибутом record
+        """
+        record = message.record
+        routes = record.get(self.RECORD_KEY)
+        if routes is None:
+            routes = self.select_routes(record)
+
+        if self.output_format == 'jsonl':
+            line = self.format_json(record)
+        else:
+            line = self.format_text(record, message)
+
+        self.write_encoded(record['level'].no, record['level'].name, routes, line.encode('utf-8'))
+
+    def write_raw(self, name: str, level_no: int, level_name: str, line: str) -> None:
+        """
+        Запись готовой строки в отдельный файл без записи loguru.
+
+        Args:
+            name: Имя файла из raw_writers
+            level_no: Номер уровня (для политики перегрузки)
+            level_name: Имя уровня
+            line: Строка с переводом строки в конце
+        """
+        self.write_encoded(level_no, level_name, (name,), line.encode('utf-8'))
+
+    def write_encoded(self, level_no: int, level_name: str, routes: Tuple[str, ...], data: bytes) -> None:
+        """
+        Запись закодированной строки в файлы маршрутов.
+
+        Args:
+            level_no: Номер уровня (для политики перегрузки)
+            level_name: Имя уровня
+            routes: Имена маршрутов или файлов из raw_writers
+            data: Закодированная строка
+        """
+        if self.async_writer is not None:
+            self.async_writer.submit(level_no, level_name, routes, data)
+            return
+
+        # write_raw вызывается из потоков запросов в обход блокировки sink loguru
+        with self._raw_lock:
+            for name in routes:
+                route = self.routes.get(name)
+                writer = route.writer if route is not None else self.raw_writers[name]
+                writer.write(data)
+                writer.flush()
+
+    def stop(self) -> None:
+        """Закрытие всех файлов (вызывается loguru при удалении sink)."""
+        if self.async_writer is not None:
+            self.async_writer.stop()
+        writers = [route.writer for route in self.routes.values()] + list(self.raw_writers.values())
+        for writer in writers:
+            writer.close()
+        # Дожидаемся сжатия уже ротированных файлов
+        for compressor in {writer.compressor for writer in writers if writer.compressor is not None}:
+            compressor.stop()
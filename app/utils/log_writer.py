@@ -0,0 +1,183 @@
+"""
+Асинхронная запись логов в файлы.
+Ограниченная очередь, отдельный поток записи пачками и политика сброса при перегрузке.
+"""
+
+import sys
+import threading
+from collections import deque, Counter
+from typing import Dict, Any, Iterable, Tuple, Callable
+
+# Номера стандартных уровней loguru
+WARNING_LEVEL_NO = 30
+ERROR_LEVEL_NO = 40
+
+# Политики при переполнении очереди
+OVERLOAD_POLICIES = ('drop', 'block')
+
+
+class AsyncLogWriter:
+    """
+    Фоновая запись строк логов в RotatingFileWriter.
+
+    Поток запроса только кладет строку в очередь; запись на диск, flush
+    и ротация выполняются в отдельном потоке пачками.
+
+    Политика 'drop' при перегрузке:
+    - очередь заполнена на high_watermark и больше - отбрасываются DEBUG/INFO;
+    - очередь заполнена полностью - отбрасывается все, кроме защищенных записей;
+    - защищенные записи (ERROR+ и категории protected_routes) не отбрасываются
+      никогда: они занимают резерв сверх max_queue, а при его исчерпании
+      вызывающий поток ждет освобождения места.
+
+    Политика 'block' никогда не отбрасывает записи и ждет места в очереди.
+    """
+
+    def __init__(self, writers: Dict[str, Any], format_notice: Callable[[str, str, str], bytes],
+                 max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 0.5, overload_policy: str = 'drop',
+                 high_watermark: float = 0.8, protected_routes: Iterable[str] = ('security', 'errors')):
+        """
+        Инициализация писателя.
+
+        Args:
+            writers: Файлы по имени маршрута (RotatingFileWriter)
+            format_notice: Построение служебной строки (уровень, источник, сообщение)
+            max_queue: Максимальный размер очереди
+            batch_size: Размер пачки, при котором поток записи просыпается досрочно
+            flush_interval: Максимальная задержка записи в секундах
+            overload_policy: 'drop' или 'block'
+            high_watermark: Доля заполнения очереди, с которой отбрасываются DEBUG/INFO
+            protected_routes: Маршруты, записи которых не отбрасываются
+        """
+        if overload_policy not in OVERLOAD_POLICIES:
+            raise ValueError(f"Неизвестная политика перегрузки: {overload_policy}")
+
+        self.writers = writers
+        self.format_notice = format_notice
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overload_policy = overload_policy
+        self.soft_limit = int(max_queue * high_watermark)
+        self.hard_limit = max_queue + max(max_queue // 4, 1)  # Резерв для защищенных записей
+        self.protected_routes = frozenset(protected_routes)
+
+        self.dropped = Counter()
+        self._reported_dropped = 0
+
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._has_items = threading.Condition(self._lock)
+        self._has_space = threading.Condition(self._lock)
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def is_protected(self, level_no: int, routes: Tuple[str, ...]) -> bool:
+        """Запись, которую нельзя отбрасывать."""
+        return level_no >= ERROR_LEVEL_NO or not self.protected_routes.isdisjoint(routes)
+
+    def submit(self, level_no: int, level_name: str, routes: Tuple[str, ...], data: bytes) -> bool:
+        """
+        Постановка строки в очередь записи.
+
+        Args:
+            level_no: Номер уровня записи
+            level_name: Имя уровня (для счетчика отброшенных)
+            routes: Имена маршрутов
+            data: Закодированная строка
+
+        Returns:
+            bool: False если запись отброшена
+        """
+        with self._lock:
+            size = len(self._queue)
+
+            if size >= self.soft_limit:
+                protected = self.is_protected(level_no, routes)
+                if self.overload_policy == 'block' or protected:
+                    limit = self.hard_limit if protected else self.max_queue
+                    while len(self._queue) >= limit and not self._stopped:
+                        self._has_items.notify()
+                        self._has_space.wait(self.flush_interval)
+                elif level_no < WARNING_LEVEL_NO or size >= self.max_queue:
+                    self.dropped[level_name] += 1
+                    return False
+
+            self._queue.append((routes, data))
+            if len(self._queue) >= self.batch_size:
+                self._has_items.notify()
+        return True
+
+    def _run(self) -> None:
+        """Цикл потока записи."""
+        while True:
+            with self._lock:
+                if not self._queue and not self._stopped:
+                    self._has_items.wait(self.flush_interval)
+                batch = self._queue
+                self._queue = deque()
+                dropped = dict(self.dropped)
+                stopped = self._stopped
+                self._has_space.notify_all()
+
+            if batch:
+                try:
+                    self._write_batch(batch, dropped)
+                except Exception as e:
+                    # Поток записи не должен умирать: иначе очередь заполнится навсегда
+                    sys.stderr.write(f"Ошибка записи логов: {e!r}\n")
+
+            if stopped:
+                return
+
+    def _write_batch(self, batch: deque, dropped: Dict[str, int]) -> None:
+        """Запись пачки строк с одним flush на файл."""
+        touched = set()
+        for routes, data in batch:
+            for name in routes:
+                writer = self.writers[name]
+                writer.write(data)
+                touched.add(writer)
+
+        total_dropped = sum(dropped.values())
+        if total_dropped != self._reported_dropped and 'app' in self.writers:
+            # Сообщаем о потерях прямо в app.log, минуя очередь
+            message = (f"LOGGING queue overload, dropped {total_dropped - self._reported_dropped} records "
+                       f"(total by level: {dropped})")
+            self._reported_dropped = total_dropped
+            writer = self.writers['app']
+            writer.write(self.format_notice('WARNING', 'app.utils.log_writer:_write_batch', message))
+            touched.add(writer)
+
+        for writer in touched:
+            writer.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Состояние очереди.
+
+        Returns:
+            Dict[str, Any]: Размер очереди и количество отброшенных записей по уровням
+        """
+        with self._lock:
+            return {
+                'queued': len(self._queue),
+                'max_queue': self.max_queue,
+                'dropped': dict(self.dropped),
+            }
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Остановка потока с записью оставшихся строк.
+
+        Args:
+            timeout: Максимальное время ожидания потока
+        """
+        with self._lock:
+            self._stopped = True
+            self._has_items.notify()
+            self._has_space.notify_all()
+        self._thread.join(timeout)
@@ -5,13 +5,18 @@
 
 import os
 import sys
+import hashlib
 import logging
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 from loguru import logger
 from flask import Flask, request, g, has_request_context
 from datetime import datetime
 import json
 
+from .log_router import LogRouter, LogRoute, RotatingFileWriter, DATABASE_LOGGERS, format_access_line
+from .log_compressor import LogCompressor
+
 
 class LoggerConfig:
     """Конфигурация логирования."""
@@ -35,13 +40,6 @@ class LoggerConfig:
         "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level} | {name}:{function}:{line} | {message}"
     )
     
-    # Размеры ротации логов
-    DEFAULT_ROTATION = "10 MB"
-    LARGE_ROTATION = "50 MB"
-    
-    # Время хранения логов
-    RETENTION = "30 days"
-    
     # Уровни логирования для разных окружений
     LEVELS = {
         'development': 'DEBUG',
@@ -50,6 +48,45 @@ class LoggerConfig:
     }
 
 
+# Минимальный уровень, который принимает хотя бы один sink (0 - до настройки логирования)
+_min_level_no = 0
+
+# Имя файла access.log среди raw_writers маршрутизатора
+ACCESS_LOG_NAME = 'access'
+
+# Маршрутизатор, пишущий access.log в обход loguru (None - access.log выключен)
+_access_router = None
+
+
+@lru_cache(maxsize=None)
+def get_level_no(level: str) -> int:
+    """
+    Номер уровня loguru по имени (с кешированием).
+    
+    Args:
+        level: Имя уровня (DEBUG, INFO, ...)
+        
+    Returns:
+        int: Номер уровня
+    """
+    return logger.level(level).no
+
+
+def is_level_enabled(level: str) -> bool:
+    """
+    Проверка, будет ли запись уровня level принята хотя бы одним sink.
+    
+    Позволяет не собирать данные для записей, которые все равно будут отброшены.
+    
+    Args:
+        level: Имя уровня
+        
+    Returns:
+        bool: True если запись будет записана
+    """
+    return get_level_no(level) >= _min_level_no
+
+
 def create_log_directory():
     """Создание директории для логов."""
     if not os.path.exists(LoggerConfig.LOG_DIR):
@@ -81,6 +118,25 @@ def get_request_context() -> Dict[str, Any]:
     return context
 
 
+def get_route_label() -> str:
+    """
+    Шаблон маршрута текущего запроса (без значений параметров).
+    
+    JWT секрет в префиксе админки заменяется на <jwt>, чтобы не попасть в логи и метрики.
+    
+    Returns:
+        str: Шаблон маршрута или 'unmatched'
+    """
+    if not has_request_context() or request.url_rule is None:
+        return 'unmatched'
+    
+    rule = request.url_rule.rule
+    blueprint = request.blueprint or ''
+    if blueprint.startswith('admin_'):
+        rule = rule.replace(blueprint[len('admin_'):], '<jwt>')
+    return rule
+
+
 def format_log_record(record):
     """Форматирование записи лога с дополнительным контекстом."""
     # Добавляем контекст запроса
@@ -91,27 +147,101 @@ def format_log_record(record):
     return record
 
 
+# Модули-обертки над stdlib logging, которые не считаются источником записи
+LOGGING_WRAPPER_MODULES = frozenset(('sqlalchemy.log',))
+
+
 class LogInterceptHandler(logging.Handler):
-    """Перехватчик стандартных Python логов для loguru."""
+    """
+    Перехватчик стандартных Python логов для loguru.
+    
+    Уровни stdlib логгеров выставляются по уровням sink в setup_logging,
+    поэтому записи, которые никто не запишет, не создаются вовсе.
+    """
+    
+    def __init__(self, level: int = logging.NOTSET):
+        super().__init__(level)
+        # Соответствие номера уровня stdlib уровню loguru
+        self._levels: Dict[int, Any] = {}
+    
+    def get_level(self, record: logging.LogRecord) -> Any:
+        """Уровень loguru для записи stdlib (с кешированием)."""
+        level = self._levels.get(record.levelno)
+        if level is None:
+            try:
+                level = logger.level(record.levelname).name
+            except ValueError:
+                level = record.levelno
+            self._levels[record.levelno] = level
+        return level
     
     def emit(self, record):
-        # Получаем соответствующий уровень loguru
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
-
-        # Находим caller frame
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
+        level = self.get_level(record)
+
+        # Находим код, вызвавший stdlib logger: пропускаем emit, кадры модуля logging
+        # и обертки библиотек над ним
+        frame, depth = sys._getframe(), 0
+        while frame and (depth == 0 or frame.f_code.co_filename == logging.__file__
+                         or frame.f_globals.get('__name__') in LOGGING_WRAPPER_MODULES):
             frame = frame.f_back
             depth += 1
 
-        logger.opt(depth=depth, exception=record.exc_info).log(
+        logger.opt(depth=depth, exception=record.exc_info).bind(logger_name=record.name).log(
             level, record.getMessage()
         )
 
 
+def build_file_routes(logging_config: Any, include_access: bool = False
+                      ) -> Tuple[List[LogRoute], Dict[str, RotatingFileWriter]]:
+    """
+    Файлы логов по таблице LOG_FILES окружения.
+    
+    Каждая запись таблицы - файл logs/<имя>.log со своим уровнем, ротацией и
+    сроком хранения; файлов, которых нет в таблице, окружение не пишет.
+    Файлы открываются при первой записи, поэтому неиспользуемые маршруты
+    не создают пустых файлов.
+    
+    Args:
+        logging_config: Конфигурация логирования окружения
+        include_access: Добавить access.log (записи в обход loguru)
+        
+    Returns:
+        Tuple[List[LogRoute], Dict[str, RotatingFileWriter]]: Маршруты LogRouter и файлы для write_raw
+    """
+    # Ротированные файлы сжимаются в фоне, а не в потоке, который вызвал ротацию
+    compressor = None
+    if logging_config.COMPRESSION['method']:
+        compressor = LogCompressor(
+            logging_config.COMPRESSION['method'],
+            level=logging_config.COMPRESSION['level'],
+            max_concurrent=logging_config.COMPRESSION['max_concurrent']
+        )
+    
+    def create_writer(name: str, settings: Dict[str, Any]) -> RotatingFileWriter:
+        return RotatingFileWriter(
+            os.path.join(LoggerConfig.LOG_DIR, f"{name}.log"),
+            rotation=settings.get('rotation', logging_config.DEFAULT_ROTATION),
+            retention=settings.get('retention', logging_config.DEFAULT_RETENTION),
+            compressor=compressor
+        )
+    
+    # Один sink: запись классифицируется один раз и пишется только в свои файлы
+    routes = [
+        LogRoute(name, create_writer(name, settings), settings.get('level', logging_config.DEFAULT_LEVEL))
+        for name, settings in logging_config.LOG_FILES.items()
+        if name != ACCESS_LOG_NAME
+    ]
+    
+    # Компактные записи о запросах с фиксированными колонками
+    raw_writers = {}
+    if include_access:
+        raw_writers[ACCESS_LOG_NAME] = create_writer(
+            ACCESS_LOG_NAME, logging_config.LOG_FILES.get(ACCESS_LOG_NAME, {})
+        )
+    
+    return routes, raw_writers
+
+
 def setup_logging(app: Flask) -> None:
     """
     Настройка комплексной системы логирования.
@@ -119,6 +249,7 @@ def setup_logging(app: Flask) -> None:
     Args:
         app: Flask приложение
     """
+    global _min_level_no, _access_router
     create_log_directory()
     
     # Получаем конфигурацию логирования
@@ -146,107 +277,49 @@ def setup_logging(app: Flask) -> None:
             enqueue=logging_config.ENQUEUE
         )
     
-    # === ОСНОВНОЙ ЛОГ ПРИЛОЖЕНИЯ ===
-    logger.add(
-        os.path.join(LoggerConfig.LOG_DIR, "app.log"),
-        format=LoggerConfig.JSON_FORMAT,
-        level=log_level,
-        rotation=LoggerConfig.DEFAULT_ROTATION,
-        retention=LoggerConfig.RETENTION,
-        compression="gz",
-        backtrace=True,
-        diagnose=True,
-        serialize=False
+    # === ФАЙЛЫ ЛОГОВ ===
+    routes, raw_writers = build_file_routes(
+        logging_config,
+        include_access=logging_config.ACCESS_LOG['enabled'] and logging_config.ACCESS_LOG['fast_path']
     )
     
-    # === ОШИБКИ И ИСКЛЮЧЕНИЯ ===
-    logger.add(
-        os.path.join(LoggerConfig.LOG_DIR, "errors.log"),
-        format=LoggerConfig.JSON_FORMAT,
-        level="ERROR",
-        rotation=LoggerConfig.DEFAULT_ROTATION,
-        retention=LoggerConfig.RETENTION,
-        compression="gz",
-        backtrace=True,
-        diagnose=True,
-        filter=lambda record: record["level"].name in ["ERROR", "CRITICAL"]
+    async_options = {key: value for key, value in logging_config.ASYNC_WRITER.items() if key != 'enabled'}
+    router = LogRouter(
+        routes,
+        output_format=logging_config.FILE_FORMAT,
+        async_options=async_options if logging_config.ASYNC_WRITER['enabled'] else None,
+        raw_writers=raw_writers,
+        aggregator_socket=logging_config.AGGREGATOR['socket']
     )
-    
-    # === HTTP ЗАПРОСЫ ===
+    _access_router = router if raw_writers else None
+    # backtrace/diagnose окружения: трассировка с значениями переменных форматируется
+    # при каждом исключении и в продакшене отключена. Очередь loguru нужна, только
+    # если у маршрутизатора нет своей фоновой записи
     logger.add(
-        os.path.join(LoggerConfig.LOG_DIR, "requests.log"),
-        format=LoggerConfig.JSON_FORMAT,
-        level="INFO",
-        rotation=LoggerConfig.LARGE_ROTATION,
-        retention=LoggerConfig.RETENTION,
-        compression="gz",
-        filter=lambda record: "REQUEST" in record["message"] or "RESPONSE" in record["message"]
+        router,
+        format="{message}",  # Префикс LoggerConfig.JSON_FORMAT добавляет LogRouter
+        level=router.min_level_no,
+        filter=router.filter,
+        backtrace=logging_config.BACKTRACE,
+        diagnose=logging_config.DIAGNOSE,
+        enqueue=logging_config.ENQUEUE and router.async_writer is None
     )
     
-    # === БЕЗОПАСНОСТЬ ===
-    logger.add(
-        os.path.join(LoggerConfig.LOG_DIR, "security.log"),
-        format=LoggerConfig.JSON_FORMAT,
-        level="WARNING",
-        rotation=LoggerConfig.DEFAULT_ROTATION,
-        retention="90 days",  # Дольше храним логи безопасности
-        compression="gz",
-        filter=lambda record: any(keyword in record["message"].upper() for keyword in 
-                                ["AUTH", "LOGIN", "LOGOUT", "SECURITY", "ADMIN", "JWT", "UNAUTHORIZED", "FORBIDDEN"])
-    )
+    console_level_no = get_level_no(logging_config.CONSOLE['level']) if logging_config.CONSOLE['enabled'] else None
     
-    # === АДМИНКА ===
-    logger.add(
-        os.path.join(LoggerConfig.LOG_DIR, "admin.log"),
-        format=LoggerConfig.JSON_FORMAT,
-        level="INFO",
-        rotation=LoggerConfig.DEFAULT_ROTATION,
-        retention=LoggerConfig.RETENTION,
-        compression="gz",
-        filter=lambda record: "admin" in record["name"] or "ADMIN" in record["message"]
-    )
-    
-    # === БАЗА ДАННЫХ ===
-    if app.config.get('SQLALCHEMY_ECHO') or app.config.get('DEBUG'):
-        logger.add(
-            os.path.join(LoggerConfig.LOG_DIR, "database.log"),
-            format=LoggerConfig.JSON_FORMAT,
-            level="DEBUG",
-            rotation=LoggerConfig.LARGE_ROTATION,
-            retention="7 days",  # БД логи быстро накапливаются
-            compression="gz",
-            filter=lambda record: any(keyword in record["name"] for keyword in 
-                                    ["sqlalchemy", "database", "db"])
-        )
+    def sink_level_no(categories=None) -> int:
+        """Минимальный уровень, который примет хотя бы один sink."""
+        if console_level_no is None:
+            return router.min_level_for(categories)
+        return min(router.min_level_for(categories), console_level_no)
     
-    # === ФАЙЛОВЫЕ ОПЕРАЦИИ ===
-    logger.add(
-        os.path.join(LoggerConfig.LOG_DIR, "files.log"),
-        format=LoggerConfig.JSON_FORMAT,
-        level="INFO",
-        rotation=LoggerConfig.DEFAULT_ROTATION,
-        retention=LoggerConfig.RETENTION,
-        compression="gz",
-        filter=lambda record: any(keyword in record["message"].upper() for keyword in 
-                                ["UPLOAD", "DOWNLOAD", "FILE", "IMAGE", "DELETE"])
-    )
-    
-    # === ПРОИЗВОДИТЕЛЬНОСТЬ ===
-    logger.add(
-        os.path.join(LoggerConfig.LOG_DIR, "performance.log"),
-        format=LoggerConfig.JSON_FORMAT,
-        level="INFO",
-        rotation=LoggerConfig.DEFAULT_ROTATION,
-        retention="14 days",
-        compression="gz",
-        filter=lambda record: any(keyword in record["message"].upper() for keyword in 
-                                ["SLOW", "PERFORMANCE", "TIME", "DURATION", "LATENCY"])
-    )
+    _min_level_no = sink_level_no()
     
     # Перехватываем стандартные Python логи
-    intercept_handler = LogInterceptHandler()
+    intercept_handler = LogInterceptHandler(_min_level_no)
     
-    # Настраиваем перехват для основных логгеров
+    # Настраиваем перехват для основных логгеров. Уровни берутся из sink:
+    # без файла database.log записи SQLAlchemy ниже уровня app.log не создаются
     loggers_to_intercept = [
         "werkzeug",
         "sqlalchemy.engine",
@@ -256,15 +329,24 @@ def setup_logging(app: Flask) -> None:
     ]
     
     for logger_name in loggers_to_intercept:
+        categories = frozenset(('database',)) if logger_name.startswith(DATABASE_LOGGERS) else None
         logging.getLogger(logger_name).handlers = [intercept_handler]
-        logging.getLogger(logger_name).setLevel(logging.DEBUG)
+        logging.getLogger(logger_name).setLevel(sink_level_no(categories))
+        logging.getLogger(logger_name).propagate = False  # Иначе корневой logger запишет повторно
     
     # Настраиваем корневой logger
-    logging.basicConfig(handlers=[intercept_handler], level=0, force=True)
+    logging.basicConfig(handlers=[intercept_handler], level=_min_level_no, force=True)
     
     logger.info(f"Система логирования настроена для окружения: {config_name}")
     logger.info(f"Уровень логирования: {log_level}")
+    # Имена файлов совпадают с ключевыми словами категорий: запись только в app.log
+    logger.bind(name='app').info(
+        f"Файлы логов: {', '.join(f'{route.name}.log>={route.level}' for route in routes)}, "
+        f"формат: {logging_config.FILE_FORMAT}"
+    )
     logger.info(f"Директория логов: {os.path.abspath(LoggerConfig.LOG_DIR)}")
+    if logging_config.AGGREGATOR['socket']:
+        logger.info(f"Файлы логов пишет агрегатор: {logging_config.AGGREGATOR['socket']}")
 
 
 def get_logger(name: str = None):
@@ -282,7 +364,8 @@ def get_logger(name: str = None):
     return logger
 
 
-def log_request(response_status: int = None, response_size: int = None, duration: float = None):
+def log_request(response_status: int = None, response_size: int = None, duration: float = None,
+                sample_rate: int = None, context: Dict[str, Any] = None):
     """
     Логирование HTTP запроса.
     
@@ -290,11 +373,18 @@ def log_request(response_status: int = None, response_size: int = None, duration
         response_status: HTTP статус ответа
         response_size: Размер ответа в байтах
         duration: Длительность обработки запроса в секундах
+        sample_rate: Вес записи при выборочном логировании (1 из N)
+        context: Контекст запроса, сохраненный заранее (для потоковых ответов,
+            которые логируются после завершения запроса)
     """
-    if not has_request_context():
+    level = request_log_level(response_status)
+    if not is_level_enabled(level):
         return
     
-    context = get_request_context()
+    if context is None:
+        if not has_request_context():
+            return
+        context = get_request_context()
     
     log_data = {
         "type": "REQUEST",
@@ -304,6 +394,9 @@ def log_request(response_status: int = None, response_size: int = None, duration
         "user_agent": context.get("user_agent", "")[:200],  # Ограничиваем размер
     }
     
+    if context.get("request_id"):
+        log_data["request_id"] = context["request_id"]
+    
     if response_status:
         log_data["status"] = response_status
     if response_size:
@@ -312,6 +405,8 @@ def log_request(response_status: int = None, response_size: int = None, duration
         log_data["duration"] = round(duration, 3)
         if duration > 1.0:  # Медленные запросы
             log_data["slow"] = True
+    if sample_rate:
+        log_data["sample_rate"] = sample_rate
     
     # Форматируем сообщение
     message = f"REQUEST {log_data['method']} {log_data['path']} from {log_data['remote_addr']}"
@@ -319,17 +414,95 @@ def log_request(response_status: int = None, response_size: int = None, duration
         message += f" -> {response_status}"
     if duration:
         message += f" ({duration:.3f}s)"
+    if sample_rate and sample_rate > 1:
+        message += f" sample:1/{sample_rate}"
     
     # Используем bind для передачи дополнительных данных
-    request_logger = get_logger('requests').bind(**log_data)
+    get_logger('requests').bind(**log_data).log(level, message)
+
+
+@lru_cache(maxsize=1024)
+def hash_user_agent(user_agent: str) -> str:
+    """
+    Короткий хеш User-Agent для access log.
     
-    # Уровень логирования в зависимости от статуса
+    Args:
+        user_agent: Заголовок User-Agent
+        
+    Returns:
+        str: 8 hex-символов
+    """
+    return hashlib.blake2b(user_agent.encode('utf-8', 'replace'), digest_size=4).hexdigest()
+
+
+def log_access(method: str, path: str, status: int, duration: float, size: int = None,
+               request_id: str = None, remote_addr: str = None, user_agent: str = None,
+               sample_rate: int = 1, phases: Dict[str, Any] = None):
+    """
+    Единственная компактная запись о запросе (режим ACCESS_LOG).
+    
+    При включенном fast_path строка пишется в access.log с фиксированными
+    колонками в обход loguru, иначе - записью REQUEST в requests.log.
+    
+    Args:
+        method: HTTP метод
+        path: Путь запроса
+        status: HTTP статус ответа
+        duration: Длительность обработки в секундах
+        size: Размер ответа в байтах
+        request_id: ID запроса
+        remote_addr: IP клиента
+        user_agent: Заголовок User-Agent
+        sample_rate: Вес записи при выборочном логировании (1 из N)
+        phases: Время фаз запроса (db_ms, db_queries, render_ms, upload_ms)
+    """
+    level = request_log_level(status)
+    phases = phases or {}
+    ua_hash = hash_user_agent(user_agent) if user_agent else None
+    
+    if _access_router is not None:
+        line = format_access_line(datetime.now(), status, duration, size, request_id,
+                                  remote_addr, ua_hash, sample_rate, phases, method, path)
+        _access_router.write_raw(ACCESS_LOG_NAME, get_level_no(level), level, line)
+        return
+    
+    if not is_level_enabled(level):
+        return
+    
+    message = f"REQUEST {method} {path} -> {status} ({duration:.3f}s)"
+    if sample_rate > 1:
+        message += f" sample:1/{sample_rate}"
+    
+    get_logger('requests').bind(
+        type="REQUEST",
+        method=method,
+        path=path,
+        status=status,
+        duration=round(duration, 3),
+        size=size,
+        request_id=request_id,
+        remote_addr=remote_addr,
+        ua_hash=ua_hash,
+        sample_rate=sample_rate,
+        **phases
+    ).log(level, message)
+
+
+def request_log_level(response_status: int = None) -> str:
+    """
+    Уровень записи о запросе в зависимости от статуса ответа.
+    
+    Args:
+        response_status: HTTP статус ответа
+        
+    Returns:
+        str: Имя уровня
+    """
     if response_status and response_status >= 500:
-        request_logger.error(message)
-    elif response_status and response_status >= 400:
-        request_logger.warning(message)
-    else:
-        request_logger.info(message)
+        return "ERROR"
+    if response_status and response_status >= 400:
+        return "WARNING"
+    return "INFO"
 
 
 def log_security_event(event_type: str, details: Dict[str, Any] = None, user_id: str = None):
@@ -341,6 +514,9 @@ def log_security_event(event_type: str, details: Dict[str, Any] = None, user_id:
         details: Дополнительные детали события
         user_id: ID пользователя
     """
+    if not is_level_enabled("WARNING"):
+        return
+    
     context = get_request_context()
     
     log_data = {
@@ -378,6 +554,9 @@ def log_admin_action(action: str, resource: str, resource_id: str = None, user_i
         user_id: ID пользователя
         details: Дополнительные детали
     """
+    if not is_level_enabled("INFO"):
+        return
+    
     context = get_request_context()
     
     log_data = {
@@ -388,6 +567,8 @@ def log_admin_action(action: str, resource: str, resource_id: str = None, user_i
         "remote_addr": context.get("remote_addr"),
     }
     
+    if context.get("request_id"):
+        log_data["request_id"] = context["request_id"]
     if resource_id:
         log_data["resource_id"] = resource_id
     if user_id:
@@ -416,6 +597,9 @@ def log_file_operation(operation: str, file_path: str, file_size: int = None, us
         user_id: ID пользователя
         details: Дополнительные детали
     """
+    if not is_level_enabled("INFO"):
+        return
+    
     context = get_request_context()
     
     log_data = {
@@ -426,6 +610,8 @@ def log_file_operation(operation: str, file_path: str, file_size: int = None, us
         "remote_addr": context.get("remote_addr"),
     }
     
+    if context.get("request_id"):
+        log_data["request_id"] = context["request_id"]
     if file_size:
         log_data["file_size"] = file_size
     if user_id:
@@ -452,6 +638,17 @@ def log_performance(operation: str, duration: float, details: Dict[str, Any] = N
         duration: Длительность в секундах
         details: Дополнительные детали
     """
+    # Уровень логирования в зависимости от времени выполнения
+    if duration > 5.0:
+        level = "ERROR"
+    elif duration > 2.0:
+        level = "WARNING"
+    else:
+        level = "INFO"
+    
+    if not is_level_enabled(level):
+        return
+    
     log_data = {
         "type": "PERFORMANCE",
         "operation": operation,
@@ -464,12 +661,4 @@ def log_performance(operation: str, duration: float, details: Dict[str, Any] = N
     
     message = f"PERFORMANCE {operation} took {duration:.3f}s"
     
-    perf_logger = get_logger('performance').bind(**log_data)
-    
-    # Уровень логирования в зависимости от времени выполнения
-    if duration > 5.0:
-        perf_logger.error(message)
-    elif duration > 2.0:
-        perf_logger.warning(message)
-    else:
-        perf_logger.info(message) 
\ No newline at end of file
+    get_logger('performance').bind(**log_data).log(level, message) 
\ No newline at end of file
@@ -0,0 +1,417 @@
+"""
+Метрики приложения в формате Prometheus.
+Счетчики, гистограммы с фиксированными корзинами и gauge; при нескольких процессах
+значения каждого воркера хранятся в своем mmap-файле и суммируются при выдаче /metrics.
+"""
+
+import os
+import re
+import json
+import mmap
+import glob
+import time
+import struct
+import threading
+from typing import Dict, Any, Optional, Tuple, List, Iterable
+
+# Типы метрик
+METRIC_TYPES = ('counter', 'gauge', 'histogram')
+
+# Корзины гистограмм длительности по умолчанию (секунды)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Время запуска процесса (для uptime в /health)
+PROCESS_START_TIME = time.time()
+
+_INITIAL_FILE_SIZE = 1024 * 1024
+_HEADER = struct.Struct('<I4x')   # Занятый размер файла
+_KEY_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_FILE_PATTERN = re.compile(r'metrics_(\d+)\.db$')
+
+
+class MmapValues:
+    """
+    Значения метрик одного процесса в mmap-файле.
+
+    Формат: заголовок с занятым размером, затем записи
+    [длина ключа][ключ, выровненный до 8 байт][double]. Пишет только
+    процесс-владелец; другие процессы читают файл при сборе метрик.
+    """
+
+    def __init__(self, path: str):
+        """
+        Открытие (или создание) файла значений.
+
+        Args:
+            path: Путь к файлу
+        """
+        self.path = path
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(_INITIAL_FILE_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self._positions: Dict[str, int] = {}
+
+        used = _HEADER.unpack_from(self._mmap, 0)[0]
+        if used == 0:
+            used = _HEADER.size
+            _HEADER.pack_into(self._mmap, 0, used)
+        for key, value, position in self.read_entries(self._mmap, used):
+            self._positions[key] = position
+        self._used = used
+
+    @staticmethod
+    def read_entries(data, used: int) -> Iterable[Tuple[str, float, int]]:
+        """
+        Разбор записей файла.
+
+        Args:
+            data: Содержимое файла (bytes или mmap)
+            used: Занятый размер из заголовка
+
+        Yields:
+            Tuple[str, float, int]: Ключ, значение, смещение значения
+        """
+        position = _HEADER.size
+        while position < used:
+            key_length = _KEY_LENGTH.unpack_from(data, position)[0]
+            key_start = position + _KEY_LENGTH.size
+            key = bytes(data[key_start:key_start + key_length]).decode('utf-8')
+            value_position = key_start + key_length + (-(_KEY_LENGTH.size + key_length) % 8)
+            yield key, _VALUE.unpack_from(data, value_position)[0], value_position
+            position = value_position + _VALUE.size
+
+    @classmethod
+    def read_file(cls, path: str) -> Dict[str, float]:
+        """
+        Чтение значений файла другого процесса.
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            Dict[str, float]: Значения по ключам
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < _HEADER.size:
+            return {}
+        used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+        return {key: value for key, value, _ in cls.read_entries(data, used)}
+
+    def _add_key(self, key: str) -> int:
+        """Добавление записи для нового ключа, возвращает смещение значения."""
+        encoded = key.encode('utf-8')
+        padding = -(_KEY_LENGTH.size + len(encoded)) % 8
+        size = _KEY_LENGTH.size + len(encoded) + padding + _VALUE.size
+
+        while self._used + size > self._capacity:
+            self._capacity *= 2
+            self._mmap.close()
+            self._file.truncate(self._capacity)
+            self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+        position = self._used
+        _KEY_LENGTH.pack_into(self._mmap, position, len(encoded))
+        self._mmap[position + _KEY_LENGTH.size:position + _KEY_LENGTH.size + len(encoded)] = encoded
+        value_position = position + _KEY_LENGTH.size + len(encoded) + padding
+        _VALUE.pack_into(self._mmap, value_position, 0.0)
+
+        # Заголовок обновляется последним: читатели не увидят недописанную запись
+        self._used += size
+        _HEADER.pack_into(self._mmap, 0, self._used)
+        self._positions[key] = value_position
+        return value_position
+
+    def add(self, key: str, amount: float) -> None:
+        """Увеличение значения."""
+        position = self._positions.get(key)
+        if position is None:
+            position = self._add_key(key)
+        _VALUE.pack_into(self._mmap, position, _VALUE.unpack_from(self._mmap, position)[0] + amount)
+
+    def set(self, key: str, value: float) -> None:
+        """Установка значения."""
+        position = self._positions.get(key)
+        if position is None:
+            position = self._add_key(key)
+        _VALUE.pack_into(self._mmap, position, value)
+
+    def close(self) -> None:
+        """Закрытие файла."""
+        self._mmap.close()
+        self._file.close()
+
+
+class MemoryValues:
+    """Значения метрик в памяти (один процесс)."""
+
+    def __init__(self):
+        self.values: Dict[str, float] = {}
+
+    def add(self, key: str, amount: float) -> None:
+        """Увеличение значения."""
+        self.values[key] = self.values.get(key, 0.0) + float(amount)
+
+    def set(self, key: str, value: float) -> None:
+        """Установка значения (как в файле, всегда float)."""
+        self.values[key] = float(value)
+
+
+def _pid_alive(pid: int) -> bool:
+    """Проверка, что процесс с таким PID существует."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик.
+
+    Без multiproc_dir значения хранятся в памяти процесса. С multiproc_dir
+    каждый воркер пишет в свой файл metrics_<pid>.db, а сбор суммирует файлы
+    всех воркеров: счетчики и гистограммы - всех, включая завершенные,
+    gauge - только живых процессов. Каталог нужно очищать перед запуском сервера.
+    """
+
+    def __init__(self, multiproc_dir: Optional[str] = None):
+        """
+        Инициализация реестра.
+
+        Args:
+            multiproc_dir: Каталог файлов воркеров; None - хранение в памяти
+        """
+        self.metrics: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._values = None
+        self._pid = None
+        self.configure(multiproc_dir)
+
+    def configure(self, multiproc_dir: Optional[str] = None) -> None:
+        """
+        Выбор хранилища значений.
+
+        Args:
+            multiproc_dir: Каталог файлов воркеров; None - хранение в памяти
+        """
+        with self._lock:
+            if isinstance(self._values, MmapValues):
+                self._values.close()
+            self.multiproc_dir = multiproc_dir
+            if multiproc_dir:
+                os.makedirs(multiproc_dir, exist_ok=True)
+            self._values = None
+            self._pid = None
+
+    def register(self, name: str, metric_type: str, description: str,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """
+        Регистрация метрики.
+
+        Args:
+            name: Имя метрики
+            metric_type: 'counter', 'gauge' или 'histogram'
+            description: Описание (HELP)
+            buckets: Верхние границы корзин гистограммы
+        """
+        if metric_type not in METRIC_TYPES:
+            raise ValueError(f"Неизвестный тип метрики: {metric_type}")
+        self.metrics[name] = {
+            'type': metric_type,
+            'help': description,
+            'buckets': tuple(sorted(buckets)) if metric_type == 'histogram' else (),
+        }
+
+    def _storage(self):
+        """Хранилище текущего процесса (после fork воркер открывает свой файл)."""
+        pid = os.getpid()
+        if self._pid != pid:
+            if self.multiproc_dir:
+                self._values = MmapValues(os.path.join(self.multiproc_dir, f'metrics_{pid}.db'))
+            else:
+                self._values = MemoryValues()
+            self._pid = pid
+        return self._values
+
+    @staticmethod
+    def _key(sample: str, labels: Optional[Dict[str, Any]]) -> str:
+        """Ключ значения: имя семпла и отсортированные метки."""
+        return json.dumps([sample, sorted((k, str(v)) for k, v in (labels or {}).items())],
+                          ensure_ascii=False, separators=(',', ':'))
+
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, amount: float = 1.0) -> None:
+        """
+        Увеличение счетчика.
+
+        Args:
+            name: Имя метрики
+            labels: Метки
+            amount: Приращение
+        """
+        with self._lock:
+            self._storage().add(self._key(name, labels), amount)
+
+    def set(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Установка значения gauge.
+
+        Args:
+            name: Имя метрики
+            value: Значение
+            labels: Метки
+        """
+        with self._lock:
+            self._storage().set(self._key(name, labels), value)
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Наблюдение для гистограммы.
+
+        В хранилище увеличивается только одна корзина (не накопительно),
+        накопительные значения считаются при выдаче.
+
+        Args:
+            name: Имя метрики
+            value: Значение
+            labels: Метки
+        """
+        buckets = self.metrics[name]['buckets']
+        bound = next((b for b in buckets if value <= b), '+Inf')
+        with self._lock:
+            storage = self._storage()
+            storage.add(self._key(f'{name}_bucket', {**(labels or {}), 'le': bound}), 1.0)
+            storage.add(self._key(f'{name}_sum', labels), value)
+            storage.add(self._key(f'{name}_count', labels), 1.0)
+
+    def _metric_name(self, sample: str) -> Optional[str]:
+        """Имя метрики по имени семпла."""
+        if sample in self.metrics:
+            return sample
+        for suffix in ('_bucket', '_sum', '_count'):
+            if sample.endswith(suffix) and sample[:-len(suffix)] in self.metrics:
+                return sample[:-len(suffix)]
+        return None
+
+    def collect(self) -> Dict[str, float]:
+        """
+        Сбор значений всех процессов.
+
+        Returns:
+            Dict[str, float]: Суммарные значения по ключам
+        """
+        if not self.multiproc_dir:
+            with self._lock:
+                return dict(self._storage().values)
+
+        # Гарантируем, что файл текущего процесса существует
+        with self._lock:
+            self._storage()
+
+        totals: Dict[str, float] = {}
+        for path in glob.glob(os.path.join(self.multiproc_dir, 'metrics_*.db')):
+            match = _FILE_PATTERN.search(path)
+            if not match:
+                continue
+            alive = None
+            try:
+                values = MmapValues.read_file(path)
+            except (OSError, struct.error, UnicodeDecodeError):
+                continue
+            for key, value in values.items():
+                metric = self.metrics.get(self._metric_name(json.loads(key)[0]))
+                if metric is None:
+                    continue
+                if metric['type'] == 'gauge':
+                    if alive is None:
+                        alive = _pid_alive(int(match.group(1)))
+                    if not alive:
+                        continue
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def render(self) -> str:
+        """
+        Метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Текст для ответа /metrics
+        """
+        samples: Dict[str, List[Tuple[str, List[Tuple[str, str]], float]]] = {}
+        for key, value in self.collect().items():
+            sample, labels = json.loads(key)
+            name = self._metric_name(sample)
+            if name is not None:
+                samples.setdefault(name, []).append((sample, labels, value))
+
+        lines = []
+        for name in sorted(samples):
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            if metric['type'] == 'histogram':
+                lines.extend(self._render_histogram(name, metric['buckets'], samples[name]))
+            else:
+                for sample, labels, value in sorted(samples[name]):
+                    lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histogram(name: str, buckets: Tuple[float, ...],
+                          samples: List[Tuple[str, List[Tuple[str, str]], float]]) -> List[str]:
+        """Строки гистограммы с накопительными корзинами."""
+        series: Dict[Tuple, Dict[str, Any]] = {}
+        for sample, labels, value in samples:
+            le = next((v for k, v in labels if k == 'le'), None)
+            base = tuple((k, v) for k, v in labels if k != 'le')
+            entry = series.setdefault(base, {'buckets': {}, 'sum': 0.0, 'count': 0.0})
+            if sample.endswith('_bucket'):
+                entry['buckets'][le] = entry['buckets'].get(le, 0.0) + value
+            elif sample.endswith('_sum'):
+                entry['sum'] = value
+            else:
+                entry['count'] = value
+
+        lines = []
+        for base in sorted(series):
+            entry = series[base]
+            cumulative = 0.0
+            for bound in [str(b) for b in buckets] + ['+Inf']:
+                cumulative += entry['buckets'].get(bound, 0.0)
+                labels = list(base) + [('le', bound)]
+                lines.append(f"{name}_bucket{_format_labels(labels)} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(base)} {_format_value(entry['sum'])}")
+            lines.append(f"{name}_count{_format_labels(base)} {_format_value(entry['count'])}")
+        return lines
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    """Метки в формате {a="1",b="2"}."""
+    parts = []
+    for key, value in labels:
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    """Число без лишнего '.0' у целых значений."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# Реестр приложения
+metrics = MetricsRegistry()
+
+metrics.register('http_requests_total', 'counter', 'Количество HTTP запросов')
+metrics.register('http_request_duration_seconds', 'histogram', 'Длительность обработки HTTP запросов')
+metrics.register('db_queries_total', 'counter', 'Количество SQL запросов')
+metrics.register('db_pool_connections', 'gauge', 'Соединения пула БД по состояниям')
+metrics.register('upload_processing_seconds', 'histogram', 'Длительность обработки загруженных изображений',
+                 buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
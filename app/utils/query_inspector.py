@@ -0,0 +1,102 @@
+"""
+Анализ SQL запросов в рамках HTTP запроса.
+Отпечатки запросов, поиск повторов (N+1) и медленных запросов, бюджеты запросов по маршрутам.
+"""
+
+import re
+from functools import lru_cache
+from collections import Counter
+from typing import Callable, Dict, List, Tuple, Any
+from flask import g, has_request_context
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PARAMETER = re.compile(r'%\(\w+\)s|%s|(?<!:):\w+|\$\d+')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Маршрут выполнил больше SQL запросов, чем объявлено в query_budget."""
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Отпечаток SQL запроса: литералы и параметры заменены на '?', списки IN свернуты.
+
+    Запросы, отличающиеся только значениями, получают одинаковый отпечаток.
+
+    Args:
+        statement: Текст SQL запроса
+
+    Returns:
+        str: Нормализованный запрос
+    """
+    normalized = _STRING_LITERAL.sub('?', statement)
+    normalized = _PARAMETER.sub('?', normalized)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _IN_LIST.sub('IN (?)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+def start_query_log() -> None:
+    """Начало сбора SQL запросов текущего HTTP запроса."""
+    g.query_log = []
+
+
+def get_request_queries() -> List[Tuple[str, float]]:
+    """
+    SQL запросы текущего HTTP запроса.
+
+    Запросы собирает замер фазы db (request_timing.record_query) после
+    start_query_log.
+
+    Returns:
+        List[Tuple[str, float]]: Отпечаток и длительность каждого запроса
+    """
+    if not has_request_context():
+        return []
+    return [(fingerprint(statement), duration) for statement, duration in g.get('query_log') or []]
+
+
+def find_repeated_queries(queries: List[Tuple[str, float]], threshold: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Повторяющиеся запросы (признак N+1).
+
+    Args:
+        queries: Отпечатки и длительности запросов
+        threshold: Минимальное количество повторов
+
+    Returns:
+        Dict[str, Dict[str, Any]]: count и total_time по отпечаткам, повторенным threshold раз и больше
+    """
+    counts = Counter()
+    total_times = Counter()
+    for query, duration in queries:
+        counts[query] += 1
+        total_times[query] += duration
+
+    return {
+        query: {'count': count, 'total_time': total_times[query]}
+        for query, count in counts.items() if count >= threshold
+    }
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Декоратор view: объявленный бюджет SQL запросов маршрута.
+
+    Превышение бюджета пишется в performance.log, а при enforce_budgets
+    (в тестах) вызывает QueryBudgetExceeded.
+
+    Args:
+        max_queries: Максимальное количество SQL запросов за HTTP запрос
+
+    Returns:
+        Callable: Декоратор
+    """
+    def decorator(view: Callable) -> Callable:
+        view.query_budget = max_queries
+        return view
+    return decorator
@@ -0,0 +1,119 @@
+"""
+Замер фаз обработки запроса.
+Время и количество операций по фазам (SQL, шаблоны, загрузки) в рамках текущего запроса.
+"""
+
+import time
+from functools import wraps
+from contextlib import contextmanager
+from typing import Dict, Tuple, Callable, Iterator
+from flask import g, has_request_context
+
+# Фазы в порядке вывода в Server-Timing и access log
+PHASES = ('db', 'render', 'upload')
+
+
+def record_phase(phase: str, duration: float) -> None:
+    """
+    Добавление времени фазы к текущему запросу.
+
+    Вне запроса (CLI, фоновые задачи) ничего не делает.
+
+    Args:
+        phase: Имя фазы из PHASES
+        duration: Длительность в секундах
+    """
+    if not has_request_context():
+        return
+
+    timings = g.get('phase_timings')
+    if timings is None:
+        timings = g.phase_timings = {}
+
+    total, count = timings.get(phase, (0.0, 0))
+    timings[phase] = (total + duration, count + 1)
+
+
+def record_query(statement: str, duration: float) -> None:
+    """
+    Учет SQL запроса: время фазы db и, если анализ запросов начат для
+    текущего запроса (g.query_log), текст запроса с длительностью.
+
+    Args:
+        statement: Текст SQL запроса
+        duration: Длительность в секундах
+    """
+    record_phase('db', duration)
+    if not has_request_context():
+        return
+
+    queries = g.get('query_log')
+    if queries is not None:
+        queries.append((statement, duration))
+
+
+def get_phase_timings() -> Dict[str, Tuple[float, int]]:
+    """
+    Фазы текущего запроса.
+
+    Returns:
+        Dict[str, Tuple[float, int]]: Суммарное время в секундах и количество операций по фазам
+    """
+    if not has_request_context():
+        return {}
+    return g.get('phase_timings') or {}
+
+
+@contextmanager
+def phase_timer(phase: str) -> Iterator[None]:
+    """
+    Замер блока кода как фазы запроса.
+
+    Args:
+        phase: Имя фазы
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - start)
+
+
+def timed_phase(phase: str) -> Callable:
+    """
+    Декоратор: время выполнения функции учитывается как фаза запроса.
+
+    Args:
+        phase: Имя фазы
+
+    Returns:
+        Callable: Декоратор
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase_timer(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def phase_log_fields(timings: Dict[str, Tuple[float, int]]) -> Dict[str, float]:
+    """
+    Поля фаз для access log.
+
+    Args:
+        timings: Результат get_phase_timings()
+
+    Returns:
+        Dict[str, float]: db_ms, db_queries, render_ms, upload_ms (только измеренные фазы)
+    """
+    fields = {}
+    if 'db' in timings:
+        fields['db_ms'] = round(timings['db'][0] * 1000, 1)
+        fields['db_queries'] = timings['db'][1]
+    if 'render' in timings:
+        fields['render_ms'] = round(timings['render'][0] * 1000, 1)
+    if 'upload' in timings:
+        fields['upload_ms'] = round(timings['upload'][0] * 1000, 1)
+    return fields
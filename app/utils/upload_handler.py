@@ -11,6 +11,7 @@ from werkzeug.utils import secure_filename
 from PIL import Image, ImageOps
 from loguru import logger
 from .logging import log_file_operation
+from .request_timing import timed_phase
 import mimetypes
 
 # Разрешенные расширения файлов
@@ -195,6 +196,7 @@ def create_thumbnail(image_path: str, thumbnail_path: str) -> bool:
         return False
 
 
+@timed_phase('upload')
 def upload_image(file: FileStorage, category: str, 
                 create_thumb: bool = True) -> Tuple[bool, str, Optional[str]]:
     """
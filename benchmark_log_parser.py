@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк разбора текстовых строк логов.
+Сравнивает быстрый разбор LogAnalyzer.parse_log_line с прежним разбором
+регулярным выражением и strptime на каждую строку.
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Callable, Optional
+
+# Добавляем корневую папку в путь
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.log_analyzer import LogAnalyzer, LogEntry
+
+
+# Фиксированный seed для воспроизводимости входных данных
+DEFAULT_SEED = 20240714
+
+# Количество строк синтетического лога
+DEFAULT_LINES = 200000
+
+# Количество повторов замера (берется лучший)
+DEFAULT_REPEATS = 5
+
+LEVELS = ['DEBUG', 'INFO', 'INFO', 'INFO', 'WARNING', 'ERROR']
+SOURCES = ['app.middleware.logging_middleware:_after_request:142', 'app.admin.views:dashboard:57',
+           'app.utils.upload:upload_image:210', 'app.api.auth:login:33']
+
+
+def generate_lines(count: int, seed: int = DEFAULT_SEED) -> List[str]:
+    """
+    Синтетические строки в формате LoggerConfig.JSON_FORMAT.
+
+    Несколько строк в миллисекунду, уровни с выравниванием старого формата,
+    сообщения с " | " и строки трассировок исключений.
+
+    Args:
+        count: Количество строк
+        seed: Seed генератора
+
+    Returns:
+        List[str]: Строки с переводом строки
+    """
+    rng = random.Random(seed)
+    moment = datetime(2026, 1, 1)
+    lines = []
+
+    for index in range(count):
+        moment += timedelta(microseconds=rng.randint(0, 5000))
+        level = rng.choice(LEVELS)
+        if index % 3 == 0:
+            level = f"{level: <8}"
+        message = f"REQUEST GET /api/projects/{index % 500} -> 200 ({rng.random():.3f}s)"
+        if index % 7 == 0:
+            message += f" | user:{index % 40}"
+        lines.append(f"{moment:%Y-%m-%d %H:%M:%S}.{moment.microsecond // 1000:03d} | {level} | "
+                     f"{rng.choice(SOURCES)} | {message}\n")
+        if index % 1000 == 0:
+            lines.append("Traceback (most recent call last):\n")
+            lines.append('  File "app/utils/upload.py", line 210, in upload_image\n')
+
+    return lines
+
+
+def read_lines(path: str) -> List[str]:
+    """Строки файла логов (в том числе архива)."""
+    analyzer = LogAnalyzer(os.path.dirname(path))
+    return list(analyzer.iter_lines(Path(path)))
+
+
+def measure(parsers: List[Callable[[str], Optional[LogEntry]]], lines: List[str], repeats: int) -> List[float]:
+    """
+    Лучшее время разбора всех строк каждой функцией.
+
+    Замеры функций чередуются, чтобы фоновая нагрузка влияла на них одинаково.
+
+    Args:
+        parsers: Функции разбора строки
+        lines: Строки
+        repeats: Количество повторов
+
+    Returns:
+        List[float]: Секунды для каждой функции
+    """
+    best = [float('inf')] * len(parsers)
+    for _ in range(repeats):
+        for index, parse in enumerate(parsers):
+            start = time.perf_counter()
+            for line in lines:
+                parse(line)
+            best[index] = min(best[index], time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(lines: List[str], repeats: int = DEFAULT_REPEATS) -> bool:
+    """
+    Сравнение разборов: совпадение результатов и строки в секунду.
+
+    Args:
+        lines: Строки лога
+        repeats: Количество повторов
+
+    Returns:
+        bool: Результаты быстрого разбора совпадают с прежним
+    """
+    analyzer = LogAnalyzer()
+
+    def parse_regex(line: str) -> Optional[LogEntry]:
+        # Прежний parse_log_line: те же проверки JSON и access.log перед регулярным выражением
+        line = line.strip()
+        if line.startswith('{') or line[10:11] == 'T':
+            return analyzer.parse_log_line(line)
+        return analyzer.parse_text_line_regex(line)
+
+    mismatches = sum(1 for line in lines if analyzer.parse_log_line(line) != parse_regex(line))
+
+    regex_time, fast_time = measure([parse_regex, analyzer.parse_log_line], lines, repeats)
+
+    print(f"Строк: {len(lines)}, повторов: {repeats}")
+    print(f"  regex + strptime: {len(lines) / regex_time:12,.0f} строк/с")
+    print(f"  быстрый разбор:   {len(lines) / fast_time:12,.0f} строк/с")
+    print(f"  ускорение:        {regex_time / fast_time:12.1f}x")
+    print(f"  расхождений:      {mismatches:12d}")
+    return mismatches == 0
+
+
+def print_help():
+    """Справка по командам."""
+    print("\nИспользование:")
+    print("  python benchmark_log_parser.py run [lines] [repeats]  - синтетический лог")
+    print("  python benchmark_log_parser.py file path [repeats]    - строки файла логов")
+
+
+def main():
+    """Главная функция."""
+    if len(sys.argv) < 2:
+        print_help()
+        return
+
+    command = sys.argv[1]
+
+    if command == "run":
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_LINES
+        repeats = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_REPEATS
+        ok = run_benchmark(generate_lines(count), repeats)
+    elif command == "file" and len(sys.argv) > 2:
+        repeats = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_REPEATS
+        ok = run_benchmark(read_lines(sys.argv[2]), repeats)
+    else:
+        print(f"❌ Неизвестная команда: {command}")
+        print_help()
+        return
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
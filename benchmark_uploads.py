@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк конвейера обработки изображений.
+Замеряет validate_image_file, optimize_image, create_thumbnail и upload_image
+на синтетических изображениях и сохраняет результаты в JSON для сравнения.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import tempfile
+import statistics
+import multiprocessing
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+# Добавляем корневую папку в путь
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import PIL
+from PIL import Image, ImageDraw
+
+
+# Версия схемы файла результатов
+RESULTS_SCHEMA_VERSION = 1
+
+# Фиксированный seed для воспроизводимости входных данных
+DEFAULT_SEED = 20240714
+
+# Количество повторов каждого замера
+DEFAULT_REPEATS = 5
+
+# Разрешения синтетических изображений
+RESOLUTIONS = [
+    (640, 480),
+    (1920, 1080),
+    (4000, 3000),
+]
+
+# Форматы: (имя, расширение, MIME тип, режим изображения)
+FORMATS = [
+    ('jpeg', 'jpg', 'image/jpeg', 'RGB'),
+    ('png_alpha', 'png', 'image/png', 'RGBA'),
+    ('gif', 'gif', 'image/gif', 'P'),
+    ('webp', 'webp', 'image/webp', 'RGB'),
+]
+
+OPERATIONS = ['validate_image_file', 'optimize_image', 'create_thumbnail', 'upload_image']
+
+
+def generate_image(width: int, height: int, mode: str, seed: int) -> Image.Image:
+    """
+    Генерация детерминированного синтетического изображения.
+
+    Градиентный фон с набором случайных фигур дает сжимаемость,
+    близкую к реальным скриншотам и фотографиям проектов.
+
+    Args:
+        width: Ширина
+        height: Высота
+        mode: Режим изображения (RGB, RGBA, P)
+        seed: Seed генератора
+
+    Returns:
+        Image.Image: Сгенерированное изображение
+    """
+    rng = random.Random(f"{seed}:{width}x{height}:{mode}")
+
+    gradient = Image.linear_gradient('L').resize((width, height))
+    img = Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT), gradient.rotate(90)))
+
+    if mode == 'RGBA':
+        img = img.convert('RGBA')
+
+    draw = ImageDraw.Draw(img)
+    for _ in range(200):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1 = min(width - 1, x0 + rng.randrange(1, max(2, width // 4)))
+        y1 = min(height - 1, y0 + rng.randrange(1, max(2, height // 4)))
+        color = tuple(rng.randrange(256) for _ in range(3))
+        if mode == 'RGBA':
+            color += (rng.randrange(256),)
+        if rng.random() < 0.5:
+            draw.rectangle((x0, y0, x1, y1), fill=color)
+        else:
+            draw.ellipse((x0, y0, x1, y1), fill=color)
+
+    if mode == 'P':
+        img = img.convert('P', palette=Image.Palette.ADAPTIVE, colors=256)
+
+    return img
+
+
+def encode_image(img: Image.Image, format_name: str) -> bytes:
+    """
+    Кодирование изображения в байты указанного формата.
+
+    Args:
+        img: Изображение
+        format_name: Имя формата из FORMATS
+
+    Returns:
+        bytes: Закодированное изображение
+    """
+    buffer = io.BytesIO()
+    if format_name == 'jpeg':
+        img.save(buffer, 'JPEG', quality=95)
+    elif format_name == 'png_alpha':
+        img.save(buffer, 'PNG')
+    elif format_name == 'gif':
+        img.save(buffer, 'GIF')
+    elif format_name == 'webp':
+        img.save(buffer, 'WEBP', quality=90)
+    return buffer.getvalue()
+
+
+def _current_peak_rss_kb() -> Optional[int]:
+    """Пиковый RSS текущего процесса в КБ (None если недоступно)."""
+    # На Linux ru_maxrss наследуется через exec от родителя, поэтому
+    # предпочитаем VmHWM, который относится только к текущему процессу
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # На macOS ru_maxrss в байтах, на Linux в килобайтах
+    if sys.platform == 'darwin':
+        peak //= 1024
+    return peak
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    """Сводка по серии замеров."""
+    return {
+        'min': round(min(values), 6),
+        'median': round(statistics.median(values), 6),
+        'max': round(max(values), 6),
+    }
+
+
+def _run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Выполнение одного замера в отдельном процессе.
+
+    Каждый случай запускается в свежем процессе, чтобы пиковый RSS
+    относился только к измеряемой операции.
+
+    Args:
+        case: Описание случая (операция, формат, разрешение, входные данные, повторы)
+
+    Returns:
+        Dict[str, Any]: Результат замера
+    """
+    from flask import Flask
+    from loguru import logger
+    from werkzeug.datastructures import FileStorage
+    from app.utils import upload_handler
+
+    # Отключаем вывод логов, чтобы не измерять запись в консоль
+    logger.remove()
+
+    operation = case['operation']
+    format_name, ext, mime_type, mode = case['format']
+    width, height = case['resolution']
+
+    data = case['data']
+
+    work_dir = tempfile.mkdtemp(prefix='upload_bench_')
+    app = Flask(__name__, static_folder=os.path.join(work_dir, 'static'))
+
+    wall_times = []
+    cpu_times = []
+    ok = True
+    output_bytes = 0
+
+    baseline_rss_kb = _current_peak_rss_kb()
+
+    try:
+        for i in range(case['repeats']):
+            source_path = os.path.join(work_dir, f"source_{i}.{ext}")
+            with open(source_path, 'wb') as f:
+                f.write(data)
+            storage = FileStorage(
+                stream=io.BytesIO(data),
+                filename=f"bench.{ext}",
+                content_type=mime_type
+            )
+
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+
+            if operation == 'validate_image_file':
+                result = upload_handler.validate_image_file(storage)[0]
+            elif operation == 'optimize_image':
+                result = upload_handler.optimize_image(source_path)
+            elif operation == 'create_thumbnail':
+                thumb_path = os.path.join(work_dir, f"thumb_{i}.jpg")
+                result = upload_handler.create_thumbnail(source_path, thumb_path)
+            else:
+                with app.app_context():
+                    result = upload_handler.upload_image(storage, 'benchmark')
+
+            cpu_times.append(time.process_time() - cpu_start)
+            wall_times.append(time.perf_counter() - wall_start)
+
+            if operation == 'validate_image_file':
+                ok = ok and result
+            elif operation == 'optimize_image':
+                ok = ok and result
+                output_bytes = os.path.getsize(source_path)
+            elif operation == 'create_thumbnail':
+                ok = ok and result
+                output_bytes = os.path.getsize(thumb_path) if result else 0
+            else:
+                success, path, thumb = result
+                ok = ok and success
+                output_bytes = 0
+                for relative in (path, thumb):
+                    if success and relative:
+                        full_path = os.path.join(app.static_folder, relative.replace('/static/', '', 1))
+                        output_bytes += os.path.getsize(full_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    peak_rss_kb = _current_peak_rss_kb()
+
+    return {
+        'operation': operation,
+        'format': format_name,
+        'resolution': f"{width}x{height}",
+        'input_bytes': len(data),
+        'output_bytes': output_bytes,
+        'ok': bool(ok),
+        'wall_s': _summary(wall_times),
+        'cpu_s': _summary(cpu_times),
+        'baseline_rss_kb': baseline_rss_kb,
+        'peak_rss_kb': peak_rss_kb,
+        'peak_rss_delta_kb': (peak_rss_kb - baseline_rss_kb
+                              if peak_rss_kb is not None and baseline_rss_kb is not None else None),
+    }
+
+
+def build_cases(repeats: int = DEFAULT_REPEATS, seed: int = DEFAULT_SEED) -> List[Dict[str, Any]]:
+    """
+    Формирование матрицы замеров.
+
+    Входные изображения генерируются здесь, в родительском процессе,
+    чтобы их синтез не попадал в пиковый RSS дочернего процесса.
+
+    Args:
+        repeats: Количество повторов каждого замера
+        seed: Seed генератора изображений
+
+    Returns:
+        List[Dict[str, Any]]: Список случаев
+    """
+    inputs = {}
+    for format_spec in FORMATS:
+        format_name, _, _, mode = format_spec
+        for width, height in RESOLUTIONS:
+            img = generate_image(width, height, mode, seed)
+            inputs[(format_name, width, height)] = encode_image(img, format_name)
+
+    return [
+        {
+            'operation': operation,
+            'format': format_spec,
+            'resolution': resolution,
+            'repeats': repeats,
+            'data': inputs[(format_spec[0],) + resolution],
+        }
+        for operation in OPERATIONS
+        for format_spec in FORMATS
+        for resolution in RESOLUTIONS
+    ]
+
+
+def run_benchmark(output_path: str, repeats: int = DEFAULT_REPEATS, seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    """
+    Запуск бенчмарка и сохранение результатов.
+
+    Args:
+        output_path: Путь к JSON файлу результатов
+        repeats: Количество повторов каждого замера
+        seed: Seed генератора изображений
+
+    Returns:
+        Dict[str, Any]: Результаты бенчмарка
+    """
+    cases = build_cases(repeats, seed)
+    results = []
+
+    # maxtasksperchild=1 - новый процесс на каждый случай для честного пикового RSS
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes=1, maxtasksperchild=1) as pool:
+        for index, result in enumerate(pool.imap(_run_case, cases), start=1):
+            results.append(result)
+            status = "ok" if result['ok'] else "FAIL"
+            print(f"[{index}/{len(cases)}] {result['operation']:<20} {result['format']:<10} "
+                  f"{result['resolution']:<10} {result['wall_s']['median'] * 1000:9.2f} ms  "
+                  f"{result['output_bytes']:>10} B  {status}")
+
+    report = {
+        'schema_version': RESULTS_SCHEMA_VERSION,
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeats': repeats,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"\nРезультаты сохранены: {output_path}")
+    return report
+
+
+def _result_key(result: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Ключ для сопоставления замеров разных запусков."""
+    return result['operation'], result['format'], result['resolution']
+
+
+def compare_results(baseline_path: str, candidate_path: str) -> List[Dict[str, Any]]:
+    """
+    Сравнение двух файлов результатов.
+
+    Args:
+        baseline_path: Базовый запуск
+        candidate_path: Новый запуск
+
+    Returns:
+        List[Dict[str, Any]]: Изменения по каждому общему замеру
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {_result_key(r): r for r in json.load(f)['results']}
+    with open(candidate_path, 'r', encoding='utf-8') as f:
+        candidate = {_result_key(r): r for r in json.load(f)['results']}
+
+    def change(old, new):
+        if not old or new is None:
+            return None
+        return round((new - old) / old * 100, 1)
+
+    rows = []
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[key], candidate[key]
+        rows.append({
+            'operation': key[0],
+            'format': key[1],
+            'resolution': key[2],
+            'wall_pct': change(old['wall_s']['median'], new['wall_s']['median']),
+            'cpu_pct': change(old['cpu_s']['median'], new['cpu_s']['median']),
+            'rss_pct': change(old['peak_rss_delta_kb'], new['peak_rss_delta_kb']),
+            'bytes_pct': change(old['output_bytes'], new['output_bytes']),
+        })
+
+    print(f"{'operation':<20} {'format':<10} {'resolution':<10} {'wall':>8} {'cpu':>8} {'rss':>8} {'bytes':>8}")
+    for row in rows:
+        cells = [f"{row[k]:+.1f}%" if row[k] is not None else "n/a"
+                 for k in ('wall_pct', 'cpu_pct', 'rss_pct', 'bytes_pct')]
+        print(f"{row['operation']:<20} {row['format']:<10} {row['resolution']:<10} "
+              + " ".join(f"{cell:>8}" for cell in cells))
+
+    return rows
+
+
+def print_help():
+    """Справка по командам."""
+    print("\nИспользование:")
+    print("  python benchmark_uploads.py run [output.json] [repeats]  - запуск бенчмарка")
+    print("  python benchmark_uploads.py compare old.json new.json    - сравнение двух запусков")
+
+
+def main():
+    """Главная функция."""
+    if len(sys.argv) < 2:
+        print_help()
+        return
+
+    command = sys.argv[1]
+
+    if command == "run":
+        output_path = sys.argv[2] if len(sys.argv) > 2 else "upload_benchmark.json"
+        repeats = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_REPEATS
+        run_benchmark(output_path, repeats)
+    elif command == "compare" and len(sys.argv) > 3:
+        compare_results(sys.argv[2], sys.argv[3])
+    else:
+        print(f"❌ Неизвестная команда: {command}")
+        print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Сборка статических файлов для продакшена.
+Сжимает PNG и JPEG без потерь, создает WebP-копии, минифицирует CSS и JS
+и записывает манифест, по которому шаблоны подставляют собранные файлы.
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+# Добавляем корневую папку в путь
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from app.utils.assets import DIST_DIR, MANIFEST_NAME, get_manifest_path
+
+# Необязательные минификаторы: если установлены, используются вместо встроенных
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static')
+
+# Каталоги static/, которые не участвуют в сборке (пользовательские загрузки и результат сборки)
+SKIP_DIRS = {'uploads', DIST_DIR}
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+CSS_EXTENSIONS = {'.css'}
+JS_EXTENSIONS = {'.js'}
+
+# Длина хеша содержимого в имени собранного файла
+HASH_LENGTH = 10
+
+# Качество WebP-копий для JPEG (PNG конвертируется без потерь)
+WEBP_QUALITY = 85
+
+
+def content_hash(data: bytes) -> str:
+    """Короткий хеш содержимого для имени файла."""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def minify_css(source: str) -> str:
+    """
+    Минификация CSS.
+
+    Встроенный вариант удаляет комментарии и лишние пробелы, не трогая строки.
+    Пробел перед ':' сохраняется, так как в селекторах он значим.
+
+    Args:
+        source: Исходный CSS
+
+    Returns:
+        str: Минифицированный CSS
+    """
+    if rcssmin is not None:
+        return rcssmin.cssmin(source)
+
+    out = []
+    i, n = 0, len(source)
+    while i < n:
+        ch = source[i]
+        if ch in '"\'':
+            end = i + 1
+            while end < n and source[end] != ch:
+                end += 2 if source[end] == '\\' else 1
+            out.append(source[i:end + 1])
+            i = end + 1
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif ch.isspace():
+            while i < n and source[i].isspace():
+                i += 1
+            out.append(' ')
+        else:
+            out.append(ch)
+            i += 1
+
+    css = ''.join(out)
+    # Пробелы вокруг разделителей вне строк
+    parts = re.split(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', css)
+    for index in range(0, len(parts), 2):
+        chunk = re.sub(r'\s*([{};,>])\s*', r'\1', parts[index])
+        chunk = re.sub(r':\s+', ':', chunk)
+        parts[index] = chunk.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+# Токены, после которых '/' начинает регулярное выражение, а не деление
+_JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_JS_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'do', 'else'}
+
+
+def minify_js(source: str) -> str:
+    """
+    Минификация JavaScript.
+
+    Встроенный вариант консервативен: удаляет комментарии, отступы и пустые
+    строки, но сохраняет переводы строк, чтобы не ломать автоматическую
+    расстановку точек с запятой. Строки, шаблоны и регулярные выражения
+    не изменяются.
+
+    Args:
+        source: Исходный JS
+
+    Returns:
+        str: Минифицированный JS
+    """
+    if rjsmin is not None:
+        return rjsmin.jsmin(source)
+
+    out = []
+    i, n = 0, len(source)
+    last_significant = ''
+    last_word = ''
+    while i < n:
+        ch = source[i]
+        if ch in '"\'`':
+            end = i + 1
+            while end < n and source[end] != ch:
+                end += 2 if source[end] == '\\' else 1
+            out.append(source[i:end + 1])
+            i = end + 1
+            last_significant, last_word = ch, ''
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            out.append(' ')
+        elif ch == '/' and (last_significant in _JS_REGEX_PRECEDERS or last_significant == ''
+                            or last_word in _JS_REGEX_KEYWORDS):
+            end, in_class = i + 1, False
+            while end < n and source[end] != '\n':
+                if source[end] == '\\':
+                    end += 2
+                    continue
+                if source[end] == '[':
+                    in_class = True
+                elif source[end] == ']':
+                    in_class = False
+                elif source[end] == '/' and not in_class:
+                    break
+                end += 1
+            out.append(source[i:end + 1])
+            i = end + 1
+            last_significant, last_word = '/', ''
+        else:
+            out.append(ch)
+            if not ch.isspace():
+                if ch.isalnum() or ch in '_$':
+                    previous = source[i - 1] if i else ''
+                    last_word = last_word + ch if previous.isalnum() or previous in ('_', '$') else ch
+                else:
+                    last_word = ''
+                last_significant = ch
+            i += 1
+
+    lines = (line.strip() for line in ''.join(out).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def recompress_png(data: bytes) -> bytes:
+    """Пересжатие PNG без потерь (пиксели не меняются)."""
+    with Image.open(io.BytesIO(data)) as img:
+        buffer = io.BytesIO()
+        img.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def recompress_jpeg(data: bytes) -> bytes:
+    """
+    Пересжатие JPEG без потерь через jpegtran.
+
+    Перекодирование JPEG средствами Pillow вносит потери, поэтому без
+    jpegtran файл остается как есть.
+    """
+    jpegtran = shutil.which('jpegtran')
+    if not jpegtran:
+        return data
+
+    result = subprocess.run(
+        [jpegtran, '-copy', 'none', '-optimize', '-progressive'],
+        input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+    )
+    return result.stdout if result.returncode == 0 and result.stdout else data
+
+
+def make_webp(data: bytes, lossless: bool) -> bytes:
+    """Создание WebP-копии изображения."""
+    with Image.open(io.BytesIO(data)) as img:
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+        buffer = io.BytesIO()
+        if lossless:
+            img.save(buffer, 'WEBP', lossless=True, method=6)
+        else:
+            img.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+    return buffer.getvalue()
+
+
+def _write_hashed(relative_path: str, data: bytes, ext: Optional[str] = None) -> str:
+    """
+    Запись собранного файла с хешем содержимого в имени.
+
+    Args:
+        relative_path: Исходный путь относительно static/
+        data: Содержимое
+        ext: Расширение результата (по умолчанию исходное)
+
+    Returns:
+        str: Путь результата относительно static/
+    """
+    base, source_ext = os.path.splitext(relative_path)
+    hashed = f"{base}.{content_hash(data)}{ext or source_ext}"
+    output_relative = f"{DIST_DIR}/{hashed}"
+    output_path = os.path.join(STATIC_FOLDER, DIST_DIR, hashed)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return output_relative
+
+
+def build_asset(relative_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Сборка одного файла.
+
+    Args:
+        relative_path: Путь относительно static/ (через '/')
+
+    Returns:
+        Optional[Dict[str, Any]]: Запись манифеста или None, если тип не обрабатывается
+    """
+    source_path = os.path.join(STATIC_FOLDER, relative_path)
+    ext = os.path.splitext(relative_path)[1].lower()
+
+    with open(source_path, 'rb') as f:
+        original = f.read()
+
+    entry: Dict[str, Any] = {'original_size': len(original)}
+
+    if ext in IMAGE_EXTENSIONS:
+        optimized = recompress_png(original) if ext == '.png' else recompress_jpeg(original)
+        if len(optimized) >= len(original):
+            optimized = original
+
+        webp = make_webp(original, lossless=(ext == '.png'))
+        if len(webp) < len(optimized):
+            entry['webp'] = _write_hashed(relative_path, webp, '.webp')
+            entry['webp_size'] = len(webp)
+    elif ext in CSS_EXTENSIONS:
+        optimized = minify_css(original.decode('utf-8')).encode('utf-8')
+    elif ext in JS_EXTENSIONS:
+        optimized = minify_js(original.decode('utf-8')).encode('utf-8')
+    else:
+        return None
+
+    entry['file'] = _write_hashed(relative_path, optimized)
+    entry['size'] = len(optimized)
+    return entry
+
+
+def build_assets() -> Dict[str, Any]:
+    """
+    Сборка всех статических файлов и запись манифеста.
+
+    Returns:
+        Dict[str, Any]: Манифест
+    """
+    dist_path = os.path.join(STATIC_FOLDER, DIST_DIR)
+    if os.path.exists(dist_path):
+        shutil.rmtree(dist_path)
+
+    assets = {}
+    for root, dirs, files in os.walk(STATIC_FOLDER):
+        if root == STATIC_FOLDER:
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for filename in sorted(files):
+            relative_path = os.path.relpath(os.path.join(root, filename), STATIC_FOLDER).replace(os.sep, '/')
+            entry = build_asset(relative_path)
+            if entry is None:
+                continue
+            assets[relative_path] = entry
+
+            saved = 100 - entry['size'] * 100 // max(entry['original_size'], 1)
+            line = f"  {relative_path}: {entry['original_size']} -> {entry['size']} B (-{saved}%)"
+            if 'webp' in entry:
+                line += f", webp {entry['webp_size']} B"
+            print(line)
+
+    manifest = {
+        'generated_at': datetime.now().isoformat(),
+        'assets': assets,
+    }
+
+    with open(get_manifest_path(STATIC_FOLDER), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    print(f"\n✅ Собрано файлов: {len(assets)}, манифест: {DIST_DIR}/{MANIFEST_NAME}")
+    return manifest
+
+
+if __name__ == "__main__":
+    build_assets()
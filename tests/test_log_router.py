@@ -0,0 +1,48 @@
+"""
+Тесты классификации записей по файлам логов.
+"""
+
+import pytest
+
+from app.config.logging import LOG_FILTERS
+from app.utils.log_router import classify_record
+
+
+def baseline_categories(name: str, message: str) -> frozenset:
+    """Категории по фильтрам файлов логов до LogRouter (целые слова для ключевых слов)."""
+    words = set(''.join(c if c.isalnum() else ' ' for c in message.upper()).split())
+    categories = set()
+    if 'REQUEST' in message or 'RESPONSE' in message:
+        categories.add('requests')
+    if 'admin' in name or 'ADMIN' in message:
+        categories.add('admin')
+    for category in ('security', 'files', 'performance'):
+        if words & set(LOG_FILTERS[category]):
+            categories.add(category)
+    return frozenset(categories)
+
+
+@pytest.mark.parametrize('name, message', [
+    ('app.routes.main', 'Getting settings'),
+    ('flask.app', 'Exception on /boom [GET]'),
+    ('app.routes.api', 'Created project 5'),
+    ('app.utils.cache', 'Updated cache'),
+    ('app.utils.logging', 'REQUEST GET /api/projects from 127.0.0.1 -> 200 (0.012s)'),
+    ('app.middleware.logging_middleware', 'RESPONSE 404 for POST /login'),
+    ('app.routes.main', 'request without marker'),
+    ('app.routes.admin', 'Запрос к списку услуг'),
+    ('app.routes.main', 'ADMIN create service'),
+    ('app.routes.main', 'admin panel opened'),
+    ('app.api.auth', 'Failed login for user'),
+    ('app.api.auth', 'JWT token expired'),
+    ('app.utils.upload', 'Upload image done'),
+    ('app.utils.upload', 'Delete file photo.jpg'),
+    ('app.utils.upload', 'Timestamp updated'),
+    ('app.services', 'Slow query detected'),
+    ('app.services', 'Request duration 2.5s'),
+    ('app.routes.main', 'Запрос к главной странице'),
+])
+def test_classify_record_matches_baseline_filters(name, message):
+    """Ключевые слова сообщения направляют запись в те же файлы, что и прежние фильтры."""
+    record = {'extra': {}, 'name': name, 'message': message}
+    assert classify_record(record) == baseline_categories(name, message)
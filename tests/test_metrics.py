@@ -0,0 +1,31 @@
+"""
+Тесты текстового формата метрик.
+"""
+
+from app.utils.metrics import MetricsRegistry, _format_value
+
+
+def test_format_value_accepts_int():
+    """Целые значения (int и float) выводятся без '.0'."""
+    assert _format_value(1) == '1'
+    assert _format_value(2.0) == '2'
+    assert _format_value(0.25) == '0.25'
+
+
+def test_render_int_gauge():
+    """Gauge с int-значением (размер пула соединений) рендерится в памяти процесса."""
+    registry = MetricsRegistry()
+    registry.register('db_pool_connections', 'gauge', 'Соединения пула БД')
+    registry.set('db_pool_connections', 3, {'state': 'checked_out'})
+
+    assert 'db_pool_connections{state="checked_out"} 3\n' in registry.render()
+
+
+def test_render_int_gauge_multiproc(tmp_path):
+    """Хранилище файлов воркеров выводит то же значение."""
+    registry = MetricsRegistry(str(tmp_path))
+    registry.register('db_pool_connections', 'gauge', 'Соединения пула БД')
+    registry.set('db_pool_connections', 3, {'state': 'checked_out'})
+
+    assert 'db_pool_connections{state="checked_out"} 3\n' in registry.render()
+    registry.configure()